@@ -0,0 +1,28 @@
+"""
+Archiva las partidas terminadas hace más de GAME_ARCHIVE_AFTER segundos (por defecto 600)
+y borra sus filas vivas (ver src/database/services/services_archive.py). El servidor ya lo
+hace solo cada minuto; esto es para vaciar lo acumulado de una vez.
+
+    python archive_games.py
+"""
+from src.database.database import SessionLocal
+from src.database.services.services_archive import archive_finished_games
+
+
+def main():
+    db = SessionLocal()
+    total = 0
+    try:
+        while True:
+            archived = archive_finished_games(db)
+            if not archived:
+                break
+            total += len(archived)
+            print(f"{len(archived)} partidas archivadas ({archived[0]}..{archived[-1]})")
+    finally:
+        db.close()
+    print(f"{total} partidas archivadas en total")
+
+
+if __name__ == "__main__":
+    main()
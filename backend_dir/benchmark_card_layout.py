@@ -0,0 +1,165 @@
+"""
+Compara las queries de cartas con el esquema viejo (cards + detectives + events,
+herencia con joins) y el actual (una sola tabla), sobre los mismos datos en una
+base SQLite en memoria:
+
+  - playersState: los jugadores de una partida con sus cartas
+  - draft: las 3 cartas del draft de una partida
+
+    python benchmark_card_layout.py [--games 50] [--repeat 200]
+"""
+import argparse
+import datetime
+import random
+import time
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, create_engine, event, orm, select
+from sqlalchemy.orm import Session, declarative_base, relationship, selectinload
+from src.database.database import Base
+from src.database.models import Card, Detective, Event, Game, Player
+from src.database.card_catalog import CATALOG
+
+LegacyBase = declarative_base()
+
+
+class LegacyPlayer(LegacyBase):
+    __tablename__ = "players"
+    player_id = Column(Integer, primary_key=True)
+    game_id = Column(Integer)
+    # igual que Player.cards: sólo las cartas no descartadas
+    cards = relationship(
+        "LegacyCard", primaryjoin="and_(LegacyPlayer.player_id == LegacyCard.player_id, LegacyCard.dropped == False)"
+    )
+
+
+class LegacyCard(LegacyBase):
+    __tablename__ = "cards"
+    card_id = Column(Integer, primary_key=True)
+    type = Column(String(15))
+    picked_up = Column(Boolean)
+    dropped = Column(Boolean)
+    player_id = Column(Integer, ForeignKey("players.player_id"))
+    game_id = Column(Integer)
+    draft = Column(Boolean)
+    discardInt = Column(Integer)
+    __mapper_args__ = {"polymorphic_on": type, "polymorphic_abstract": True}
+
+
+class LegacyDetective(LegacyCard):
+    __tablename__ = "detectives"
+    card_id = Column(Integer, ForeignKey("cards.card_id"), primary_key=True)
+    name = Column(String(30))
+    quantity_set = Column(Integer)
+    set_id = Column(Integer)
+    __mapper_args__ = {"polymorphic_identity": "detective"}
+
+
+class LegacyEvent(LegacyCard):
+    __tablename__ = "events"
+    card_id = Column(Integer, ForeignKey("cards.card_id"), primary_key=True)
+    name = Column(String(30))
+    __mapper_args__ = {"polymorphic_identity": "event"}
+
+
+def _deal(games: int):
+    """Misma partida para los dos esquemas: 4 jugadores con 6 cartas, 3 de draft y el resto en el mazo."""
+    rng = random.Random(0)
+    layout = []
+    for game_id in range(1, games + 1):
+        deck = [d for d in CATALOG for _ in range(d.quantity)]
+        rng.shuffle(deck)
+        players = [(game_id - 1) * 4 + i + 1 for i in range(4)]
+        for position, card_definition in enumerate(deck):
+            owner = players[position // 6] if position < 24 else None
+            layout.append((game_id, owner, position in (24, 25, 26), card_definition))
+    return layout
+
+
+def _legacy_session(games: int) -> Session:
+    engine = create_engine("sqlite:///:memory:")
+    LegacyBase.metadata.create_all(engine)
+    db = Session(engine)
+    db.add_all(LegacyPlayer(player_id=p, game_id=(p - 1) // 4 + 1) for p in range(1, games * 4 + 1))
+    for game_id, owner, draft, d in _deal(games):
+        fields = dict(game_id=game_id, player_id=owner, picked_up=owner is not None, dropped=False, draft=draft, discardInt=0)
+        if d.type == "detective":
+            db.add(LegacyDetective(name=d.name, quantity_set=d.quantity_set, **fields))
+        else:
+            db.add(LegacyEvent(name=d.name, **fields))
+    db.commit()
+    return db
+
+
+def _current_session(games: int) -> Session:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    for game_id in range(1, games + 1):
+        db.add(Game(game_id=game_id, name=f"Bench {game_id}", status="in course", max_players=4, min_players=2, players_amount=4))
+    db.add_all(
+        Player(player_id=p, name=f"P{p}", game_id=(p - 1) // 4 + 1, birth_date=datetime.date(2000, 1, 1))
+        for p in range(1, games * 4 + 1)
+    )
+    for game_id, owner, draft, d in _deal(games):
+        model = Detective if d.type == "detective" else Event
+        db.add(model(definition_id=d.definition_id, game_id=game_id, player_id=owner,
+                     picked_up=owner is not None, dropped=False, draft=draft, discardInt=0))
+    db.commit()
+    return db
+
+
+def _measure(db: Session, query, repeat: int, games: int):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    start = time.perf_counter()
+    for i in range(repeat):
+        query(db, i % games + 1)
+        db.expire_all()
+    elapsed = (time.perf_counter() - start) / repeat
+    joins = sum(sql.upper().count(" JOIN ") for sql in statements) / repeat
+    return elapsed * 1000, len(statements) / repeat, joins
+
+
+def legacy_players_state(db: Session, game_id: int):
+    loader = orm.with_polymorphic(LegacyCard, [LegacyDetective, LegacyEvent])
+    players = db.query(LegacyPlayer).options(selectinload(LegacyPlayer.cards.of_type(loader))).filter(LegacyPlayer.game_id == game_id).all()
+    return [(card.card_id, card.name) for player in players for card in player.cards]
+
+
+def current_players_state(db: Session, game_id: int):
+    # mismas opciones de carga que PLAYERS_STATE_LOADER, sólo para las cartas
+    loader = orm.with_polymorphic(Card, [Detective, Event])
+    players = db.query(Player).options(selectinload(Player.cards.of_type(loader))).filter(Player.game_id == game_id).all()
+    return [(card.card_id, card.name) for player in players for card in player.cards]
+
+
+def legacy_draft(db: Session, game_id: int):
+    loader = orm.with_polymorphic(LegacyCard, [LegacyDetective, LegacyEvent])
+    return [card.name for card in db.execute(select(loader).where(LegacyCard.game_id == game_id, LegacyCard.draft == True).limit(3)).scalars()]
+
+
+def current_draft(db: Session, game_id: int):
+    loader = orm.with_polymorphic(Card, [Detective, Event])
+    return [card.name for card in db.execute(select(loader).where(Card.game_id == game_id, Card.draft == True).limit(3)).scalars()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    legacy, current = _legacy_session(args.games), _current_session(args.games)
+    print(f"{'query':<14}{'esquema':<10}{'ms/llamada':>12}{'queries':>10}{'joins':>8}")
+    for name, before, after in (
+        ("playersState", legacy_players_state, current_players_state),
+        ("draft", legacy_draft, current_draft),
+    ):
+        # los dos esquemas tienen que devolver lo mismo
+        assert sorted(before(legacy, 1)) == sorted(after(current, 1))
+        for layout, db, query in (("joins", legacy, before), ("una tabla", current, after)):
+            ms, queries, joins = _measure(db, query, args.repeat, args.games)
+            print(f"{name:<14}{layout:<10}{ms:>12.3f}{queries:>10.1f}{joins:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
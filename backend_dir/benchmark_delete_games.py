@@ -0,0 +1,129 @@
+"""
+Borra las mismas partidas (61 cartas, secretos, sets, un trade y --logs entradas de log
+cada una) de tres formas, sobre una base SQLite en memoria, y compara tiempo y statements:
+
+  - orm: cargar cada fila y db.delete() una por una, de las dependientes hacia games
+  - delete_games: services_bulk.delete_games de a una partida (lo que hace DELETE /game)
+  - lote: services_bulk.delete_games de a --batch partidas (lo que hacen el archivo y el reaper)
+
+    python benchmark_delete_games.py [--games 1000] [--logs 200] [--batch 100]
+"""
+import argparse
+import datetime
+import os
+import random
+import time
+
+# ni journal ni fotos: se mide sólo el borrado
+os.environ.setdefault("GAME_JOURNAL_DIR", "")
+os.environ.setdefault("GAME_SNAPSHOTS", "0")
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.orm import Session
+from src.database.card_catalog import CATALOG
+from src.database.database import Base
+from src.database.models import ActiveTrade, Card, Game, Log, Player, Secrets, Set
+from src.database.services.services_bulk import GAME_TABLES, delete_games
+
+PLAYERS = 4
+
+
+def _populate(games: int, logs: int) -> Session:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    rng = random.Random(0)
+    birth = datetime.date(2000, 1, 1)
+    db.execute(insert(Game), [
+        dict(game_id=g, name=f"Bench {g}", status="in course", max_players=4, min_players=2, players_amount=PLAYERS)
+        for g in range(1, games + 1)
+    ])
+    db.execute(insert(Player), [
+        dict(player_id=p, name=f"P{p}", game_id=(p - 1) // PLAYERS + 1, birth_date=birth)
+        for p in range(1, games * PLAYERS + 1)
+    ])
+    db.execute(insert(Set), [
+        dict(set_id=g, name="Hercule Poirot", game_id=g, player_id=(g - 1) * PLAYERS + 1) for g in range(1, games + 1)
+    ])
+    cards, secrets, entries, card_id = [], [], [], 0
+    for g in range(1, games + 1):
+        players = [(g - 1) * PLAYERS + i + 1 for i in range(PLAYERS)]
+        deck = [d for d in CATALOG for _ in range(d.quantity)]
+        rng.shuffle(deck)
+        for position, d in enumerate(deck):
+            card_id += 1
+            cards.append(dict(card_id=card_id, type=d.type, definition_id=d.definition_id, game_id=g,
+                              player_id=players[position // 6] if position < 24 else None,
+                              picked_up=position < 24, dropped=False, draft=False, discardInt=0))
+        secrets += [dict(game_id=g, player_id=p, murderer=False, acomplice=False, revelated=False) for p in players for _ in range(3)]
+        entries += [dict(game_id=g, player_id=players[i % PLAYERS], type="TurnChange") for i in range(logs)]
+    db.execute(insert(Card.__table__), cards)
+    db.execute(insert(Secrets), secrets)
+    db.execute(insert(Log), entries)
+    db.execute(insert(ActiveTrade), [
+        dict(game_id=g, player_one_id=(g - 1) * PLAYERS + 1, player_two_id=(g - 1) * PLAYERS + 2) for g in range(1, games + 1)
+    ])
+    db.commit()
+    return db
+
+
+def orm_delete(db: Session, game_ids):
+    for game_id in game_ids:
+        for model in (Log, ActiveTrade, Card, Set, Secrets, Player, Game):
+            for obj in db.query(model).filter(model.game_id == game_id):
+                db.delete(obj)
+            db.flush()
+        db.commit()
+
+
+def delete_one_by_one(db: Session, game_ids):
+    for game_id in game_ids:
+        delete_games(db, [game_id])
+        db.commit()
+
+
+def delete_in_batches(batch: int):
+    def run(db: Session, game_ids):
+        for start in range(0, len(game_ids), batch):
+            delete_games(db, game_ids[start:start + batch])
+            db.commit()
+    return run
+
+
+def _measure(games: int, logs: int, strategy):
+    db = _populate(games, logs)
+    statements = [0]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += len(parameters) if executemany else 1
+
+    event.listen(db.get_bind(), "before_cursor_execute", count)
+    start = time.perf_counter()
+    strategy(db, list(range(1, games + 1)))
+    elapsed = time.perf_counter() - start
+    left = sum(db.execute(select(func.count()).select_from(table)).scalar() for table in GAME_TABLES)
+    assert left == 0, f"quedaron {left} filas"
+    db.close()
+    return elapsed, statements[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--logs", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.games} partidas, {61 + args.logs + 3 * PLAYERS + PLAYERS + 3} filas cada una")
+    print(f"{'forma':<14}{'segundos':>10}{'ms/partida':>12}{'statements':>12}{'por partida':>13}")
+    for name, strategy in (
+        ("orm", orm_delete),
+        ("delete_games", delete_one_by_one),
+        (f"lote de {args.batch}", delete_in_batches(args.batch)),
+    ):
+        elapsed, statements = _measure(args.games, args.logs, strategy)
+        print(f"{name:<14}{elapsed:>10.2f}{elapsed * 1000 / args.games:>12.2f}{statements:>12}{statements / args.games:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
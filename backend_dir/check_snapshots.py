@@ -0,0 +1,47 @@
+"""
+Compara la foto de cada partida (game_snapshots) con las tablas normalizadas.
+
+    python check_snapshots.py [--repair] [<game_id> ...]
+
+Sin ids revisa todas las partidas. --repair rearma las fotos que no coinciden.
+Las fotos se rearman en segundo plano: una partida commiteada hace menos de
+GAME_SNAPSHOT_INTERVAL segundos puede aparecer desactualizada.
+Sale con código 1 si alguna no coincidía.
+"""
+import argparse
+import sys
+from src.database.database import SessionLocal
+from src.database.game_snapshot import check_snapshot, write_snapshot
+from src.database.models import Game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("game_ids", type=int, nargs="*")
+    parser.add_argument("--repair", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    inconsistent = 0
+    try:
+        game_ids = args.game_ids or [game_id for (game_id,) in db.query(Game.game_id).order_by(Game.game_id)]
+        for game_id in game_ids:
+            diffs = check_snapshot(game_id, db)
+            if not diffs:
+                continue
+            inconsistent += 1
+            print(f"partida {game_id}: {len(diffs)} diferencias")
+            for diff in diffs[:20]:
+                print(f"  {diff['table']}[{diff['pk']}].{diff['column']}: {diff['expected']!r} != {diff['actual']!r}")
+            if args.repair:
+                write_snapshot(game_id, db)
+                db.commit()
+                print("  foto rearmada")
+    finally:
+        db.close()
+    print(f"{len(game_ids)} partidas revisadas, {inconsistent} con la foto desactualizada")
+    sys.exit(1 if inconsistent else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Migra una base existente del esquema viejo de cartas (cards + detectives + events,
+herencia con joins) al de una sola tabla: las columnas de detectives y events pasan
+a cards, las cartas del catálogo quedan guardadas sólo con su definition_id y las
+tablas detectives y events se borran.
+
+Se puede correr más de una vez: si ya no existen las tablas viejas no hace nada.
+
+    python migrate_cards_single_table.py
+"""
+from sqlalchemy import Connection, inspect, text
+from src.database.card_catalog import CATALOG
+
+
+def _add_missing_columns(conn: Connection):
+    columns = {column["name"] for column in inspect(conn).get_columns("cards")}
+    for name, ddl in (
+        ("definition_id", "SMALLINT NULL"),
+        ("name", "VARCHAR(30) NULL"),
+        ("quantity_set", "INTEGER NULL"),
+        ("set_id", "INTEGER NULL"),
+    ):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE cards ADD COLUMN {name} {ddl}"))
+    # SQLite no permite agregar foreign keys con ALTER TABLE
+    if "set_id" not in columns and conn.dialect.name == "mysql":
+        conn.execute(text("ALTER TABLE cards ADD CONSTRAINT fk_cards_set FOREIGN KEY (set_id) REFERENCES sets(set_id)"))
+
+
+def _copy_subclass_columns(conn: Connection):
+    # subconsultas correlacionadas: leen detectives/events, no la tabla que se actualiza
+    conn.execute(text(
+        "UPDATE cards SET "
+        "name = (SELECT d.name FROM detectives d WHERE d.card_id = cards.card_id), "
+        "quantity_set = (SELECT d.quantity_set FROM detectives d WHERE d.card_id = cards.card_id), "
+        "set_id = (SELECT d.set_id FROM detectives d WHERE d.card_id = cards.card_id) "
+        "WHERE type = 'detective'"
+    ))
+    conn.execute(text(
+        "UPDATE cards SET name = (SELECT e.name FROM events e WHERE e.card_id = cards.card_id) "
+        "WHERE type = 'event'"
+    ))
+
+
+def _compact_catalog_cards(conn: Connection):
+    """Las cartas del catálogo pasan a guardar sólo definition_id (y quantity_set sólo si difiere)."""
+    for card_definition in CATALOG:
+        conn.execute(text(
+            "UPDATE cards SET definition_id = :definition_id, name = NULL "
+            "WHERE type = :type AND name = :name"
+        ), {"definition_id": card_definition.definition_id, "type": card_definition.type, "name": card_definition.name})
+        if card_definition.quantity_set is not None:
+            conn.execute(text(
+                "UPDATE cards SET quantity_set = NULL "
+                "WHERE definition_id = :definition_id AND quantity_set = :quantity_set"
+            ), {"definition_id": card_definition.definition_id, "quantity_set": card_definition.quantity_set})
+
+
+def migrate(conn: Connection) -> bool:
+    """Devuelve False si la base ya estaba migrada."""
+    tables = set(inspect(conn).get_table_names())
+    if "detectives" not in tables and "events" not in tables:
+        return False
+
+    _add_missing_columns(conn)
+    _copy_subclass_columns(conn)
+    _compact_catalog_cards(conn)
+    conn.execute(text("DROP TABLE detectives"))
+    conn.execute(text("DROP TABLE events"))
+    return True
+
+
+if __name__ == "__main__":
+    from src.database.database import engine
+
+    with engine.begin() as conn:
+        if migrate(conn):
+            print("Cartas migradas a una sola tabla")
+        else:
+            print("La base ya usa una sola tabla para las cartas")
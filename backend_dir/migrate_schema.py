@@ -0,0 +1,115 @@
+"""
+Pone al día una base creada antes de las columnas, tablas e índices nuevos: crea las
+tablas que falten (archivo, fotos, chat...), agrega las columnas que falten, completa
+las filas viejas y crea los índices.
+
+- games.created_at: las partidas viejas no tienen fecha de creación. Se completan con
+  LEGACY_CREATED_AT (quedan como las más antiguas para el listado y el reaper) y la
+  columna pasa a NOT NULL: el cursor del listado (services_lobby.py) no admite nulos.
+- games.seed, games.rng_draws: cada partida vieja recibe su propia semilla (game_rng.py)
+  y cero usos del azar.
+- games.finished_at: queda nula; el archivo toma las partidas terminadas sin fecha
+  como vencidas (services_archive.due_games).
+- active_trades.created_at: los trades viejos cuentan desde la migración, así el reaper
+  los limpia pasado REAPER_TRADE_TTL.
+- ix_games_status_created_at, ix_games_status_free_seats (listado, reaper, unirse
+  rápido), ix_active_trades_created_at (reaper) e ix_archived_games_archived_at
+  (listado del archivo).
+
+Se puede correr más de una vez: sólo agrega lo que falta.
+
+    python migrate_schema.py
+"""
+import datetime
+from typing import List, Set
+from sqlalchemy import Connection, inspect, text
+from src.database.database import Base
+from src.database.game_rng import new_seed
+from src.database.models import ActiveTrade, ArchivedGame, Game
+
+LEGACY_CREATED_AT = datetime.datetime(1970, 1, 1)
+
+
+def _add_missing_columns(conn: Connection, table: str, columns) -> List[str]:
+    existing = {column["name"] for column in inspect(conn).get_columns(table)}
+    added = []
+    for name, ddl in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+            added.append(f"{table}.{name}")
+    return added
+
+
+def _backfill(conn: Connection, table: str, column: str, value) -> int:
+    return conn.execute(text(f"UPDATE {table} SET {column} = :value WHERE {column} IS NULL"), {"value": value}).rowcount
+
+
+def _index_names(conn: Connection, table: str) -> Set[str]:
+    # inspect().get_indexes saltea los índices funcionales (ix_games_status_free_seats): se leen del catálogo
+    if conn.dialect.name == "mysql":
+        query = ("SELECT DISTINCT index_name FROM information_schema.statistics "
+                 "WHERE table_schema = DATABASE() AND table_name = :table")
+    else:
+        query = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"
+    return set(conn.execute(text(query), {"table": table}).scalars())
+
+
+def _create_missing_indexes(conn: Connection, table) -> List[str]:
+    existing = _index_names(conn, table.name)
+    created = []
+    for index in sorted(table.indexes, key=lambda index: index.name):
+        if index.name not in existing:
+            index.create(conn)
+            created.append(index.name)
+    return created
+
+
+def _seed_games(conn: Connection) -> int:
+    # una semilla distinta por partida: no alcanza con un UPDATE con un solo valor
+    game_ids = conn.execute(text("SELECT game_id FROM games WHERE seed IS NULL")).scalars().all()
+    for game_id in game_ids:
+        conn.execute(text("UPDATE games SET seed = :seed WHERE game_id = :game_id"), {"seed": new_seed(), "game_id": game_id})
+    return len(game_ids)
+
+
+def migrate(conn: Connection) -> List[str]:
+    """Devuelve lo que cambió (vacía si la base ya estaba al día)."""
+    tables = set(inspect(conn).get_table_names())
+    Base.metadata.create_all(conn)  # sólo crea las que faltan, con sus índices
+    changes = sorted(set(inspect(conn).get_table_names()) - tables)
+
+    changes += _add_missing_columns(conn, "games", [
+        ("created_at", "DATETIME NULL"),
+        ("seed", "BIGINT NULL"),
+        ("rng_draws", "INTEGER NULL"),
+        ("finished_at", "DATETIME NULL"),
+    ])
+    changes += _add_missing_columns(conn, "active_trades", [("created_at", "DATETIME NULL")])
+
+    if _backfill(conn, "games", "created_at", LEGACY_CREATED_AT):
+        changes.append("games.created_at completado")
+    if _seed_games(conn):
+        changes.append("games.seed completado")
+    if _backfill(conn, "games", "rng_draws", 0):
+        changes.append("games.rng_draws completado")
+    if _backfill(conn, "active_trades", "created_at", datetime.datetime.now()):
+        changes.append("active_trades.created_at completado")
+    # SQLite no permite cambiar la nulabilidad con ALTER TABLE: ahí la garantiza el modelo
+    if conn.dialect.name == "mysql":
+        nullable = {column["name"]: column["nullable"] for column in inspect(conn).get_columns("games")}
+        if nullable["created_at"]:
+            conn.execute(text("ALTER TABLE games MODIFY created_at DATETIME NOT NULL"))
+            changes.append("games.created_at NOT NULL")
+
+    changes += _create_missing_indexes(conn, Game.__table__)
+    changes += _create_missing_indexes(conn, ActiveTrade.__table__)
+    changes += _create_missing_indexes(conn, ArchivedGame.__table__)
+    return changes
+
+
+if __name__ == "__main__":
+    from src.database.database import engine
+
+    with engine.begin() as conn:
+        changes = migrate(conn)
+    print("\n".join(changes) if changes else "La base ya estaba al día")
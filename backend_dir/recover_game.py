@@ -0,0 +1,23 @@
+"""
+Reconstruye partidas en la base a partir de su journal (última foto + registros posteriores).
+
+    python recover_game.py <game_id> [<game_id> ...]
+"""
+import sys
+from src.database.database import SessionLocal
+from src.database.journal import recover_game
+
+
+def main(game_ids):
+    db = SessionLocal()
+    try:
+        for game_id in game_ids:
+            seq = recover_game(game_id, db)
+            db.commit()
+            print(f"Partida {game_id} recuperada hasta la acción {seq}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]])
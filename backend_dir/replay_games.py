@@ -0,0 +1,50 @@
+"""
+Vuelve a jugar partidas del journal contra los servicios reales (src/simulation/replay.py),
+repartidas entre procesos, y reporta latencia por ruta y diferencias con lo grabado.
+
+    python replay_games.py [--journal-dir game_journal] [--processes N] [--check-every-action] [game_id ...]
+
+Sin ids juega todas las partidas del directorio. Sale con código 1 si alguna no coincide.
+"""
+import argparse
+import glob
+import os
+import sys
+from src.simulation.replay import latency_profile, replay_games
+
+
+def journaled_games(journal_dir: str):
+    names = (os.path.basename(path)[: -len(".jsonl")] for path in glob.glob(os.path.join(journal_dir, "*.jsonl")))
+    return sorted(int(name) for name in names if name.isdigit())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("game_ids", type=int, nargs="*")
+    parser.add_argument("--journal-dir", default=os.getenv("GAME_JOURNAL_DIR") or "game_journal")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--check-every-action", action="store_true")
+    args = parser.parse_args()
+
+    game_ids = args.game_ids or journaled_games(args.journal_dir)
+    results = replay_games(args.journal_dir, game_ids, args.processes, args.check_every_action)
+
+    actions = sum(r["actions"] for r in results)
+    seconds = sum(r["seconds"] for r in results)
+    print(f"{len(results)} partidas, {actions} acciones, {actions / seconds if seconds else 0:.0f} acciones/s por proceso")
+    print(f"  {'ruta':<50}{'n':>7}{'media':>9}{'p50':>9}{'p95':>9}{'max':>9}  (ms)")
+    for route, stats in latency_profile(results).items():
+        print(f"  {route:<50}{stats['count']:>7}{stats['mean']:>9.2f}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['max']:>9.2f}")
+
+    inconsistent = [r for r in results if not r["consistent"]]
+    for result in inconsistent:
+        print(f"partida {result['game_id']}: no coincide con lo grabado")
+        for failed in result["failed"]:
+            print(f"  #{failed['seq']} {failed['route']} -> {failed['status']}")
+        for diff in result["diffs"]:
+            print(f"  {diff['table']}[{diff['pk']}].{diff['column']}: {diff['expected']!r} != {diff['actual']!r}")
+    sys.exit(1 if inconsistent else 0)
+
+
+if __name__ == "__main__":
+    main()
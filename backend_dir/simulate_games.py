@@ -0,0 +1,78 @@
+"""
+Juega partidas completas con el motor en memoria (src/simulation/engine.py), repartidas
+entre todos los núcleos, y reporta partidas por segundo, duración promedio y qué
+caminos de las reglas se recorrieron.
+
+    python simulate_games.py [--games 100000] [--players 4] [--processes N] [--seed 0]
+
+--players 0 reparte las partidas entre 2 y 6 jugadores.
+"""
+import argparse
+import os
+import time
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, Tuple
+from src.simulation.engine import play_game, rule_paths
+
+CHUNK = 500  # partidas por tarea: pocas idas y vueltas entre procesos
+
+
+def play_chunk(args: Tuple[int, int, int]) -> Dict:
+    """Juega `count` partidas con semillas consecutivas desde `first_seed` y devuelve los totales."""
+    first_seed, count, players = args
+    totals = {"games": 0, "turns": 0, "paths": Counter()}
+    for seed in range(first_seed, first_seed + count):
+        game = play_game(players or 2 + seed % 5, seed=seed)
+        totals["games"] += 1
+        totals["turns"] += game.turn
+        totals["paths"].update(game.paths)
+    return totals
+
+
+def simulate(games: int, players: int = 4, processes: int = None, seed: int = 0) -> Dict:
+    chunks = [(seed + start, min(CHUNK, games - start), players) for start in range(0, games, CHUNK)]
+    start = time.perf_counter()
+    if processes == 1:
+        results = list(map(play_chunk, chunks))
+    else:
+        with Pool(processes) as pool:
+            results = pool.map(play_chunk, chunks)
+    elapsed = time.perf_counter() - start
+
+    paths = Counter()
+    for result in results:
+        paths.update(result["paths"])
+    turns = sum(result["turns"] for result in results)
+    known = rule_paths()
+    return {
+        "games": games,
+        "seconds": elapsed,
+        "games_per_second": games / elapsed if elapsed else 0.0,
+        "average_turns": turns / games if games else 0.0,
+        "paths": paths,
+        "coverage": sum(1 for path in known if paths[path]) / len(known),
+        "missing": [path for path in known if not paths[path]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = simulate(args.games, args.players, args.processes, args.seed)
+    print(f"{report['games']} partidas en {report['seconds']:.1f}s con {args.processes} procesos")
+    print(f"{report['games_per_second']:.0f} partidas/s, {report['average_turns']:.1f} turnos por partida")
+    print(f"cobertura de reglas: {report['coverage']:.0%}")
+    for path, count in sorted(report["paths"].items()):
+        print(f"  {path:<45}{count:>12}")
+    if report["missing"]:
+        print("sin recorrer: " + ", ".join(report["missing"]))
+
+
+if __name__ == "__main__":
+    main()
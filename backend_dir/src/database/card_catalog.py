@@ -0,0 +1,68 @@
+"""
+Catálogo fijo de las cartas del juego.
+
+Las 61 cartas de cada partida salen de estas 21 definiciones. Cada definición tiene
+un id chico (definition_id) y es lo único que guarda la fila de la carta: el nombre y
+el quantity_set se leen de acá, así que no se repiten en cada partida.
+"""
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+class CardDefinition(NamedTuple):
+    definition_id: int
+    type: str  # "detective" o "event", igual que el polymorphic_identity
+    name: str
+    quantity: int  # copias por partida
+    quantity_set: Optional[int] = None  # sólo detectives: cartas necesarias para bajar el set
+
+
+# (nombre, copias, cartas para el set)
+_DETECTIVES = [
+    ("Harley Quin Wildcard", 4, 1),
+    ("Adriane Oliver", 3, 1),
+    ("Miss Marple", 3, 3),
+    ("Parker Pyne", 3, 2),
+    ("Tommy Beresford", 2, 2),
+    ("Lady Eileen 'Bundle' Brent", 3, 2),
+    ("Tuppence Beresford", 2, 2),
+    ("Hercule Poirot", 3, 3),
+    ("Mr Satterthwaite", 2, 2),
+]
+
+# (nombre, copias)
+_EVENTS = [
+    ("Delay the murderer's escape!", 3),
+    ("Point your suspicions", 3),
+    ("Dead card folly", 3),
+    ("Another Victim", 2),
+    ("Look into the ashes", 3),
+    ("Card trade", 3),
+    ("And then there was one more...", 2),
+    ("Early train to paddington", 2),
+    ("Cards off the table", 1),
+    ("Not so fast", 10),
+    ("Social Faux Pas", 3),
+    ("Blackmailed", 1),
+]
+
+CATALOG: Tuple[CardDefinition, ...] = tuple(
+    [CardDefinition(i + 1, "detective", name, quantity, quantity_set)
+     for i, (name, quantity, quantity_set) in enumerate(_DETECTIVES)]
+    + [CardDefinition(len(_DETECTIVES) + i + 1, "event", name, quantity)
+       for i, (name, quantity) in enumerate(_EVENTS)]
+)
+
+_BY_ID: Dict[int, CardDefinition] = {d.definition_id: d for d in CATALOG}
+_BY_NAME: Dict[Tuple[str, str], CardDefinition] = {(d.type, d.name): d for d in CATALOG}
+
+
+def definition(definition_id: int) -> CardDefinition:
+    return _BY_ID[definition_id]
+
+
+def definition_by_name(card_type: str, name: str) -> Optional[CardDefinition]:
+    return _BY_NAME.get((card_type, name))
+
+
+def definitions(card_type: str) -> Tuple[CardDefinition, ...]:
+    return tuple(d for d in CATALOG if d.type == card_type)
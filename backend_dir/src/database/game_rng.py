@@ -0,0 +1,27 @@
+"""
+Azar determinístico por partida.
+
+Cada partida guarda una semilla (`Game.seed`) y cuántas veces se usó el azar
+(`Game.rng_draws`). Cada barajada o robo pide un `random.Random` nuevo con
+`game_rng(game)`, derivado de la semilla y del número de uso, así que no hay que
+guardar el estado interno del generador entre requests: con la misma semilla y las
+mismas acciones en el mismo orden la partida sale igual, bit a bit.
+
+Las listas que se barajan tienen que venir en un orden fijo (ORDER BY de la clave),
+si no el resultado depende del orden en que las devuelva la base.
+"""
+import random
+import secrets
+from src.database.models import Game
+
+
+def new_seed() -> int:
+    return secrets.randbits(63)
+
+
+def game_rng(game: Game) -> random.Random:
+    if game.seed is None:
+        # partidas creadas antes de que existiera la semilla
+        game.seed = new_seed()
+    game.rng_draws = (game.rng_draws or 0) + 1
+    return random.Random(f"{game.seed}:{game.rng_draws}")
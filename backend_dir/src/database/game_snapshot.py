@@ -0,0 +1,169 @@
+"""
+Foto del estado completo de cada partida en una sola fila (`game_snapshots`).
+
+Cargar una partida desde las tablas normalizadas son siete consultas (games, players,
+cards, secrets, sets, card_log, active_trades). La foto guarda esas mismas filas, con la
+forma del estado del journal ({tabla: {pk: fila}}), como JSON comprimido en una columna:
+una carga en frío de sólo lectura lee una fila (`current_state`).
+
+Las requests no pagan la foto: el commit sólo anota las partidas que tocó (las mismas
+que invalidan su vista, ver services_game_view) y `snapshotCompactor` rearma sus fotos
+cada SNAPSHOT_INTERVAL segundos en su propia transacción, una vez por partida aunque
+se haya commiteado muchas veces en el medio. Mientras una partida espera la compactación
+su foto está vieja y `current_state` lee las tablas. `version` cuenta las reescrituras;
+`format` es el formato del blob: una foto de otro formato se ignora y se rearma.
+
+`check_snapshot` compara la foto con las tablas normalizadas (que siguen siendo la
+fuente de verdad) y devuelve las diferencias.
+
+GAME_SNAPSHOTS=0 desactiva la escritura.
+"""
+import asyncio
+import datetime
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Dict, List, Optional, Set
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+from src.database.database import SessionLocal
+from src.database.journal import diff_states, dump_state, restore_state
+from src.database.models import GameSnapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_INTERVAL = float(os.getenv("GAME_SNAPSHOT_INTERVAL", "5"))
+enabled = os.getenv("GAME_SNAPSHOTS", "1") != "0"
+
+_snapshots = GameSnapshot.__table__
+
+_dirty: Set[int] = set()  # partidas commiteadas después de su última foto
+_dirty_lock = threading.Lock()
+
+
+def encode_state(state: Dict[str, Dict]) -> bytes:
+    return zlib.compress(json.dumps(state, separators=(",", ":")).encode())
+
+
+def decode_state(blob: bytes) -> Dict[str, Dict]:
+    return json.loads(zlib.decompress(blob))
+
+
+def write_snapshot(game_id: int, db: Session) -> Optional[int]:
+    """Rearma la foto desde las tablas y devuelve su versión (None si la partida ya no existe). No commitea."""
+    state = dump_state(game_id, db)
+    if not state["games"]:
+        db.execute(delete(_snapshots).where(_snapshots.c.game_id == game_id))
+        return None
+    values = {"format": SNAPSHOT_FORMAT, "state": encode_state(state), "updated_at": datetime.datetime.now()}
+    result = db.execute(
+        update(_snapshots)
+        .where(_snapshots.c.game_id == game_id)
+        .values(version=_snapshots.c.version + 1, **values)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(_snapshots).values(game_id=game_id, version=1, **values))
+        return 1
+    return db.execute(select(_snapshots.c.version).where(_snapshots.c.game_id == game_id)).scalar_one()
+
+
+def load_snapshot(game_id: int, db: Session) -> Optional[dict]:
+    """{"version": n, "state": {...}} con una sola consulta; None si no hay foto (o es de otro formato)."""
+    row = db.execute(
+        select(_snapshots.c.version, _snapshots.c.format, _snapshots.c.state)
+        .where(_snapshots.c.game_id == game_id)
+    ).first()
+    if row is None or row.format != SNAPSHOT_FORMAT:
+        return None
+    return {"version": row.version, "state": decode_state(row.state)}
+
+
+def check_snapshot(game_id: int, db: Session) -> List[dict]:
+    """Diferencias entre las tablas normalizadas (lo esperado) y la foto; vacía si coinciden."""
+    snapshot = load_snapshot(game_id, db)
+    return diff_states(dump_state(game_id, db), snapshot["state"] if snapshot else {})
+
+
+def restore_from_snapshot(game_id: int, db: Session) -> Optional[int]:
+    """Vuelve a escribir las filas de la partida desde su foto. Devuelve la versión usada. No commitea."""
+    snapshot = load_snapshot(game_id, db)
+    if snapshot is None:
+        return None
+    restore_state(game_id, snapshot["state"], db)
+    return snapshot["version"]
+
+
+def current_state(game_id: int, db: Session) -> Dict[str, Dict]:
+    """
+    Estado de la partida: de la foto si está al día (una consulta), si no de las tablas.
+    Sólo para leer: `_dirty` es de este proceso y se pierde al reiniciar, así que la foto
+    puede estar vieja. Quien después borra o reescribe las filas usa dump_state.
+    """
+    if enabled and game_id not in _dirty:
+        snapshot = load_snapshot(game_id, db)
+        if snapshot is not None:
+            return snapshot["state"]
+    return dump_state(game_id, db)
+
+
+def compact_snapshots(db: Session) -> List[int]:
+    """Rearma en una transacción las fotos de las partidas pendientes. Devuelve sus ids."""
+    with _dirty_lock:
+        game_ids = sorted(_dirty)
+        _dirty.difference_update(game_ids)
+    try:
+        for game_id in game_ids:
+            write_snapshot(game_id, db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        with _dirty_lock:
+            _dirty.update(game_ids)
+        raise
+    return game_ids
+
+
+# insert=True: corre antes de que services_game_view consuma "touched_games"
+@event.listens_for(Session, "after_commit", insert=True)
+def _mark_dirty(session):
+    touched = session.info.get("touched_games")
+    if enabled and touched:
+        with _dirty_lock:
+            _dirty.update(touched)
+
+
+class SnapshotCompactor:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            return compact_snapshots(db)
+        except Exception:
+            logger.exception("No se pudieron rearmar las fotos de las partidas")
+            return []
+        finally:
+            db.close()
+
+    async def _compact_loop(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            await asyncio.to_thread(self.run_once)
+
+    def start(self):
+        if enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._compact_loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            # lo pendiente se escribe antes de apagar: si no, la foto quedaría vieja hasta el próximo commit
+            self.run_once()
+
+
+snapshotCompactor = SnapshotCompactor()
@@ -0,0 +1,420 @@
+"""
+Journal de acciones por partida.
+
+Cada commit que toca filas de una partida agrega un registro a un archivo de solo
+agregado (`<dir>/<game_id>.jsonl`): el número de secuencia, la acción que lo causó
+(método, template de la ruta, parámetros y body de la request, si vino de una; si
+la request commitea más de una vez, los registros siguientes comparten su `request`) y
+cómo quedaron las filas que cambió (o qué filas se borraron). Cada `SNAPSHOT_EVERY`
+registros se escribe una foto del estado completo de la partida (`<game_id>.snapshot.json`).
+
+Recuperar una partida es cargar la última foto, aplicarle los registros posteriores
+y volver a escribir las filas en la base (`recover_game`). El archivo completo es
+además la historia de la partida, acción por acción. Cuando se borra la partida
+(services_bulk.delete_games: el reaper, el archivo o DELETE /game) el registro que borra
+su fila de games no se agrega: se borran sus archivos, así una recuperación no la revive
+y los archivos de partidas que ya no existen no quedan para siempre.
+
+Las filas se arman con lo que ya está en la sesión, sin consultar la base, salvo
+los UPDATE en bloque (services_bulk), que no pasan por el ORM: para esos se relee
+la tabla de la partida antes del commit.
+
+La escritura de los archivos (agregar el registro, la primera carga de una partida y
+las fotos) la hace un hilo aparte en el orden de los commits: el commit sólo encola el
+registro y no bloquea el event loop. Leer el journal (`records`, `snapshot`, `load`)
+espera a que se escriba lo encolado.
+
+El directorio sale de GAME_JOURNAL_DIR; vacío desactiva el journal.
+"""
+import atexit
+import contextlib
+import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import delete, event, inspect, insert, select
+from sqlalchemy.orm import Session
+from src.database.database import Base
+from src.database.models import ActiveTrade, Card, Game, Log, Player, Secrets, Set
+from src.database.services.services_game_view import mark_games_touched
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_EVERY = 50
+
+JOURNALED_MODELS = (Game, Player, Card, Secrets, Set, Log, ActiveTrade)
+# en orden de dependencias: se insertan en este orden y se borran al revés
+TABLES = [t for t in Base.metadata.sorted_tables if t.name in {m.__tablename__ for m in JOURNALED_MODELS}]
+_BY_NAME = {t.name: t for t in TABLES}
+
+_ROWS_KEY = "journal_rows"
+_ALL_ROWS_KEY = "journal_all_rows"
+_RECORDS_KEY = "journal_records"
+
+
+def _pk(table) -> str:
+    return table.primary_key.columns.values()[0].name
+
+
+def _encode(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decode(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat(value)
+    return value
+
+
+def _object_row(obj) -> dict:
+    """Columnas ya cargadas del objeto; las que están expiradas no se leen (no hay query)."""
+    state = inspect(obj)
+    loaded = state.dict
+    return {
+        prop.columns[0].name: _encode(loaded[prop.key])
+        for prop in state.mapper.column_attrs
+        if prop.key in loaded and prop.columns[0].table.name in _BY_NAME
+    }
+
+
+def _game_id_of(obj) -> Optional[int]:
+    return inspect(obj).dict.get("game_id")
+
+
+# --- Estado de una partida: {tabla: {pk: fila}} ---
+
+def apply_record(state: Dict[str, Dict], record: dict):
+    if record.get("deleted", {}).get(Game.__tablename__):
+        # sin la fila de la partida no queda nada de ella
+        state.clear()
+        return
+    for table_name, rows in record.get("rows", {}).items():
+        pk = _pk(_BY_NAME[table_name])
+        table_state = state.setdefault(table_name, {})
+        for row in rows:
+            # las claves JSON son strings: el pk se guarda como string en el estado
+            table_state.setdefault(str(row[pk]), {}).update(row)
+    for table_name, pks in record.get("deleted", {}).items():
+        table_state = state.get(table_name, {})
+        for pk in pks:
+            table_state.pop(str(pk), None)
+
+
+class GameJournal:
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory or None
+        self._states: Dict[int, dict] = {}  # {game_id: {"seq": n, "state": {...}}}; sólo lo usa el hilo escritor
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def _path(self, game_id: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{game_id}{suffix}")
+
+    # --- Hilo escritor ---
+
+    def _submit(self, operation, *args):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_forever, name="game-journal", daemon=True)
+                self._writer.start()
+        self._queue.put((operation, args))
+
+    def _write_forever(self):
+        while True:
+            operation, args = self._queue.get()
+            try:
+                operation(*args)
+            except Exception:
+                logger.exception("No se pudo escribir el journal de la partida %s", args[0])
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Espera a que se escriba todo lo encolado."""
+        # el hilo escritor lee el archivo al cargar una partida: no se espera a sí mismo
+        if threading.current_thread() is not self._writer:
+            self._queue.join()
+
+    # --- Lectura ---
+
+    def records(self, game_id: int, after: int = 0) -> List[dict]:
+        self.flush()
+        try:
+            with open(self._path(game_id, ".jsonl")) as journal_file:
+                records = [json.loads(line) for line in journal_file if line.strip()]
+        except FileNotFoundError:
+            return []
+        return [r for r in records if r["seq"] > after]
+
+    def snapshot(self, game_id: int) -> dict:
+        self.flush()
+        try:
+            with open(self._path(game_id, ".snapshot.json")) as snapshot_file:
+                return json.load(snapshot_file)
+        except FileNotFoundError:
+            return {"seq": 0, "state": {}}
+
+    def load(self, game_id: int) -> dict:
+        """Última foto más los registros posteriores: {"seq": n, "state": {...}}."""
+        loaded = self.snapshot(game_id)
+        for record in self.records(game_id, after=loaded["seq"]):
+            apply_record(loaded["state"], record)
+            loaded["seq"] = record["seq"]
+        return loaded
+
+    # --- Escritura (encolada) ---
+
+    def append(self, game_id: int, record: dict):
+        """Encola el registro; el número de secuencia lo pone el hilo escritor."""
+        self._submit(self._append_now, game_id, record)
+
+    def _append_now(self, game_id: int, record: dict):
+        if record.get("deleted", {}).get(Game.__tablename__):
+            self._discard_now(game_id)
+            return
+        current = self._states.get(game_id)
+        if current is None:
+            current = self._states[game_id] = self.load(game_id)
+        current["seq"] += 1
+        record = {"seq": current["seq"], **record}
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(game_id, ".jsonl"), "a") as journal_file:
+            journal_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        apply_record(current["state"], record)
+        if current["seq"] % SNAPSHOT_EVERY == 0:
+            self._write_snapshot(game_id, current)
+
+    def _write_snapshot(self, game_id: int, current: dict):
+        # se escribe aparte y se renombra: una foto a medio escribir nunca reemplaza a la anterior
+        path = self._path(game_id, ".snapshot.json")
+        with open(path + ".tmp", "w") as snapshot_file:
+            json.dump(current, snapshot_file, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def _discard_now(self, game_id: int):
+        self._states.pop(game_id, None)
+        for suffix in (".jsonl", ".snapshot.json"):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._path(game_id, suffix))
+
+    def forget(self, game_id: int):
+        self._submit(self._states.pop, game_id, None)
+
+
+journal = GameJournal(os.getenv("GAME_JOURNAL_DIR", "game_journal"))
+# lo encolado se escribe antes de que termine el proceso (el hilo es daemon)
+atexit.register(lambda: journal.flush())
+
+
+# --- La acción en curso (la request HTTP que está commiteando) ---
+
+_current_action: ContextVar[Optional[dict]] = ContextVar("journal_action", default=None)
+
+
+class JournalMiddleware:
+    """Middleware ASGI: guarda método, ruta, parámetros y body de la request para el journal."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        action = {"id": uuid.uuid4().hex, "scope": scope, "body": b"", "journaled": set()}
+
+        async def receive_and_keep_body():
+            message = await receive()
+            if message["type"] == "http.request":
+                action["body"] += message.get("body", b"")
+            return message
+
+        token = _current_action.set(action)
+        try:
+            await self.app(scope, receive_and_keep_body, send)
+        finally:
+            _current_action.reset(token)
+
+
+def _current_request_id() -> Optional[str]:
+    action = _current_action.get()
+    return action["id"] if action else None
+
+
+def _describe_action(game_id: int) -> Optional[dict]:
+    """La acción va sólo en el primer registro de la request para esa partida; los demás llevan el mismo `request`."""
+    action = _current_action.get()
+    if action is None or game_id in action["journaled"]:
+        return None
+    action["journaled"].add(game_id)
+    scope = action["scope"]
+    route = scope.get("route")
+    body = action["body"].decode() if action["body"] else None
+    try:
+        body = json.loads(body) if body else None
+    except ValueError:
+        pass  # se guarda tal cual
+    return {
+        "method": scope["method"],
+        "route": getattr(route, "path", scope["path"]),
+        "params": scope.get("path_params", {}),
+        "body": body,
+    }
+
+
+# --- Captura: qué filas cambió cada flush y qué va al journal en el commit ---
+
+def touch_all_rows(session: Session, game_id: int, model):
+    """Para UPDATE en bloque: el registro lleva todas las filas de ese modelo (o tabla) en la partida."""
+    table_name = getattr(model, "__tablename__", None) or model.name
+    if journal.enabled and table_name in _BY_NAME:
+        session.info.setdefault(_ALL_ROWS_KEY, set()).add((game_id, table_name))
+
+
+def journal_deleted_rows(session: Session, table, *criteria):
+    """Para DELETE en bloque: se anotan las filas que van a borrarse. Hay que llamarla antes del DELETE."""
+    if not journal.enabled or table.name not in _BY_NAME:
+        return
+    pk = table.c[_pk(table)]
+    rows = session.info.setdefault(_ROWS_KEY, {})
+    for row_pk, game_id in session.execute(select(pk, table.c.game_id).where(*criteria)):
+        if game_id is not None:
+            rows[(game_id, table.name, (row_pk,))] = None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_rows(session, flush_context):
+    if not journal.enabled:
+        return
+    # la clave es el estado del objeto: los nuevos todavía no tienen identity en after_flush
+    rows = session.info.setdefault(_ROWS_KEY, {})
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, JOURNALED_MODELS):
+            game_id = _game_id_of(obj)
+            if game_id is not None:
+                rows[(game_id, obj.__tablename__, inspect(obj))] = obj
+    for obj in session.deleted:
+        if isinstance(obj, JOURNALED_MODELS):
+            game_id = _game_id_of(obj)
+            if game_id is not None:
+                rows[(game_id, obj.__tablename__, inspect(obj))] = None
+
+
+@event.listens_for(Session, "before_commit")
+def _prepare_records(session):
+    if not journal.enabled:
+        return
+    session.flush()
+    touched = session.info.pop(_ROWS_KEY, {})
+    all_rows = session.info.pop(_ALL_ROWS_KEY, set())
+    records: Dict[int, dict] = {}
+
+    for (game_id, table_name, key), obj in touched.items():
+        record = records.setdefault(game_id, {"rows": {}, "deleted": {}})
+        if obj is None:
+            # key es el estado del objeto o, para los DELETE en bloque, la identidad
+            identity = key if isinstance(key, tuple) else key.identity
+            record["deleted"].setdefault(table_name, []).append(identity[0])
+        else:
+            record["rows"].setdefault(table_name, []).append(_object_row(obj))
+
+    for game_id, table_name in all_rows:
+        table = _BY_NAME[table_name]
+        rows = session.execute(select(table).where(table.c.game_id == game_id)).mappings().all()
+        record = records.setdefault(game_id, {"rows": {}, "deleted": {}})
+        record["rows"].setdefault(table_name, []).extend(
+            {name: _encode(value) for name, value in row.items()} for row in rows
+        )
+
+    for game_id, record in records.items():
+        record["request"] = _current_request_id()
+        record["action"] = _describe_action(game_id)
+        record["at"] = time.time()
+    if records:
+        session.info[_RECORDS_KEY] = records
+
+
+@event.listens_for(Session, "after_commit")
+def _write_records(session):
+    for game_id, record in session.info.pop(_RECORDS_KEY, {}).items():
+        journal.append(game_id, record)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_records(session):
+    for key in (_ROWS_KEY, _ALL_ROWS_KEY, _RECORDS_KEY):
+        session.info.pop(key, None)
+
+
+# --- Recuperación ---
+
+def dump_state(game_id: int, db: Session) -> Dict[str, Dict]:
+    """Las filas de la partida en la base, con la misma forma que el estado del journal."""
+    state = {}
+    for table in TABLES:
+        rows = db.execute(select(table).where(table.c.game_id == game_id)).mappings().all()
+        pk = _pk(table)
+        state[table.name] = {str(row[pk]): {name: _encode(value) for name, value in row.items()} for row in rows}
+    return state
+
+
+def diff_states(expected: Dict[str, Dict], actual: Dict[str, Dict], ignored=()) -> List[dict]:
+    """Filas que faltan o sobran y columnas que no coinciden; sólo se comparan las columnas de `expected`."""
+    diffs = []
+    for table in TABLES:
+        left, right = expected.get(table.name, {}), actual.get(table.name, {})
+        for pk in sorted(left.keys() | right.keys(), key=int):
+            if pk not in right or pk not in left:
+                diffs.append({"table": table.name, "pk": pk, "column": None,
+                              "expected": left.get(pk), "actual": right.get(pk)})
+                continue
+            for column, value in left[pk].items():
+                if (table.name, column) in ignored:
+                    continue
+                if right[pk].get(column) != value:
+                    diffs.append({"table": table.name, "pk": pk, "column": column,
+                                  "expected": value, "actual": right[pk].get(column)})
+    return diffs
+
+
+def restore_state(game_id: int, state: Dict[str, Dict], db: Session):
+    """Reemplaza las filas de la partida en la base por las del estado. No commitea."""
+    for table in reversed(TABLES):
+        db.execute(delete(table).where(table.c.game_id == game_id))
+    for table in TABLES:
+        # un INSERT por conjunto de columnas: las filas no siempre traen todas (Detective/Event)
+        by_columns: Dict[frozenset, List[dict]] = {}
+        for row in state.get(table.name, {}).values():
+            by_columns.setdefault(frozenset(row), []).append(
+                {name: _decode(table.c[name], value) for name, value in row.items()}
+            )
+        for rows in by_columns.values():
+            db.execute(insert(table), rows)
+    mark_games_touched(db, game_id)
+    db.expire_all()
+
+
+def recover_game(game_id: int, db: Session) -> int:
+    """Reconstruye la partida desde el journal y devuelve el último número de secuencia aplicado."""
+    loaded = journal.load(game_id)
+    restore_state(game_id, loaded["state"], db)
+    return loaded["seq"]
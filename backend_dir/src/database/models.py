@@ -9,10 +9,19 @@ from sqlalchemy import (
     Text,
     JSON,
     Date,
-    func
+    SmallInteger,
+    BigInteger,
+    LargeBinary,
+    Index,
+    and_,
+    false,
+    func,
+    or_
 )
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import Comparator, hybrid_property
 from src.database.database import Base
+from src.database.card_catalog import definition, definition_by_name
 import datetime
 import uuid
 
@@ -31,6 +40,11 @@ class Game(Base):
     current_turn = Column(Integer, nullable = True)
     cards_left = Column(Integer , nullable=True)
     amount_votes = Column (Integer, default = 0)
+    seed = Column(BigInteger, nullable=True)  # semilla del azar de la partida (game_rng.py)
+    rng_draws = Column(Integer, default=0)
+    finished_at = Column(DateTime(), nullable=True)  # desde cuándo corre el plazo para archivarla
+    # NOT NULL: es la clave del cursor del listado (services_lobby.py); migrate_schema.py completa las viejas
+    created_at = Column(DateTime(), nullable=False, default=datetime.datetime.now)
     players = relationship("Player", back_populates="game")
     cards = relationship("Card", back_populates="game")
     secrets = relationship("Secrets", back_populates="game")
@@ -39,6 +53,13 @@ class Game(Base):
     sets = relationship("Set" , back_populates="game")
     log = relationship("Log" , back_populates="game")
 
+    # el reaper y el listado por antigüedad buscan partidas por estado y creación (services_reaper.py, services_lobby.py)
+    __table_args__ = (Index("ix_games_status_created_at", "status", "created_at"),)
+
+
+# el listado ordenado por lugares libres (services_lobby.py); en MySQL es un índice funcional (8.0.13+)
+Index("ix_games_status_free_seats", Game.status, Game.max_players - Game.players_amount)
+
 
 
 class Player(Base):
@@ -49,7 +70,7 @@ class Player(Base):
     birth_date = Column(Date, nullable=False)
     turn_order = Column(Integer)  # Posición del jugador en el turno
     avatar = Column(String(255), nullable=True)
-    game_id = Column(Integer, ForeignKey("games.game_id"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.game_id", ondelete="CASCADE"), nullable=False)
     game = relationship("Game", back_populates="players")
     cards = relationship(
         "Card",
@@ -72,36 +93,125 @@ class Card(Base):
     type = Column(String(15))
     picked_up = Column(Boolean)
     dropped = Column(Boolean)
-    player_id = Column(Integer, ForeignKey("players.player_id"), nullable=True)
+    player_id = Column(Integer, ForeignKey("players.player_id", ondelete="SET NULL"), nullable=True)
     player = relationship("Player", back_populates="cards")
-    game_id = Column(Integer, ForeignKey("games.game_id"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.game_id", ondelete="CASCADE"), nullable=False)
     game = relationship("Game", back_populates="cards")
     draft = Column(Boolean, default=False)
     discardInt = Column(
         Integer, default=0
     )  # en caso de ser -1 representara que se jugo delay murderers escape
+    definition_id = Column(SmallInteger, nullable=True)  # carta del catálogo (card_catalog.py)
+    _name = Column("name", String(30))  # sólo para cartas que no están en el catálogo
 
+    # herencia de una sola tabla: detectives y eventos viven en cards, sin joins para leerlos
     __mapper_args__ = {"polymorphic_on": type, "polymorphic_abstract": True}
     
     log = relationship("Log" , back_populates="card")
 
 
-class Detective(Card):
-    __tablename__ = "detectives"
-    name = Column(String(30))
-    card_id = Column(Integer, ForeignKey("cards.card_id"), primary_key=True)
-    quantity_set = Column(Integer)
-    set_id = Column(Integer, ForeignKey("sets.set_id"), nullable=True)
+class _CatalogName(Comparator):
+    """
+    `Event.name == "Not so fast"` en una query: por definition_id si el nombre es del catálogo.
+    Las cartas del catálogo tienen la columna name en NULL, así que cualquier otro operador
+    (like, order_by, select...) daría un resultado equivocado: sólo se admiten ==, !=,
+    in_ y not_in, y el resto levanta NotImplementedError.
+    """
+
+    def __init__(self, cls):
+        super().__init__(cls._name)
+        self.cls = cls
+
+    def _split(self, names):
+        """(definition_ids de los nombres del catálogo, nombres que no están en él)"""
+        card_type = self.cls.__mapper_args__["polymorphic_identity"]
+        ids, others = [], []
+        for name in names:
+            card_definition = definition_by_name(card_type, name)
+            if card_definition:
+                ids.append(card_definition.definition_id)
+            else:
+                others.append(name)
+        return ids, others
+
+    def __eq__(self, other):
+        return self.in_([other])
+
+    def __ne__(self, other):
+        return self.not_in([other])
+
+    def in_(self, other):
+        ids, others = self._split(other)
+        clauses = []
+        if ids:
+            clauses.append(self.cls.definition_id.in_(ids))
+        if others:
+            clauses.append(self.cls._name.in_(others))
+        return or_(*clauses) if clauses else false()
+
+    def not_in(self, other):
+        ids, others = self._split(other)
+        # la columna que no se compara está en NULL: se acepta explícitamente
+        return and_(
+            or_(self.cls.definition_id.is_(None), self.cls.definition_id.not_in(ids)) if ids else True,
+            or_(self.cls._name.is_(None), self.cls._name.not_in(others)) if others else True,
+        )
+
+    notin_ = not_in
+
+    def operate(self, op, *other, **kwargs):
+        raise NotImplementedError(f"{self.cls.__name__}.name no admite {op.__name__}: sólo ==, !=, in_ y not_in")
+
+    def reverse_operate(self, op, other, **kwargs):
+        raise NotImplementedError(f"{self.cls.__name__}.name no admite {op.__name__}: sólo ==, !=, in_ y not_in")
+
+    def __clause_element__(self):
+        raise NotImplementedError(f"{self.cls.__name__}.name no es una columna: sólo admite ==, !=, in_ y not_in")
+
+
+class CatalogCard:
+    """
+    Nombre de la carta: las cartas del catálogo sólo guardan definition_id y el nombre se
+    lee del catálogo; la columna name queda para cartas que no están en él.
+    """
+
+    @hybrid_property
+    def name(self):
+        if self.definition_id is not None:
+            return definition(self.definition_id).name
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        card_definition = definition_by_name(self.__mapper_args__["polymorphic_identity"], value)
+        self.definition_id = card_definition.definition_id if card_definition else None
+        self._name = None if card_definition else value
+
+    @name.comparator
+    def name(cls):
+        return _CatalogName(cls)
+
+
+class Detective(CatalogCard, Card):
+    _quantity_set = Column("quantity_set", Integer)  # sólo si difiere del catálogo
+    set_id = Column(Integer, ForeignKey("sets.set_id", ondelete="SET NULL"), nullable=True)
     set = relationship("Set", back_populates="detective")
 
     __mapper_args__ = {"polymorphic_identity": "detective"}
 
+    @property
+    def quantity_set(self):
+        if self._quantity_set is None and self.definition_id is not None:
+            return definition(self.definition_id).quantity_set
+        return self._quantity_set
 
-class Event(Card):
-    __tablename__ = "events"
-    name = Column(String(30))
-    card_id = Column(Integer, ForeignKey("cards.card_id"), primary_key=True)
+    @quantity_set.setter
+    def quantity_set(self, value):
+        from_catalog = definition(self.definition_id).quantity_set if self.definition_id is not None else None
+        self._quantity_set = None if value == from_catalog else value
 
+
+class Event(CatalogCard, Card):
     __mapper_args__ = {"polymorphic_identity": "event"}
 
 
@@ -111,9 +221,9 @@ class Secrets(Base):
     murderer = Column(Boolean)
     acomplice = Column(Boolean)
     revelated = Column(Boolean)
-    player_id = Column(Integer, ForeignKey("players.player_id"), nullable=True)
+    player_id = Column(Integer, ForeignKey("players.player_id", ondelete="SET NULL"), nullable=True)
     player = relationship("Player", back_populates="secrets")
-    game_id = Column(Integer, ForeignKey("games.game_id"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.game_id", ondelete="CASCADE"), nullable=False)
     game = relationship("Game", back_populates="secrets")
 
 
@@ -121,9 +231,9 @@ class Set(Base):
     __tablename__ = "sets"
     set_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(30))
-    player_id = Column(Integer, ForeignKey("players.player_id"), nullable=True)
+    player_id = Column(Integer, ForeignKey("players.player_id", ondelete="SET NULL"), nullable=True)
     player = relationship("Player", back_populates="sets")
-    game_id = Column(Integer, ForeignKey("games.game_id"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.game_id", ondelete="CASCADE"), nullable=False)
     game = relationship("Game", back_populates="sets")
     detective = relationship("Detective" , back_populates="set")
     log = relationship("Log" , back_populates="set")
@@ -132,15 +242,17 @@ class ActiveTrade(Base):
     __tablename__ = "active_trades"
 
     id = Column(Integer, primary_key=True)
-    game_id = Column(Integer, ForeignKey("games.game_id"))
+    game_id = Column(Integer, ForeignKey("games.game_id", ondelete="CASCADE"))
 
     # Los dos jugadores involucrados
-    player_one_id = Column(Integer, ForeignKey("players.player_id"))
-    player_two_id = Column(Integer, ForeignKey("players.player_id"))
+    player_one_id = Column(Integer, ForeignKey("players.player_id", ondelete="CASCADE"))
+    player_two_id = Column(Integer, ForeignKey("players.player_id", ondelete="CASCADE"))
 
     # Las cartas que han seleccionado (aquí resolvemos el deadlock)
-    player_one_card_id = Column(Integer, ForeignKey("cards.card_id"), nullable=True)
-    player_two_card_id = Column(Integer, ForeignKey("cards.card_id"), nullable=True)
+    player_one_card_id = Column(Integer, ForeignKey("cards.card_id", ondelete="SET NULL"), nullable=True)
+    player_two_card_id = Column(Integer, ForeignKey("cards.card_id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime(), default=datetime.datetime.now, index=True)
 
 
 class Log(Base):
@@ -148,18 +260,56 @@ class Log(Base):
 
     log_id = Column(Integer , primary_key=True , autoincrement=True)
     
-    card_id = Column(Integer , ForeignKey("cards.card_id"),nullable=True)
+    card_id = Column(Integer , ForeignKey("cards.card_id", ondelete="SET NULL"),nullable=True)
     card = relationship("Card" , back_populates="log")
     
-    set_id = Column(Integer , ForeignKey("sets.set_id"), nullable=True)
+    set_id = Column(Integer , ForeignKey("sets.set_id", ondelete="SET NULL"), nullable=True)
     set = relationship("Set" , back_populates="log")
 
-    player_id = Column(Integer , ForeignKey("players.player_id"),nullable=False)
+    player_id = Column(Integer , ForeignKey("players.player_id", ondelete="CASCADE"),nullable=False)
     player = relationship("Player" , back_populates="logs")
     
-    game_id = Column(Integer , ForeignKey("games.game_id"),nullable=False)
+    game_id = Column(Integer , ForeignKey("games.game_id", ondelete="CASCADE"),nullable=False)
     game = relationship("Game" , back_populates="log")
     
     created_at = Column(DateTime(), server_default=func.now())
     type = Column(String(30))
     
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+
+    message_id = Column(Integer, primary_key=True, autoincrement=True)
+    game_id = Column(Integer, ForeignKey("games.game_id", ondelete="CASCADE"), nullable=False, index=True)
+    player_id = Column(Integer, ForeignKey("players.player_id", ondelete="SET NULL"), nullable=True)
+    sender_name = Column(String(100), nullable=False)
+    message = Column(Text, nullable=False)
+    # lo pone el servidor al recibir el mensaje, no al persistirlo (se persiste en lotes)
+    created_at = Column(DateTime(), nullable=False)
+
+
+class GameSnapshot(Base):
+    """Todo el estado de una partida en una fila (game_snapshot.py): se rearma en segundo plano después de los commits que la tocan."""
+    __tablename__ = "game_snapshots"
+
+    game_id = Column(Integer, ForeignKey("games.game_id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False)  # cuántas veces se reescribió
+    format = Column(SmallInteger, nullable=False)  # formato del blob: si cambia, la foto se rearma
+    state = Column(LargeBinary(length=2**24), nullable=False)  # JSON comprimido con zlib
+    updated_at = Column(DateTime(), nullable=False)
+
+
+class ArchivedGame(Base):
+    """Partida terminada, fuera de las tablas vivas (services_archive.py): datos para listar y el estado final comprimido."""
+    __tablename__ = "archived_games"
+
+    game_id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(30), nullable=False)
+    players_amount = Column(Integer, nullable=False)
+    players = Column(JSON, nullable=False)  # [{"player_id", "name"}]
+    log_entries = Column(Integer, nullable=False)
+    finished_at = Column(DateTime(), nullable=True, index=True)
+    archived_at = Column(DateTime(), nullable=False, index=True)  # orden del listado (GET /archive/games)
+    format = Column(SmallInteger, nullable=False)
+    state = Column(LargeBinary(length=2**24), nullable=False)  # JSON comprimido: filas finales, log y chat
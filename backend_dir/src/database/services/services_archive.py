@@ -0,0 +1,167 @@
+"""
+Archivo de partidas terminadas.
+
+Las filas de una partida terminada (cartas, secretos, sets, log, chat) no se vuelven a
+usar, pero quedaban para siempre en las tablas vivas y en los listados de partidas.
+Pasados ARCHIVE_AFTER segundos desde que terminó (`games.finished_at`, así los jugadores
+todavía ven el final), cada partida se compacta en una fila de `archived_games`: los
+datos para listarla (nombre, jugadores, cuándo terminó) y un blob comprimido con el
+estado final de todas sus filas, el log y el chat completos. En la misma transacción se
+borran sus filas vivas: un DELETE por tabla para todo el lote (services_bulk.delete_games).
+
+`gameArchiver` lo corre en segundo plano cada ARCHIVE_INTERVAL segundos; archive_games.py
+lo corre a mano. GET /archive/games lista el archivo de a páginas, de lo último archivado
+a lo primero, con el mismo cursor (keyset) que el listado de partidas (services_lobby.py).
+"""
+import asyncio
+import datetime
+import json
+import logging
+import os
+import zlib
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import insert, or_, select
+from sqlalchemy.orm import Session, defer
+from src.database import journal as journal_module
+from src.database.journal import dump_state
+from src.database.database import SessionLocal
+from src.database.models import ArchivedGame, ChatMessage, Game
+from src.database.services.services_chat import chatManager
+from src.database.services.services_bulk import delete_games
+from src.database.services.services_lobby import decode_cursor, keyset_page, keyset_query
+from src.database.services.services_websockets import broadcast_available_games
+from src.webSocket.outbox import deliver
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 1
+ARCHIVE_AFTER = float(os.getenv("GAME_ARCHIVE_AFTER", "600"))
+ARCHIVE_INTERVAL = 60.0
+ARCHIVE_BATCH = 100  # partidas por transacción
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def write_archives(game_ids: Iterable[int], db: Session) -> List[int]:
+    """Escribe la fila de archivo de cada partida terminada de la lista (sin borrar nada). Devuelve sus ids."""
+    games = db.query(Game).filter(Game.game_id.in_(list(game_ids)), Game.status == "finished").all()
+    if not games:
+        return []
+    archived_at = datetime.datetime.now()
+    archives = []
+    for game in games:
+        # de las tablas y no de la foto (game_snapshot.current_state): las filas se borran después,
+        # y una foto vieja (el proceso que la marcó se reinició, otro worker...) perdería el final
+        state = dump_state(game.game_id, db)
+        chat = db.execute(
+            select(ChatMessage.__table__)
+            .where(ChatMessage.game_id == game.game_id)
+            .order_by(ChatMessage.message_id)
+        ).mappings().all()
+        payload = {"format": ARCHIVE_FORMAT, "state": state, "chat": [dict(message) for message in chat]}
+        archives.append({
+            "game_id": game.game_id,
+            "name": game.name,
+            "players_amount": game.players_amount,
+            "players": [{"player_id": p["player_id"], "name": p["name"]} for p in state["players"].values()],
+            "log_entries": len(state["card_log"]),
+            "finished_at": game.finished_at,
+            "archived_at": archived_at,
+            "format": ARCHIVE_FORMAT,
+            "state": zlib.compress(json.dumps(payload, separators=(",", ":"), default=_isoformat).encode()),
+        })
+    db.execute(insert(ArchivedGame.__table__), archives)
+    return [archive["game_id"] for archive in archives]
+
+
+def archive_games(game_ids: Iterable[int], db: Session) -> List[int]:
+    """Archiva las partidas terminadas de la lista y borra sus filas vivas. Devuelve las archivadas. No commitea."""
+    ids = write_archives(game_ids, db)
+    delete_games(db, ids)
+    return ids
+
+
+def due_games(db: Session, now: Optional[datetime.datetime] = None, limit: int = ARCHIVE_BATCH) -> List[int]:
+    """Partidas terminadas hace más de ARCHIVE_AFTER (o antes de que existiera finished_at)."""
+    cutoff = (now or datetime.datetime.now()) - datetime.timedelta(seconds=ARCHIVE_AFTER)
+    return list(db.execute(
+        select(Game.game_id)
+        .where(Game.status == "finished", or_(Game.finished_at.is_(None), Game.finished_at <= cutoff))
+        .order_by(Game.game_id)
+        .limit(limit)
+    ).scalars())
+
+
+def archive_finished_games(db: Session, now: Optional[datetime.datetime] = None) -> List[int]:
+    """Un lote de partidas vencidas, en una transacción. Devuelve los ids archivados."""
+    try:
+        archived = archive_games(due_games(db, now), db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    for game_id in archived:
+        chatManager.forget(game_id)
+        journal_module.journal.forget(game_id)
+    return archived
+
+
+def archived_games_page(db: Session, limit: int, cursor: Optional[str] = None) -> Tuple[List[ArchivedGame], Optional[str]]:
+    """Una página del archivo, por (archived_at, game_id) descendente, y el cursor de la siguiente. ValueError si el cursor es inválido."""
+    after = decode_cursor("archived", cursor) if cursor else None
+    # el blob con el estado no hace falta para listar
+    query = db.query(ArchivedGame).options(defer(ArchivedGame.state))
+    query = keyset_query(query, ArchivedGame.archived_at, ArchivedGame.game_id, True, after)
+    return keyset_page(query, limit, "archived", lambda archive: (archive.archived_at, archive.game_id))
+
+
+def load_archive(game_id: int, db: Session) -> Optional[dict]:
+    archive = db.get(ArchivedGame, game_id)
+    if archive is None:
+        return None
+    payload = json.loads(zlib.decompress(archive.state))
+    return {
+        "game_id": archive.game_id,
+        "name": archive.name,
+        "players": archive.players,
+        "finished_at": archive.finished_at,
+        "archived_at": archive.archived_at,
+        "state": payload["state"],
+        "chat": payload["chat"],
+    }
+
+
+class GameArchiver:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            return archive_finished_games(db)
+        except Exception:
+            logger.exception("Error al archivar partidas")
+            return []
+        finally:
+            db.close()
+
+    async def _archive_loop(self):
+        while True:
+            await asyncio.sleep(ARCHIVE_INTERVAL)
+            archived = await asyncio.to_thread(self.run_once)
+            if archived:
+                # la lista del lobby cambia una vez por lote, no por partida
+                await deliver(broadcast_available_games)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._archive_loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+gameArchiver = GameArchiver()
@@ -0,0 +1,102 @@
+"""
+Transiciones de estado que cambian muchas filas a la vez.
+
+En lugar de traer los objetos y modificarlos uno por uno (un UPDATE por fila al
+hacer flush), se emite un único UPDATE ... WHERE. La cantidad de queries queda
+fija sin importar cuántos jugadores o cartas toque.
+
+Los borrados también van en bloque: `delete_games` borra todas las filas de las
+partidas con un DELETE por tabla, de las tablas que dependen de otras hacia games, y
+`delete_players` resuelve lo que apunta a los jugadores según el `ondelete` que declara
+cada FK en models.py (CASCADE se borra, SET NULL se desengancha). Con una base que ya
+tiene esas FKs el motor haría lo mismo; así funciona también con bases creadas antes.
+"""
+from typing import Dict, List
+from sqlalchemy import case, delete, inspect, select, update
+from sqlalchemy.orm import Session
+from src.database.database import Base
+from src.database.models import ArchivedGame, Game, Player
+from src.database.services.services_game_view import mark_games_touched
+from src.database.journal import journal_deleted_rows, touch_all_rows
+
+# tablas con filas de cada partida, de las que dependen de otras a games: el orden de borrado
+GAME_TABLES = [
+    table for table in reversed(Base.metadata.sorted_tables)
+    if "game_id" in table.c and table.name != ArchivedGame.__tablename__
+]
+
+
+def bulk_update(db: Session, model, game_id: int, *criteria, **values) -> int:
+    """
+    UPDATE model SET values WHERE criteria, en un solo statement. Los objetos de ese
+    modelo que ya estén en la sesión se actualizan también (synchronize_session).
+    No commitea: el commit sigue siendo responsabilidad de quien llama.
+    Devuelve la cantidad de filas modificadas.
+    """
+    result = db.execute(update(model).where(*criteria).values(**values))
+    # un update en bloque no pasa por el flush, así que la vista de la partida se invalida a mano
+    mark_games_touched(db, game_id)
+    touch_all_rows(db, game_id, model)
+    return result.rowcount
+
+
+def value_by_id(id_column, values: dict, current):
+    """CASE id_column WHEN id THEN valor ... ELSE current END, para asignar un valor distinto por fila en un solo UPDATE."""
+    return case(values, value=id_column, else_=current)
+
+
+def delete_games(db: Session, game_ids: List[int]) -> Dict[str, int]:
+    """
+    Borra las partidas y todas sus filas, un DELETE por tabla sin importar cuántas
+    cartas o logs tengan. No commitea. Devuelve las filas borradas por tabla.
+    """
+    deleted: Dict[str, int] = {}
+    if not game_ids:
+        return deleted
+    # al journal le alcanza con la fila de games: borrarla descarta la partida y sus archivos
+    journal_deleted_rows(db, Game.__table__, Game.game_id.in_(game_ids))
+    for table in GAME_TABLES:
+        deleted[table.name] = db.execute(delete(table).where(table.c.game_id.in_(game_ids))).rowcount
+    mark_games_touched(db, *game_ids)
+    # los objetos de esas partidas que estén en la sesión ya no existen: quedan desligados, como con db.delete()
+    _expunge(db, lambda obj: inspect(obj).dict.get("game_id") in game_ids)
+    return deleted
+
+
+def _expunge(db: Session, deleted):
+    for obj in [obj for obj in db.identity_map.values() if deleted(obj)]:
+        db.expunge(obj)
+
+
+def _references(table):
+    """FKs de otras tablas que apuntan a `table`."""
+    return [fk for other in Base.metadata.sorted_tables for fk in other.foreign_keys if fk.column.table is table]
+
+
+def delete_players(db: Session, player_ids: List[int]) -> Dict[str, int]:
+    """
+    Borra los jugadores: lo que los referencia con ondelete CASCADE se borra y lo que
+    tiene SET NULL queda sin jugador. Un statement por FK. No commitea.
+    """
+    deleted: Dict[str, int] = {}
+    players = Player.__table__
+    game_ids = list(db.execute(select(players.c.game_id).where(players.c.player_id.in_(player_ids)).distinct()).scalars())
+    if not game_ids:
+        return deleted
+    for fk in _references(players):
+        child = fk.parent.table
+        if fk.ondelete == "CASCADE":
+            journal_deleted_rows(db, child, fk.parent.in_(player_ids))
+            rows = db.execute(delete(child).where(fk.parent.in_(player_ids))).rowcount
+            deleted[child.name] = deleted.get(child.name, 0) + rows
+        else:
+            db.execute(update(child).where(fk.parent.in_(player_ids)).values({fk.parent.name: None}))
+            for game_id in game_ids:
+                touch_all_rows(db, game_id, child)
+    journal_deleted_rows(db, players, players.c.player_id.in_(player_ids))
+    deleted[players.name] = db.execute(delete(players).where(players.c.player_id.in_(player_ids))).rowcount
+    mark_games_touched(db, *game_ids)
+    _expunge(db, lambda obj: isinstance(obj, Player) and inspect(obj).identity[0] in player_ids)
+    # a las filas que quedaron sin jugador se les vuelve a leer el player_id
+    db.expire_all()
+    return deleted
@@ -0,0 +1,133 @@
+"""
+Índice en memoria de dónde está cada carta de una partida.
+
+Cada carta de la partida ocupa un slot (su posición entre los card_id de la partida)
+y cada lugar (mazo, draft, descarte, la mano de cada jugador, cada set) es un entero
+usado como máscara de bits sobre esos slots. El orden de la pila de descarte se
+guarda aparte, en un array de slots de abajo hacia arriba.
+
+Así "¿la carta X está en la mano de Y?" es un AND, el tamaño de una mano es un
+popcount (en vez del COUNT de only_6) y una foto de toda la disposición de cartas
+son unos pocos enteros.
+
+El índice es un tópico más de la vista versionada de la partida (services_game_view):
+se arma con una sola query la primera vez que se pide para una versión y queda
+guardado hasta que un commit sobre la partida incrementa la versión. Refleja lo
+commiteado; una sesión con cambios sin commitear tiene que consultar la base.
+"""
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.database.models import Card
+from src.database.services.services_game_view import TOPICS, game_view
+
+
+class CardIndex:
+    def __init__(self, card_ids: Iterable[int]):
+        self.card_ids: List[int] = sorted(card_ids)
+        self.slots: Dict[int, int] = {card_id: slot for slot, card_id in enumerate(self.card_ids)}
+        self.deck = 0
+        self.draft = 0
+        self.discard = 0
+        self.hands: Dict[int, int] = {}
+        self.sets: Dict[int, int] = {}
+        self.discard_order = array("H")  # slots de la pila de descarte, el último es el de arriba
+
+    @classmethod
+    def from_rows(cls, rows) -> "CardIndex":
+        """rows: (card_id, player_id, picked_up, dropped, draft, discardInt, set_id) de cada carta."""
+        rows = list(rows)
+        index = cls(row[0] for row in rows)
+        discarded = []
+        for card_id, player_id, picked_up, dropped, draft, discard_int, set_id in rows:
+            bit = index.bit(card_id)
+            # mismos criterios que las queries: mano = del jugador, levantada y no descartada
+            if player_id is not None and picked_up and not dropped:
+                index.hands[player_id] = index.hands.get(player_id, 0) | bit
+            elif set_id is not None:
+                index.sets[set_id] = index.sets.get(set_id, 0) | bit
+            elif dropped:
+                index.discard |= bit
+                discarded.append((discard_int or 0, card_id))
+            elif draft:
+                index.draft |= bit
+            elif player_id is None and not picked_up:
+                index.deck |= bit
+        index.discard_order.extend(index.slots[card_id] for _, card_id in sorted(discarded))
+        return index
+
+    def bit(self, card_id: int) -> int:
+        slot = self.slots.get(card_id)
+        return 0 if slot is None else 1 << slot
+
+    def _ids(self, mask: int) -> List[int]:
+        return [card_id for slot, card_id in enumerate(self.card_ids) if mask >> slot & 1]
+
+    def hand(self, player_id: int) -> int:
+        return self.hands.get(player_id, 0)
+
+    def in_hand(self, player_id: int, card_id: int) -> bool:
+        return bool(self.hand(player_id) & self.bit(card_id))
+
+    def hand_size(self, player_id: int) -> int:
+        return self.hand(player_id).bit_count()
+
+    def hand_ids(self, player_id: int) -> List[int]:
+        return self._ids(self.hand(player_id))
+
+    def in_deck(self, card_id: int) -> bool:
+        return bool(self.deck & self.bit(card_id))
+
+    def deck_size(self) -> int:
+        return self.deck.bit_count()
+
+    def in_draft(self, card_id: int) -> bool:
+        return bool(self.draft & self.bit(card_id))
+
+    def in_discard(self, card_id: int) -> bool:
+        return bool(self.discard & self.bit(card_id))
+
+    def top_discard(self, amount: int) -> List[int]:
+        """card_id de las `amount` cartas de arriba de la pila de descarte, de arriba hacia abajo."""
+        return [self.card_ids[slot] for slot in reversed(self.discard_order[-amount:])] if amount > 0 else []
+
+    def snapshot(self) -> Tuple:
+        """Foto inmutable de la disposición de cartas, comparable y barata de guardar."""
+        return (
+            tuple(self.card_ids),
+            self.deck,
+            self.draft,
+            self.discard,
+            tuple(sorted(self.hands.items())),
+            tuple(sorted(self.sets.items())),
+            self.discard_order.tobytes(),
+        )
+
+
+def _build_card_index(db: Session, game_id: int) -> CardIndex:
+    # sobre la tabla y no las entidades: sólo columnas, sin el filtro por tipo de la herencia
+    cards = Card.__table__
+    stmt = (
+        select(
+            cards.c.card_id, cards.c.player_id, cards.c.picked_up, cards.c.dropped,
+            cards.c.draft, cards.c.discardInt, cards.c.set_id,
+        )
+        .where(cards.c.game_id == game_id)
+    )
+    return CardIndex.from_rows(db.execute(stmt).all())
+
+
+TOPICS["cardIndex"] = _build_card_index
+
+
+def has_pending_changes(db: Session) -> bool:
+    """True si la sesión tiene cambios sin commitear (el índice todavía no los ve)."""
+    return bool(db.new or db.dirty or db.deleted or db.info.get("touched_games"))
+
+
+def card_index(game_id: int, db: Session) -> Optional[CardIndex]:
+    """Índice de la versión commiteada de la partida, o None si la sesión tiene cambios pendientes."""
+    if has_pending_changes(db):
+        return None
+    return game_view(game_id).data("cardIndex", db)
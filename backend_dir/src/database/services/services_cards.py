@@ -1,21 +1,25 @@
-import random
 from fastapi import Depends
 from src.database.database import SessionLocal, get_db
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from src.database.models import Player, Card , Detective , Event, Game , Log, Set
+from src.database.services.services_card_index import card_index
+from src.database.card_catalog import definitions
+from src.database.game_rng import game_rng
+from src.database.services.services_games import finish_game
 from datetime import datetime , timezone , timedelta, tzinfo
 
 def setup_initial_draft_pile(game_id: int, db: Session):
     """
     Selecciona las primeras 3 cartas del mazo para formar el draft pile inicial.
     """
+    game = db.get(Game, game_id)
     deck = db.query(Card).filter(
         Card.game_id == game_id, 
         Card.player_id.is_(None),
         Card.draft == False
-    ).all()
-    random.shuffle(deck)
+    ).order_by(Card.card_id).all()
+    game_rng(game).shuffle(deck)
 
     for card in deck[:3]: # solo lo hace 3 veces 
         card.draft = True
@@ -32,8 +36,8 @@ def replenish_draft_pile(game_id: int, db: Session):
         Card.game_id == game_id,
         Card.player_id.is_(None),
         Card.draft == False
-    ).all()
-    random.shuffle(deck)
+    ).order_by(Card.card_id).all()
+    game_rng(game).shuffle(deck)
      
     deck[0].draft = True
     game.cards_left = game.cards_left -1
@@ -42,10 +46,10 @@ def replenish_draft_pile(game_id: int, db: Session):
 
 def deal_NSF(game_id: int , db:Session):
 
-    nsf = db.query(Event).filter(Event.name == "Not so fast" , Event.game_id == game_id).all()
-    players = db.query(Player).filter(Player.game_id == game_id).all()
+    nsf = db.query(Event).filter(Event.name == "Not so fast" , Event.game_id == game_id).order_by(Card.card_id).all()
+    players = db.query(Player).filter(Player.game_id == game_id).order_by(Player.player_id).all()
 
-    random.shuffle(nsf)
+    game_rng(db.get(Game, game_id)).shuffle(nsf)
     try:
         # Asignar 6 cartas a cada jugador.
         nsf_cursor = 0
@@ -54,7 +58,7 @@ def deal_NSF(game_id: int , db:Session):
             nsf_to_deal.player_id = player.player_id
             nsf_to_deal.picked_up = True
             nsf_cursor += 1
-        db.commit()
+        db.flush()  # el commit lo hace la ruta
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Ocurrió un error al repartir las cartas: {str(e)}")
@@ -68,18 +72,18 @@ def deal_cards_to_players(game_id: int, db: Session):
     Reparte 6 cartas aleatorias a cada jugador en una partida específica.
     """
     # Obtener todos los jugadores de la partida.
-    players = db.query(Player).filter(Player.game_id == game_id).all()
+    players = db.query(Player).filter(Player.game_id == game_id).order_by(Player.player_id).all()
     num_players = len(players)
 
     # Obtener todas las cartas disponibles (las que no tienen un player_id asignado).
-    deck = db.query(Card).filter(Card.game_id == game_id, Card.player_id == None).all()
+    deck = db.query(Card).filter(Card.game_id == game_id, Card.player_id == None).order_by(Card.card_id).all()
     # se supone que esto se llama cuando arranca la partida asiq todo va a estar en None
 
     #se podria chequear con la cantidad de cartas y ver que el tamano de la lista 
     # y cartas sea la misma, sino error
 
     # barajar las cartas 
-    random.shuffle(deck)
+    game_rng(db.get(Game, game_id)).shuffle(deck)
     try:
         card_cursor = 0
         for player in players : 
@@ -90,7 +94,7 @@ def deal_cards_to_players(game_id: int, db: Session):
                 card_to_deal.picked_up = True
                 card_cursor += 1
         # Confirmar todos los cambios en la base de datos
-        db.commit()
+        db.flush()  # el commit lo hace la ruta
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Ocurrió un error al repartir las cartas: {str(e)}")
@@ -99,29 +103,17 @@ def deal_cards_to_players(game_id: int, db: Session):
 
 
 def init_detective_cards(game_id: int, db: Session = Depends(get_db)):
-    detectives_info = [
-        ("Harley Quin Wildcard", 4 , 1),
-        ("Adriane Oliver", 3 , 1),
-        ("Miss Marple", 3 , 3),
-        ("Parker Pyne", 3 , 2),
-        ("Tommy Beresford", 2 , 2),
-        ("Lady Eileen 'Bundle' Brent", 3 , 2),
-        ("Tuppence Beresford", 2 , 2),
-        ("Hercule Poirot", 3 , 3),
-        ("Mr Satterthwaite", 2 , 2),
-    ]
-
+    # las filas sólo guardan el definition_id: nombre y quantity_set salen del catálogo
     new_cards_list = []
-    for name, quantity, quantity_set in detectives_info:
-        for _ in range(quantity):
+    for card_definition in definitions("detective"):
+        for _ in range(card_definition.quantity):
             new_card_instance = Detective(
                 type="detective",
-                name=name,
+                definition_id=card_definition.definition_id,
                 picked_up=False,
                 dropped=False,
                 player_id=None,
                 game_id=game_id,
-                quantity_set = quantity_set,
                 set_id = None,
 
             )
@@ -129,7 +121,7 @@ def init_detective_cards(game_id: int, db: Session = Depends(get_db)):
 
     try:
         db.add_all(new_cards_list)
-        db.commit()
+        db.flush()  # el commit lo hace la ruta
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error creating detective cards: {str(e)}")
@@ -137,27 +129,12 @@ def init_detective_cards(game_id: int, db: Session = Depends(get_db)):
     return {"message": f"{len(new_cards_list)} detective cards created successfully"}
 
 def init_event_cards(game_id: int, db: Session = Depends(get_db)):
-    events_info = [
-        ("Delay the murderer's escape!", 3),
-        ("Point your suspicions", 3),
-        ("Dead card folly", 3),
-        ("Another Victim", 2),
-        ("Look into the ashes", 3),
-        ("Card trade", 3),
-        ("And then there was one more...", 2),
-        ("Early train to paddington", 2),
-        ("Cards off the table", 1),
-        ("Not so fast" , 10) ,
-        ("Social Faux Pas" , 3) ,
-        ("Blackmailed" , 1)
-    ]
-
     new_events_list = []
-    for name, quantity in events_info:
-        for _ in range(quantity):
+    for card_definition in definitions("event"):
+        for _ in range(card_definition.quantity):
             new_event_instance = Event(
                 type="event",
-                name=name,
+                definition_id=card_definition.definition_id,
                 picked_up=False,
                 dropped=False,
                 player_id=None,
@@ -167,7 +144,7 @@ def init_event_cards(game_id: int, db: Session = Depends(get_db)):
 
     try:
         db.add_all(new_events_list)
-        db.commit()
+        db.flush()  # el commit lo hace la ruta
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error creating event cards: {str(e)}")
@@ -175,17 +152,80 @@ def init_event_cards(game_id: int, db: Session = Depends(get_db)):
     return {"message": f"{len(new_events_list)} event cards created successfully"}
 
 
-def only_6 (player_id , db: Session = Depends(get_db)):
-    cartas_levantadas = db.query(Card).filter(
+def hand_size(player_id: int, db: Session, game_id: int = None) -> int:
+    """
+    Cantidad de cartas en la mano del jugador. Si la sesión no tiene cambios pendientes
+    sale del índice en memoria de la partida (un popcount); si no, se cuenta en la base.
+    """
+    if game_id is None:
+        player = db.get(Player, player_id)
+        game_id = player.game_id if player else None
+    index = card_index(game_id, db) if game_id is not None else None
+    if index is not None:
+        return index.hand_size(player_id)
+    return db.query(Card).filter(
         Card.player_id == player_id,
         Card.picked_up == True,
         Card.dropped == False
     ).count()
+
+
+def only_6 (player_id , db: Session = Depends(get_db)):
+    cartas_levantadas = hand_size(player_id, db)
     if cartas_levantadas >= 6:
         return True
     else:
         return False
     
+HAND_SIZE = 6
+
+async def refill_hand(player_id: int, game_id: int, db: Session):
+    """
+    Levanta de una vez las cartas que le faltan al jugador para volver a tener 6.
+    Primero salen las cartas demoradas por "Delay the murderer's escape" (discardInt == -1),
+    después cartas al azar del mazo. Si el mazo se termina, la partida queda finalizada
+    en la misma transacción, que commitea la ruta.
+    """
+    game = db.query(Game).filter(Game.game_id == game_id).first()
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    if game.status != "in course":
+        raise HTTPException(status_code=400, detail="Game is not in course")
+    player = db.query(Player).filter(Player.player_id == player_id, Player.game_id == game_id).first()
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found in this game")
+
+    in_hand = hand_size(player_id, db, game_id)
+    missing = HAND_SIZE - in_hand
+    if missing <= 0:
+        raise HTTPException(status_code=400, detail="The player already has 6 cards")
+
+    deck = db.query(Card).filter(
+        Card.game_id == game_id,
+        Card.dropped == False,
+        Card.picked_up == False,
+        Card.draft == False
+    ).order_by(Card.card_id).all()
+    delayed = [card for card in deck if card.discardInt == -1]
+    rest = [card for card in deck if card.discardInt != -1]
+    game_rng(game).shuffle(rest)
+    drawn = (delayed + rest)[:missing]
+
+    try:
+        for card in drawn:
+            card.picked_up = True
+            card.player_id = player_id
+        game.cards_left = len(deck) - len(drawn)
+        db.flush()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Error refilling the hand: {str(e)}")
+    if game.cards_left == 0:
+        await finish_game(game_id, db)
+
+    return drawn
+
+
 def register_cancelable_event (card_id, db: Session= Depends(get_db)):
     new_event = db.query(Event).filter(Event.card_id == card_id).first()
     if not new_event:
@@ -204,7 +244,7 @@ def register_cancelable_event (card_id, db: Session= Depends(get_db)):
             type = event_type)
     try:
         db.add(event)
-        db.commit()
+        db.flush()  # el commit lo hace la ruta
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error creating cancelable event: {str(e)}")
@@ -225,7 +265,7 @@ def register_cancelable_set (set_id, db: Session= Depends(get_db)):
     
     try:
         db.add(new_log)
-        db.commit()
+        db.flush()  # el commit lo hace la ruta
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error creating cancelable event: {str(e)}")
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.database.database import SessionLocal
+from src.database.models import ChatMessage, Game, Player
+from src.webSocket.connection_manager import gameManager
+
+logger = logging.getLogger(__name__)
+
+CHAT_HISTORY_SIZE = 50  # mensajes que se guardan en memoria (y se mandan al conectarse) por partida
+CHAT_BATCH_WINDOW = 0.1  # segundos que se esperan para juntar mensajes en un solo frame
+CHAT_PERSIST_INTERVAL = 2.0  # cada cuánto se escriben en la base los mensajes pendientes
+CHAT_BURST = 5  # mensajes seguidos que puede mandar un jugador
+CHAT_RATE = 1.0  # mensajes por segundo que se le recargan a cada jugador
+
+
+class _TokenBucket:
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class _ChatRoom:
+    def __init__(self, history: List[Dict]):
+        self.history = deque(history, maxlen=CHAT_HISTORY_SIZE)
+        self.outgoing: List[Dict] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.senders: Dict[int, str] = {}  # player_id -> nombre, para no consultar la base por cada mensaje
+        self.buckets: Dict[int, _TokenBucket] = {}
+
+
+def _message_to_dict(message: ChatMessage) -> Dict:
+    return {
+        "sender_name": message.sender_name,
+        "message": message.message,
+        "sender_id": message.player_id,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+class ChatManager:
+    """
+    Chat de las partidas: historial acotado en memoria por partida, frames agrupados
+    en ventanas cortas, límite de mensajes por jugador y persistencia en lotes.
+    """
+
+    def __init__(self):
+        self.rooms: Dict[int, _ChatRoom] = {}
+        self.unsaved: List[ChatMessage] = []
+        self._persist_task: Optional[asyncio.Task] = None
+
+    def _room(self, game_id: int, db: Session) -> _ChatRoom:
+        room = self.rooms.get(game_id)
+        if room is None:
+            # sólo se cachean salas de partidas que existen: forget() las libera al borrarlas
+            if db.get(Game, game_id) is None:
+                raise HTTPException(status_code=404, detail="Game not found")
+            # primera vez que se usa la sala en este proceso: recuperamos lo que ya estaba guardado
+            stmt = (
+                select(ChatMessage)
+                .where(ChatMessage.game_id == game_id)
+                .order_by(ChatMessage.message_id.desc())
+                .limit(CHAT_HISTORY_SIZE)
+            )
+            saved = db.execute(stmt).scalars().all()
+            room = self.rooms[game_id] = _ChatRoom([_message_to_dict(m) for m in reversed(list(saved))])
+        return room
+
+    def history(self, game_id: int, db: Session) -> List[Dict]:
+        return list(self._room(game_id, db).history)
+
+    def _sender_name(self, room: _ChatRoom, game_id: int, player_id: int, db: Session) -> str:
+        name = room.senders.get(player_id)
+        if name is None:
+            player = db.query(Player).filter(Player.player_id == player_id).first()
+            if not player or player.game_id != game_id:
+                raise HTTPException(status_code=404, detail="Player not found in this game")
+            name = room.senders[player_id] = player.name
+        return name
+
+    def post(self, game_id: int, player_id: int, text: str, db: Session) -> Dict:
+        room = self._room(game_id, db)
+        sender_name = self._sender_name(room, game_id, player_id, db)
+
+        bucket = room.buckets.setdefault(player_id, _TokenBucket(CHAT_BURST, CHAT_RATE))
+        if not bucket.take():
+            raise HTTPException(status_code=429, detail="Too many chat messages, slow down")
+
+        created_at = datetime.now()
+        self.unsaved.append(ChatMessage(
+            game_id=game_id, player_id=player_id, sender_name=sender_name,
+            message=text, created_at=created_at,
+        ))
+        message = {
+            "sender_name": sender_name,
+            "message": text,
+            "sender_id": player_id,
+            "created_at": created_at.isoformat(),
+        }
+        room.history.append(message)
+        room.outgoing.append(message)
+        if room.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            room.flush_handle = loop.call_later(
+                CHAT_BATCH_WINDOW, lambda: loop.create_task(self.flush(game_id))
+            )
+        return message
+
+    async def flush(self, game_id: int):
+        """Manda en un solo frame todo lo que se juntó durante la ventana."""
+        room = self.rooms.get(game_id)
+        if room is None:
+            return
+        if room.flush_handle is not None:
+            room.flush_handle.cancel()
+            room.flush_handle = None
+        pending, room.outgoing = room.outgoing, []
+        if not pending:
+            return
+        if len(pending) == 1:
+            frame = {"type": "Chat", "data": pending[0]}
+        else:
+            frame = {"type": "ChatBatch", "data": pending}
+        try:
+            await gameManager.broadcast(json.dumps(frame), game_id)
+        except Exception:
+            # el chat no debe tirar abajo nada si un socket falla
+            logger.exception("Error al transmitir el chat de la partida %s", game_id)
+
+    def persist_pending(self) -> int:
+        """Escribe en la base, en una sola transacción, los mensajes que todavía no se guardaron."""
+        batch, self.unsaved = self.unsaved, []
+        return self._save(batch)
+
+    def _save(self, batch: List[ChatMessage]) -> int:
+        if not batch:
+            return 0
+        db = SessionLocal()
+        try:
+            db.add_all(batch)
+            db.commit()
+            return len(batch)
+        except IntegrityError:
+            # una fila que ya no puede entrar (su partida o su jugador se borraron mientras
+            # esperaba) no puede trabar al resto: se guardan de a una y se descartan las que fallan
+            db.rollback()
+            return self._save_one_by_one(batch, db)
+        except Exception:
+            db.rollback()
+            # se reintentan en el próximo ciclo, antes que los que llegaron mientras tanto
+            self.unsaved[:0] = batch
+            logger.exception("Error al guardar el chat")
+            return 0
+        finally:
+            db.close()
+
+    def _save_one_by_one(self, batch: List[ChatMessage], db: Session) -> int:
+        saved = 0
+        for index, message in enumerate(batch):
+            # copia: el rollback del lote deja a los objetos con el message_id que alcanzaron a recibir
+            db.add(ChatMessage(game_id=message.game_id, player_id=message.player_id, sender_name=message.sender_name,
+                               message=message.message, created_at=message.created_at))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                logger.warning("Se descarta un mensaje del chat de la partida %s que ya no se puede guardar", message.game_id)
+                continue
+            except Exception:
+                db.rollback()
+                self.unsaved[:0] = batch[index:]
+                logger.exception("Error al guardar el chat")
+                break
+            saved += 1
+        return saved
+
+    async def _persist_loop(self):
+        while True:
+            await asyncio.sleep(CHAT_PERSIST_INTERVAL)
+            # el intercambio de listas se hace en el loop; sólo el insert va al threadpool
+            batch, self.unsaved = self.unsaved, []
+            if batch:
+                await asyncio.to_thread(self._save, batch)
+
+    def start(self):
+        if self._persist_task is None:
+            self._persist_task = asyncio.get_running_loop().create_task(self._persist_loop())
+
+    def stop(self):
+        if self._persist_task is not None:
+            self._persist_task.cancel()
+            self._persist_task = None
+        self.persist_pending()
+
+    def forget(self, game_id: int):
+        room = self.rooms.pop(game_id, None)
+        if room is not None and room.flush_handle is not None:
+            room.flush_handle.cancel()
+        self.unsaved = [m for m in self.unsaved if m.game_id != game_id]
+
+    def forget_players(self, *player_ids: int):
+        """Jugadores borrados: sus mensajes pendientes ya no se pueden guardar y su nombre no se vuelve a usar."""
+        gone = set(player_ids)
+        for room in list(self.rooms.values()):
+            for player_id in gone:
+                room.senders.pop(player_id, None)
+                room.buckets.pop(player_id, None)
+        self.unsaved = [m for m in self.unsaved if m.player_id not in gone]
+
+
+chatManager = ChatManager()
@@ -1,4 +1,3 @@
-import random
 from fastapi.encoders import jsonable_encoder
 from fastapi import Depends
 from pydantic import TypeAdapter
@@ -10,22 +9,29 @@ from src.schemas.card_schemas import Card_Response, AllCardsResponse
 from sqlalchemy import  select, orm
 from src.database.models import Player, Card , Detective , Event, Secrets, Game, Set, ActiveTrade
 from src.database.services.services_games import finish_game
+from src.database.game_rng import game_rng
 from src.database.services.services_secrets import steal_secret as steal_secret_service
+from src.database.services.services_bulk import bulk_update
 from typing import List 
 
 def cards_off_table(player_id: int, db: Session):
     """
     descarta las cartas not so fast de un jugador
     """
-    nsf = db.query(Event).filter(Event.name == "Not so fast", Event.player_id == player_id, Event.dropped == False).all()
-
-    if not nsf:
-        # No hay cartas "Not so fast" para este jugador, no hay nada que hacer
-        return {"message": "No 'Not so fast' cards found for this player to discard."}
+    player = db.get(Player, player_id)
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found.")
     try:
-        for event in nsf:
-            event.dropped = True        
-        db.commit() # se descartan las cartas nsf del jugador
+        # Event.name se compara por definition_id, que está en la misma tabla cards: no hace falta subconsulta
+        dropped = bulk_update(
+            db, Card, player.game_id,
+            Card.player_id == player_id, Card.dropped == False, Event.name == "Not so fast",
+            dropped=True,
+        )
+        if not dropped:
+            # No hay cartas "Not so fast" para este jugador, no hay nada que hacer
+            return {"message": "No 'Not so fast' cards found for this player to discard."}
+        db.flush() # se descartan las cartas nsf del jugador; el commit lo hace la ruta
     except Exception as e:
         db.rollback() 
         raise HTTPException(status_code=400, detail=f"Error discarding 'Not so fast' cards: {str(e)}")
@@ -45,8 +51,7 @@ def look_into_ashes(player_id: int, card_id: int, db: Session):
         card.player_id = player_id
         card.discardInt = 0 #la carta vuelve a estar en juego
         card.picked_up=True
-        db.commit()
-        db.refresh(card)
+        db.flush()
         return card 
     except Exception as e:
         db.rollback()
@@ -97,20 +102,20 @@ def delay_the_murderers_escape(
         raise HTTPException(
             status_code=404, detail="No cards found in the discard pile for this game."
         )
-    for card in delayed_cards:
-        card.dropped = False
-        card.picked_up = False
-        card.draft = False
-        card.player_id = None  
-        card.discardInt = -1 
-        game.cards_left += 1 
     try : 
-        db.commit()
+        # vuelven al mazo marcadas con discardInt = -1 para salir primero al robar
+        moved = bulk_update(
+            db, Card, game_id,
+            Card.game_id == game_id, Card.dropped == True, Card.card_id.in_(discarded_cards_ids),
+            dropped=False, picked_up=False, draft=False, player_id=None, discardInt=-1,
+        )
+        game.cards_left += moved
+        db.flush()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error executing 'Delay murderer escapes' event: {str(e)}")
-    
 
+    # bulk_update sincroniza las cartas ya cargadas en la sesión
     return delayed_cards
 
 
@@ -118,20 +123,19 @@ async def early_train_paddington(game_id: int, db: Session):
     """
     Implement the effect of the 'Early Train to Paddington' event.
     """
-    deck = db.query(Card).filter(Card.game_id == game_id, Card.picked_up == False, Card.draft == False, Card.dropped == False).all()
+    deck = db.query(Card).filter(Card.game_id == game_id, Card.picked_up == False, Card.draft == False, Card.dropped == False).order_by(Card.card_id).all()
     
     game = db.query(Game).filter(Game.game_id == game_id).first()
     if not game:
         raise HTTPException(status_code=404, detail="Game not found.")
 
-    random.shuffle(deck)
+    game_rng(game).shuffle(deck)
     try:
         if game.cards_left< 6:
-            await finish_game(game_id)  # se termina el juego si no hay mas cartas en el mazo
+            await finish_game(game_id, db)  # se termina el juego si no hay mas cartas en el mazo
             return {"message": "Not enough cards in the deck. The game has ended."}
 
         max_discardInt = db.query(func.max(Card.discardInt)).filter(Card.game_id == game_id).scalar() or 0
-        print(max_discardInt) 
         cards_to_discard = deck[:6]
         for card in cards_to_discard:
             card.dropped = True
@@ -139,10 +143,7 @@ async def early_train_paddington(game_id: int, db: Session):
             max_discardInt += 1
             card.discardInt = max_discardInt
         game.cards_left -= 6
-        db.commit()
-        for card in cards_to_discard:
-            db.refresh(card)
-        db.refresh(game)
+        db.flush()
         return {"message": "Early Train to Paddington event executed successfully."}
     except Exception as e:
         db.rollback()
@@ -152,15 +153,16 @@ def point_your_suspicion(game_id: int, db: Session = Depends(get_db)):
     game = db.query(Game).filter(Game.game_id == game_id).first()
     if not game:
         raise HTTPException(status_code=404, detail="Game not found.")
-    players = db.query(Player).filter(Player.game_id == game_id).all()
-    if not players : 
-        raise HTTPException(status_code=404, detail="Players not found.")
-    
+
     try:
-        for player in players : 
-            player.pending_action = "VOTE"
-        db.commit()
+        updated = bulk_update(db, Player, game_id, Player.game_id == game_id, pending_action="VOTE")
+        if not updated:
+            raise HTTPException(status_code=404, detail="Players not found.")
+        db.flush()
         return {"message": "Point your Suspicion event executed successfully."}
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -175,7 +177,7 @@ def end_point_your_suspicion(game_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Game not found.")
     game.status = "in course"
     try:
-        db.commit()
+        db.flush()
         return {"message": "Point your Suspicion ending event executed successfully."}
     except Exception as e:
         db.rollback()
@@ -261,9 +263,8 @@ def initiate_card_trade(trader_id: int, tradee_id: int, card_id: int, db: Sessio
       
         card_to_discard.dropped = True
         card_to_discard.player_id = None
-        
-        
-        db.commit() 
+
+        db.flush()
     except Exception as e:
         db.rollback() 
         raise HTTPException(status_code=400, detail=f"Error iniciando el trade: {str(e)}")
@@ -366,12 +367,12 @@ def select_card_for_trade_service(player_id: int, db: Session, card_id: int):
                 if player_two: player_two.pending_action = None
 
             db.delete(trade)
-            db.commit() 
+            db.flush()
             return {"message": "Trade completed"}
            
         else:
             # El trade NO está completo
-            db.commit()
+            db.flush()
             return {"status": "waiting"}
             
     except Exception as e:
@@ -442,7 +443,7 @@ def initiate_dead_card_folly(
         card_to_discard.dropped = True
         card_to_discard.player_id = None
 
-        db.commit()
+        db.flush()
 
         return {
             "message": f"Dead Card Folly iniciado correctamente. Dirección: {direction}."
@@ -502,15 +503,11 @@ def select_card_for_folly_trade_service(
         from_player.pending_action = "WAITING_FOR_FOLLY_TRADE"
         db.add(from_player)
 
-        db.commit()
-        db.refresh(card)
-        db.refresh(to_player)
+        db.flush()
 
         players_in_game = (
             db.query(Player).filter(Player.game_id == from_player.game_id).all()
         )
-        for p in players_in_game:
-            db.refresh(p)
 
         all_selected = all(
             p.pending_action == "WAITING_FOR_FOLLY_TRADE" for p in players_in_game
@@ -520,7 +517,7 @@ def select_card_for_folly_trade_service(
             for p in players_in_game:
                 p.pending_action = None
 
-            db.commit()
+            db.flush()
 
             return {
                 "message": "Todos los jugadores completaron Dead Card Folly. Avanzando al siguiente paso."
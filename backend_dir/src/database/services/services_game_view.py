@@ -0,0 +1,223 @@
+"""
+Vista compartida del estado de una partida para los broadcasts.
+
+Cada partida tiene un número de versión que se incrementa cuando se commitea
+cualquier cambio sobre sus filas (partida, jugadores, cartas, secretos, sets, log).
+`build_game_view(game_id, version)` devuelve una única vista memoizada por versión;
+cada tópico (game, players, playersState, draftCards, droppedCards, gameUpdated)
+se arma la primera vez que alguien lo pide y queda guardado ya serializado, así
+que si dos broadcasts salen para la misma versión el segundo no consulta la base.
+
+Las operaciones en bloque (update()/delete() sin pasar por el ORM) no disparan los
+eventos de flush: quien las use tiene que marcar la partida con `mark_games_touched`
+(services_bulk.bulk_update ya lo hace).
+"""
+import json
+import threading
+from typing import Callable, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import desc, event, inspect, orm, select
+from sqlalchemy.orm import Session, selectinload
+from src.database.models import Card, Detective, Event, Game, Log, Player, Secrets, Set
+from src.schemas.card_schemas import AllCardsResponse
+from src.schemas.games_schemas import Game_Response
+from src.schemas.players_schemas import Player_Base, Player_State
+
+# Modelos cuyo cambio invalida la vista de su partida
+VIEW_MODELS = (Game, Player, Card, Secrets, Set, Log)
+
+# Opciones de carga para armar Player_State. Cada colección va en su propio SELECT ... IN
+# (joinedload de cards y secrets juntos arma un producto cartesiano cards x secrets por jugador),
+# las cartas salen de la tabla cards ya como Detective/Event (una sola tabla, sin joins) y los sets con sus detectives.
+# Así la cantidad de queries es fija, sin importar cuántos jugadores o cartas haya.
+PLAYERS_STATE_LOADER = (
+    selectinload(Player.cards.of_type(orm.with_polymorphic(Card, [Detective, Event]))),
+    selectinload(Player.secrets),
+    selectinload(Player.sets).selectinload(Set.detective),
+)
+
+_versions: Dict[int, int] = {}
+_views: Dict[int, "GameView"] = {}
+_lock = threading.Lock()
+_all_games_version = 0  # cambia con cualquier partida: versión del listado de partidas
+
+
+def current_version(game_id: int) -> int:
+    return _versions.get(game_id, 0)
+
+
+def all_games_version() -> int:
+    return _all_games_version
+
+
+def bump_game_version(*game_ids: int):
+    global _all_games_version
+    with _lock:
+        for game_id in game_ids:
+            _versions[game_id] = _versions.get(game_id, 0) + 1
+            _views.pop(game_id, None)
+        if game_ids:
+            _all_games_version += 1
+
+
+def load_players_state(db: Session, game_id: int):
+    """Jugadores de la partida con todo lo que necesita Player_State ya cargado."""
+    return (
+        db.query(Player)
+        .options(*PLAYERS_STATE_LOADER)
+        .filter(Player.game_id == game_id)
+        .all()
+    )
+
+
+def _build_game_updated(db: Session, game_id: int) -> Optional[str]:
+    game = (
+        db.query(Game)
+        .options(
+            selectinload(Game.log).selectinload(Log.player),
+            selectinload(Game.log).selectinload(Log.card.of_type(Event)),
+            selectinload(Game.log).selectinload(Log.set)
+        )
+        .filter(Game.game_id == game_id)
+        .first()
+    )
+    if not game:
+        return None
+
+    # Pydantic ignora el 'log' porque no está en Game_Response, así que se formatea a mano
+    game_dict = Game_Response.model_validate(game).model_dump()
+    game_dict['log'] = [
+        {
+            "log_id": log.log_id,
+            "created_at": log.created_at.isoformat(),
+            "type": log.type,
+            "player_id": log.player.player_id if log.player else None,
+            "card_name": log.card.name if log.card and hasattr(log.card, 'name') else None,
+            "set_name": log.set.name if log.set else None
+        }
+        for log in game.log
+    ]
+    return json.dumps(game_dict)
+
+
+def _build_game(db: Session, game_id: int) -> Optional[str]:
+    game = db.query(Game).filter(Game.game_id == game_id).first()
+    if not game:
+        return None
+    return Game_Response.model_validate(game).model_dump_json()
+
+
+def _build_players(db: Session, game_id: int):
+    players = db.query(Player).filter(Player.game_id == game_id).all()
+    return jsonable_encoder([Player_Base.model_validate(player) for player in players])
+
+
+def _build_players_state(db: Session, game_id: int):
+    players = load_players_state(db, game_id)
+    return jsonable_encoder([Player_State.model_validate(player) for player in players])
+
+
+def _cards_to_json(cards):
+    # Se usa typeAdapter por una cuestion de compatibilidad de versiones entre python y pydantic
+    card_list_adapter = TypeAdapter(list[AllCardsResponse])
+    return jsonable_encoder(card_list_adapter.validate_python(cards, from_attributes=True))
+
+
+def _build_draft(db: Session, game_id: int):
+    polymorphic_loader = orm.with_polymorphic(Card, [Detective, Event])
+    stmt = (
+        select(polymorphic_loader)
+        .where(Card.game_id == game_id, Card.draft == True)
+        .limit(3)
+    )
+    return _cards_to_json(db.execute(stmt).scalars().all())
+
+
+def _build_discard(db: Session, game_id: int):
+    polymorphic_loader = orm.with_polymorphic(Card, [Detective, Event])
+    stmt = (
+        select(polymorphic_loader)
+        .where(Card.game_id == game_id, Card.dropped == True)
+        .order_by(desc(Card.discardInt))
+        .limit(5)
+    )
+    return _cards_to_json(db.execute(stmt).scalars().all())
+
+
+TOPICS: Dict[str, Callable] = {
+    "gameUpdated": _build_game_updated,
+    "game": _build_game,
+    "players": _build_players,
+    "playersState": _build_players_state,
+    "draftCards": _build_draft,
+    "droppedCards": _build_discard,
+}
+
+
+class GameView:
+    """Estado de una partida en una versión dada; cada tópico se arma una sola vez."""
+
+    def __init__(self, game_id: int, version: int):
+        self.game_id = game_id
+        self.version = version
+        self._data: Dict[str, object] = {}
+        self._messages: Dict[str, Optional[str]] = {}
+
+    def data(self, topic: str, db: Session):
+        if topic not in self._data:
+            self._data[topic] = TOPICS[topic](db, self.game_id)
+        return self._data[topic]
+
+    def message(self, topic: str, db: Session) -> Optional[str]:
+        """Mensaje listo para gameManager.broadcast, o None si no hay nada que mandar."""
+        if topic not in self._messages:
+            data = self.data(topic, db)
+            self._messages[topic] = None if data is None else json.dumps({"type": topic, "data": data})
+        return self._messages[topic]
+
+
+def build_game_view(game_id: int, version: int) -> GameView:
+    with _lock:
+        view = _views.get(game_id)
+        if view is None or view.version != version:
+            view = _views[game_id] = GameView(game_id, version)
+        return view
+
+
+def game_view(game_id: int) -> GameView:
+    return build_game_view(game_id, current_version(game_id))
+
+
+def clear_game_views():
+    with _lock:
+        _views.clear()
+
+
+# --- Invalidación: cada commit incrementa la versión de las partidas que tocó ---
+
+def mark_games_touched(session: Session, *game_ids: int):
+    """Para cambios que no pasan por el flush: la versión se incrementa recién cuando la sesión commitea."""
+    session.info.setdefault("touched_games", set()).update(game_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_touched_games(session, flush_context):
+    touched = session.info.setdefault("touched_games", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, VIEW_MODELS):
+            game_id = inspect(obj).dict.get("game_id")
+            if game_id is not None:
+                touched.add(game_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_touched_games(session):
+    touched = session.info.pop("touched_games", None)
+    if touched:
+        bump_game_version(*touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched_games(session):
+    session.info.pop("touched_games", None)
@@ -1,35 +1,51 @@
 from fastapi import Depends, HTTPException , HTTPException
-from sqlalchemy import extract
+from typing import Optional
+from sqlalchemy import case, extract, select, update
 from sqlalchemy.orm import Session  
+from src.database.journal import touch_all_rows
+from src.database.services.services_game_view import mark_games_touched
 from src.database.services.services_websockets import broadcast_game_information
 from src.database.database import SessionLocal, get_db
+from src.database.unit_of_work import after_commit
 from src.database.models import Game, Player 
 from src.schemas.games_schemas import Game_Base
-from datetime import date 
+from datetime import date, datetime
 
 today = date.today()
 acBday = date(today.year,9, 15)
 
-def update_players_on_game (game_id : int, db : Session = Depends(get_db)):
-    game = db.query(Game).where(Game.game_id == game_id).first()
-    if game.players_amount < game.max_players : 
-        game.players_amount += 1
-        if game.players_amount >= game.min_players : 
-            game.status = 'bootable'
-        if game.players_amount == game.max_players :
-            game.status = 'Full'
-        db.add(game)
-        try: 
-            db.commit()
-            db.refresh(game)
-        except Exception as e:
-            db.rollback()
-            raise HTTPException(status_code=400, detail=f"Error updating amount of players in game: {str(e)}")  
-    
-        return game.players_amount
+def reserve_seat(db: Session, game_id: int, *criteria) -> Optional[int]:
+    """
+    Suma un jugador a la partida con un UPDATE condicional (WHERE players_amount < max_players
+    y `criteria`): dos altas simultáneas no pueden pasarse del máximo, la segunda no
+    modifica ninguna fila. Devuelve la nueva cantidad de jugadores, o None si no había lugar.
+    No commitea.
+    """
+    amount = Game.players_amount + 1
+    statement = (
+        update(Game)
+        .where(Game.game_id == game_id, Game.players_amount < Game.max_players, *criteria)
+        # en MySQL cada asignación del SET ve las anteriores: el estado se calcula antes de sumar
+        .ordered_values(
+            (Game.status, case((amount >= Game.max_players, "Full"), (amount >= Game.min_players, "bootable"), else_=Game.status)),
+            (Game.players_amount, amount),
+        )
+    )
+    if db.execute(statement).rowcount != 1:
+        return None
+    # un update en bloque no pasa por el flush (services_bulk.bulk_update)
+    mark_games_touched(db, game_id)
+    touch_all_rows(db, game_id, Game)
+    return db.execute(select(Game.players_amount).where(Game.game_id == game_id)).scalar_one()
+
 
-    else :  
-        return None 
+def update_players_on_game (game_id : int, db : Session = Depends(get_db)):
+    try:
+        # sin commit: lo hace la ruta junto con el alta del jugador
+        return reserve_seat(db, game_id)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Error updating amount of players in game: {str(e)}")
 
 def assign_turn_to_players (game_id : int, db :Session = Depends (get_db)) : 
     today = date.today()
@@ -60,40 +76,32 @@ def assign_turn_to_players (game_id : int, db :Session = Depends (get_db)) :
             else : 
                 index += 1
         player.turn_order = index
-        db.add(player)
-        try: 
-            db.commit()
-            db.refresh(player)
-        except Exception as e:
-            db.rollback()
-            raise HTTPException(status_code=400, detail=f"Error setting turn of players in game: {str(e)}") 
     
     game.current_turn = 1
-    db.add(game)
     try:
-        db.commit()
-        db.refresh(game)
+        # todos los turnos en un solo flush; el commit lo hace la ruta
+        db.flush()
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=400, detail=f"Error setting current turn in game: {str(e)}") 
+        raise HTTPException(status_code=400, detail=f"Error setting turn of players in game: {str(e)}") 
     return game
 
 
 async def finish_game (game_id : int , db : Session = Depends(get_db)) : 
+    """
+    Marca la partida como terminada. No commitea: el cambio viaja en la transacción
+    de quien la llama y el broadcast sale después de su commit.
+    """
     game = db.query(Game).where(Game.game_id == game_id).first()
     if game.status != 'finished' : 
         game.status = 'finished'
+        game.finished_at = datetime.now()
         try:
-            db.commit()
-            db.refresh(game)
-            await broadcast_game_information(game_id)
+            db.flush()
         except Exception as e:
             db.rollback()
             raise HTTPException(status_code=400, detail=f"Error finishing the game: {str(e)}")  
+        after_commit(db, broadcast_game_information, game_id)
         return {"message": f"Game {game_id} finished successfully."}
     else : 
         return {"message": f"Game {game_id} is already finished."}
-
-
-
-
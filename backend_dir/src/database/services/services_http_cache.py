@@ -0,0 +1,95 @@
+"""
+Caché HTTP de las lecturas de una partida, con la versión de services_game_view.
+
+Cada partida tiene un número de versión que sube en cada commit que la toca; el ETag de
+una lectura es esa versión (más un token del proceso, porque las versiones viven en
+memoria y vuelven a cero al reiniciar). Si el cliente manda el ETag que ya tiene en
+If-None-Match y la partida no cambió, la respuesta es un 304 sin tocar la base. Si no,
+el cuerpo se busca en una caché corta (CACHE_TTL segundos) por URL y versión antes de
+consultar: varios clientes que sondean la misma partida comparten una sola consulta.
+
+GET /games usa la versión del listado, que sube con el cambio de cualquier partida.
+
+Como las versiones y la caché son del proceso, esto supone un solo worker (igual que
+las vistas memoizadas de services_game_view).
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from src.database.services.services_game_view import all_games_version, current_version
+
+CACHE_TTL = 5.0
+CACHE_SIZE = 2048  # respuestas guardadas como máximo
+
+_BOOT = uuid.uuid4().hex[:8]
+_cache: "OrderedDict[str, tuple]" = OrderedDict()  # url -> (etag, vence, cuerpo)
+_lock = threading.Lock()
+
+
+def game_etag(game_id: int) -> str:
+    return f'W/"{_BOOT}-g{game_id}-{current_version(game_id)}"'
+
+
+def all_games_etag() -> str:
+    return f'W/"{_BOOT}-all-{all_games_version()}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    # la comparación de If-None-Match es débil: W/"x" y "x" son el mismo
+    return "*" in tags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+
+
+def _cached_body(key: str, etag: str) -> Optional[bytes]:
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None or entry[0] != etag or entry[1] < time.monotonic():
+            return None
+        _cache.move_to_end(key)
+        return entry[2]
+
+
+def _store(key: str, etag: str, body: bytes):
+    with _lock:
+        _cache[key] = (etag, time.monotonic() + CACHE_TTL, body)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_http_cache():
+    with _lock:
+        _cache.clear()
+
+
+def cached_read(request: Request, etag: str, build: Callable[[], object], response_model=None) -> Response:
+    """
+    Respuesta de una lectura con ETag. `build` consulta la base y devuelve lo mismo que
+    devolvería la ruta; sólo se llama si el cliente no tiene la versión actual y no está
+    en la caché. Con `response_model` se serializa igual que lo haría FastAPI.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    key = request.url.path + ("?" + request.url.query if request.url.query else "")
+    body = _cached_body(key, etag)
+    if body is None:
+        data = build()
+        if response_model is not None:
+            adapter = TypeAdapter(response_model)
+            body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+        else:
+            # lo mismo que hace JSONResponse con lo que devuelve una ruta sin response_model
+            body = json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        _store(key, etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,173 @@
+"""
+Listado de partidas con filtros y paginación por cursor (keyset).
+
+`query_games` es la única consulta del listado: la usan GET /lobby/games,
+GET /games/availables y el feed /ws/games/availables. Filtra por estado, lugares libres
+y prefijo del nombre, y ordena por creación (más nuevas primero) o por lugares libres
+(las que están por llenarse primero). Cada orden tiene su índice en `games`
+(ix_games_status_created_at, ix_games_status_free_seats) y termina en game_id, así que
+el cursor es el último (valor, game_id) devuelto: la página siguiente es un
+`WHERE (valor, game_id) > cursor ... LIMIT n`, sin OFFSET, y no se saltea ni repite
+partidas aunque se creen o borren otras mientras se pagina.
+
+`keyset_query` y `keyset_page` son la paginación en sí, sin nada propio de `games`: el
+listado del archivo (services_archive.archived_games_page) usa las mismas.
+
+Los sockets del feed que se conectan con filtros (`subscribe`) reciben su página en
+cada broadcast del lobby; cada combinación de filtros se consulta una sola vez.
+"""
+import base64
+import datetime
+import json
+from typing import Annotated, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException, Query, WebSocket
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from src.database.models import Game
+from src.schemas.games_schemas import Games_Page, Games_Query
+
+LOBBY_STATUSES = ("waiting players", "bootable")
+
+FREE_SEATS = Game.max_players - Game.players_amount
+
+# orden -> (expresión, descendente)
+SORTS = {
+    "created": (Game.created_at, True),
+    "fill": (FREE_SEATS, False),
+}
+
+# órdenes cuyo valor es una fecha: en el cursor va en ISO 8601
+DATETIME_SORTS = ("created", "archived")
+
+_subscriptions: Dict[WebSocket, Games_Query] = {}
+
+
+def encode_cursor(sort: str, value, game_id: int) -> str:
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, game_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(sort: str, cursor: str) -> Tuple[object, int]:
+    """(valor, game_id) del cursor. ValueError si está mal formado o es de otro orden."""
+    try:
+        cursor_sort, value, game_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if cursor_sort != sort or type(game_id) is not int:
+            raise ValueError("otro orden")
+        if sort in DATETIME_SORTS:
+            value = datetime.datetime.fromisoformat(value)
+        elif type(value) is not int:
+            raise ValueError("lugares libres no numéricos")
+    except Exception as e:
+        # cualquier cursor que no armó encode_cursor (un valor null, de otro tipo...) es un 400, no un 500
+        raise ValueError("invalid cursor") from e
+    return value, game_id
+
+
+def keyset_query(query, column, id_column, descending: bool, after: Optional[Tuple[object, int]] = None):
+    """`query` ordenada por (column, id_column) y, si hay `after` (valor, id), desde la fila siguiente."""
+    if after is not None:
+        value, last_id = after
+        # (valor, id) después del cursor, escrito así para que use el índice también en MySQL
+        if descending:
+            query = query.filter(or_(column < value, and_(column == value, id_column < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, id_column > last_id)))
+    if descending:
+        return query.order_by(column.desc(), id_column.desc())
+    return query.order_by(column.asc(), id_column.asc())
+
+
+def keyset_page(query, limit: Optional[int], sort: str, key: Callable[[object], Tuple[object, int]]) -> Tuple[list, Optional[str]]:
+    """Hasta `limit` filas y el cursor de la página siguiente (None si es la última). `key` da el (valor, id) de una fila."""
+    if limit is None:
+        return query.all(), None
+    # una fila de más para saber si hay otra página
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(sort, *key(rows[-1]))
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def query_games(db: Session, params: Optional[Games_Query] = None) -> Tuple[List[Game], Optional[str]]:
+    """
+    Partidas que cumplen `params` y el cursor de la página siguiente (None si es la última).
+    Sin `params` devuelve todas las partidas, como el listado original.
+    """
+    if params is None:
+        return db.query(Game).all(), None
+
+    column, descending = SORTS[params.sort]
+    query = db.query(Game)
+    if params.status:
+        query = query.filter(Game.status.in_(params.status))
+    if params.min_free_seats:
+        query = query.filter(FREE_SEATS >= params.min_free_seats)
+    if params.name_prefix:
+        query = query.filter(Game.name.like(_escape_like(params.name_prefix) + "%", escape="\\"))
+    after = decode_cursor(params.sort, params.cursor) if params.cursor else None
+    query = keyset_query(query, column, Game.game_id, descending, after)
+
+    def key(game: Game):
+        value = game.created_at if params.sort == "created" else game.max_players - game.players_amount
+        return value, game.game_id
+
+    return keyset_page(query, params.limit, params.sort, key)
+
+
+def games_page(db: Session, params: Games_Query) -> Games_Page:
+    games, next_cursor = query_games(db, params)
+    return Games_Page.model_validate({"games": games, "next_cursor": next_cursor}, from_attributes=True)
+
+
+def games_query(
+    status: Annotated[Optional[list[str]], Query()] = None,
+    min_free_seats: Annotated[Optional[int], Query(ge=1)] = None,
+    name_prefix: Annotated[Optional[str], Query(max_length=30)] = None,
+    sort: Annotated[Optional[str], Query(pattern="^(created|fill)$")] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=100)] = None,
+    cursor: Annotated[Optional[str], Query()] = None,
+) -> Optional[Games_Query]:
+    """Filtros del listado desde la query string; None si no vino ninguno."""
+    given = {
+        key: value for key, value in dict(
+            status=status, min_free_seats=min_free_seats, name_prefix=name_prefix,
+            sort=sort, limit=limit, cursor=cursor,
+        ).items() if value is not None
+    }
+    if not given:
+        return None
+    params = Games_Query(**given)
+    if params.cursor:
+        try:
+            decode_cursor(params.sort, params.cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return params
+
+
+def subscribe(websocket: WebSocket, params: Games_Query):
+    _subscriptions[websocket] = params
+
+
+def unsubscribe(websocket: WebSocket):
+    _subscriptions.pop(websocket, None)
+
+
+def feed_pages(db: Session) -> Dict[WebSocket, str]:
+    """Página de cada socket suscripto con filtros; una consulta por combinación de filtros."""
+    pages: Dict[str, str] = {}
+    by_socket: Dict[WebSocket, str] = {}
+    for websocket, params in list(_subscriptions.items()):
+        key = params.model_dump_json()
+        if key not in pages:
+            pages[key] = json.dumps(jsonable_encoder(games_page(db, params)))
+        by_socket[websocket] = pages[key]
+    return by_socket
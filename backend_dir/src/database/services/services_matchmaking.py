@@ -0,0 +1,70 @@
+"""
+Unirse rápido: ubica al jugador en la mejor partida abierta sin pasar por el listado.
+
+Las candidatas son las partidas del lobby con lugar, en orden de prioridad: primero las
+que tienen menos lugares libres (empiezan antes) y entre ellas la que espera hace más.
+Es una consulta por el índice ix_games_status_free_seats con un LIMIT, así que cuesta
+lo mismo con 10 o con 10000 partidas abiertas. Para cada candidata se intenta reservar el
+lugar con el UPDATE condicional de services_games.reserve_seat: si otro jugador ocupó el
+último lugar entre la consulta y el UPDATE, no se modifica ninguna fila y se pasa a la
+siguiente, sin que el cliente tenga que reintentar. Si ninguna tiene lugar se crea una
+partida nueva con el jugador como host.
+"""
+import datetime
+import os
+from typing import Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.database.game_rng import new_seed
+from src.database.models import Game, Player
+from src.database.services.services_games import reserve_seat
+from src.database.services.services_lobby import FREE_SEATS, LOBBY_STATUSES
+from src.monitoring.metrics import Counter, registry
+
+MATCH_CANDIDATES = 10  # partidas que se prueban antes de crear una nueva
+QUICK_JOIN_MAX_PLAYERS = int(os.getenv("QUICK_JOIN_MAX_PLAYERS", "6"))
+QUICK_JOIN_MIN_PLAYERS = int(os.getenv("QUICK_JOIN_MIN_PLAYERS", "2"))
+
+QUICK_JOINS = registry.register(Counter(
+    "quick_join_total", "Jugadores ubicados por /players/quick_join, por resultado (joined, created).", ("result",)))
+
+
+def candidate_games(db: Session, limit: int = MATCH_CANDIDATES):
+    """Partidas del lobby con lugar, de mayor a menor prioridad."""
+    return list(db.execute(
+        select(Game.game_id)
+        .where(Game.status.in_(LOBBY_STATUSES), FREE_SEATS > 0)
+        .order_by(FREE_SEATS.asc(), Game.created_at.asc(), Game.game_id.asc())
+        .limit(limit)
+    ).scalars())
+
+
+def unique_player_name(db: Session, game_id: int, name: str) -> str:
+    """Como en POST /players: si el nombre ya está en la partida se le agrega " (2)", " (3)"..."""
+    taken = db.execute(select(Player.name).where(Player.game_id == game_id)).scalars().all()
+    new_name, iterador = name, 1
+    for other in taken:
+        if other == new_name:
+            iterador += 1
+            new_name = f"{name} ({iterador})"
+    return new_name
+
+
+def quick_join(db: Session, name: str, birth_date: datetime.date, avatar: Optional[str] = None) -> Tuple[Player, Game, bool]:
+    """
+    Ubica al jugador y lo agrega a la sesión. Devuelve (jugador, partida, si se creó la partida).
+    No commitea: el lugar reservado y el jugador se guardan juntos en el commit de la ruta.
+    """
+    for game_id in candidate_games(db):
+        if reserve_seat(db, game_id, Game.status.in_(LOBBY_STATUSES)) is None:
+            continue  # la ocupó otro jugador: se prueba la siguiente
+        player = Player(name=unique_player_name(db, game_id, name), host=False, game_id=game_id,
+                        birth_date=birth_date, avatar=avatar)
+        db.add(player)
+        return player, db.get(Game, game_id), False
+
+    game = Game(name=f"Partida de {name}"[:30], status="waiting players", max_players=QUICK_JOIN_MAX_PLAYERS,
+                min_players=QUICK_JOIN_MIN_PLAYERS, players_amount=1, seed=new_seed())
+    player = Player(name=name, host=True, game=game, birth_date=birth_date, avatar=avatar)
+    db.add_all([game, player])
+    return player, game, True
@@ -0,0 +1,179 @@
+"""
+Limpieza de partidas abandonadas y trades huérfanos.
+
+Cada REAPER_INTERVAL segundos, en una transacción y de a lotes de REAPER_BATCH:
+- partidas en el lobby ("waiting players" / "bootable") creadas hace más de
+  REAPER_LOBBY_TTL y sin nadie conectado a su sala: nunca empezaron, se borran con
+  todas sus filas;
+- partidas en curso que se quedaron sin ningún socket hace más de REAPER_ABANDONED_TTL
+  (gameManager.empty_since): se terminan y se archivan (services_archive.py). Cuándo se
+  vació cada sala sólo se sabe en memoria: las partidas en curso sin sockets que el
+  proceso no conoce (por ejemplo después de reiniciar) empiezan a contar en la pasada
+  que las encuentra, y las que dejaron de estar en curso se dejan de seguir;
+- trades (active_trades) de más de REAPER_TRADE_TTL o de partidas que ya no están en
+  curso: se borran, y los jugadores que esperaban ese trade vuelven a no tener acción
+  pendiente.
+
+Las búsquedas van por índices (games por estado y antigüedad, active_trades por
+antigüedad). Si cambió la lista de partidas sale un solo broadcast al lobby por pasada.
+Lo que se borra queda en las métricas reaper_games_total y reaper_rows_total.
+"""
+import asyncio
+import datetime
+import logging
+import os
+from typing import Dict, List, Optional
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+from src.database import journal as journal_module
+from src.database.database import SessionLocal
+from src.database.journal import touch_all_rows
+from src.database.models import ActiveTrade, Game, Player
+from src.database.services.services_archive import write_archives
+from src.database.services.services_bulk import delete_games
+from src.database.services.services_chat import chatManager
+from src.database.services.services_game_view import mark_games_touched
+from src.database.services.services_lobby import LOBBY_STATUSES
+from src.database.services.services_websockets import broadcast_available_games, broadcast_game_information
+from src.monitoring.metrics import Counter, registry
+from src.webSocket.connection_manager import gameManager
+from src.webSocket.outbox import deliver
+
+logger = logging.getLogger(__name__)
+
+REAPER_LOBBY_TTL = float(os.getenv("REAPER_LOBBY_TTL", "3600"))
+REAPER_ABANDONED_TTL = float(os.getenv("REAPER_ABANDONED_TTL", "900"))
+REAPER_TRADE_TTL = float(os.getenv("REAPER_TRADE_TTL", "600"))
+REAPER_INTERVAL = 60.0
+REAPER_BATCH = 100
+
+TRADE_ACTIONS = ("SELECT_TRADE_CARD", "WAITING_FOR_TRADE_PARTNER")
+
+REAPED_GAMES = registry.register(Counter(
+    "reaper_games_total", "Partidas limpiadas por el reaper, por motivo (lobby, abandoned).", ("reason",)))
+REAPED_ROWS = registry.register(Counter(
+    "reaper_rows_total", "Filas borradas por el reaper, por tabla.", ("table",)))
+
+
+def _count_rows(deleted: Dict[str, int]):
+    for table, rows in deleted.items():
+        if rows:
+            REAPED_ROWS.inc(rows, table=table)
+
+
+def stale_lobby_games(db: Session, now: datetime.datetime) -> List[int]:
+    cutoff = now - datetime.timedelta(seconds=REAPER_LOBBY_TTL)
+    query = select(Game.game_id).where(Game.status.in_(LOBBY_STATUSES), Game.created_at <= cutoff)
+    # una sala del lobby con jugadores conectados no está abandonada, por vieja que sea
+    connected = gameManager.connected_games()
+    if connected:
+        query = query.where(Game.game_id.not_in(connected))
+    return list(db.execute(query.order_by(Game.game_id).limit(REAPER_BATCH)).scalars())
+
+
+def track_empty_games(db: Session):
+    """Pone gameManager.emptied_at al día con las partidas en curso de la base."""
+    playing = set(db.execute(select(Game.game_id).where(Game.status == "in course")).scalars())
+    tracked = set(list(gameManager.emptied_at))
+    for game_id in tracked - playing:
+        # terminada, borrada o todavía en el lobby: ya no puede quedar abandonada en curso
+        gameManager.forget(game_id)
+    gameManager.mark_empty(*sorted(playing - tracked))
+
+
+def abandoned_games(db: Session) -> List[int]:
+    track_empty_games(db)
+    return sorted(gameManager.empty_since(REAPER_ABANDONED_TTL))[:REAPER_BATCH]
+
+
+def stale_trades(db: Session, now: datetime.datetime) -> List[ActiveTrade]:
+    cutoff = now - datetime.timedelta(seconds=REAPER_TRADE_TTL)
+    not_playing = select(Game.game_id).where(Game.status != "in course")
+    return db.execute(
+        select(ActiveTrade)
+        .where(or_(ActiveTrade.created_at <= cutoff, ActiveTrade.game_id.in_(not_playing)))
+        .order_by(ActiveTrade.id)
+        .limit(REAPER_BATCH)
+    ).scalars().all()
+
+
+def reap(db: Session, now: Optional[datetime.datetime] = None) -> Dict[str, List[int]]:
+    """Una pasada completa, en una transacción. Devuelve qué partidas se limpiaron y de qué partidas eran los trades."""
+    now = now or datetime.datetime.now()
+    lobby = stale_lobby_games(db, now)
+    abandoned = abandoned_games(db)
+    trades = stale_trades(db, now)
+    trade_games = sorted({trade.game_id for trade in trades} - set(lobby) - set(abandoned))
+    try:
+        if trades:
+            players = {p for trade in trades for p in (trade.player_one_id, trade.player_two_id) if p is not None}
+            db.execute(
+                update(Player)
+                .where(Player.player_id.in_(players), Player.pending_action.in_(TRADE_ACTIONS))
+                .values(pending_action=None)
+            )
+            deleted = db.execute(delete(ActiveTrade).where(ActiveTrade.id.in_([t.id for t in trades]))).rowcount
+            _count_rows({"active_trades": deleted})
+            mark_games_touched(db, *trade_games)
+            for game_id in trade_games:
+                touch_all_rows(db, game_id, Player)
+                touch_all_rows(db, game_id, ActiveTrade)
+
+        if abandoned:
+            db.execute(
+                update(Game).where(Game.game_id.in_(abandoned)).values(status="finished", finished_at=now)
+            )
+            mark_games_touched(db, *abandoned)
+            write_archives(abandoned, db)
+        _count_rows(delete_games(db, lobby + abandoned))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if lobby:
+        REAPED_GAMES.inc(len(lobby), reason="lobby")
+    if abandoned:
+        REAPED_GAMES.inc(len(abandoned), reason="abandoned")
+    for game_id in lobby + abandoned:
+        chatManager.forget(game_id)
+        gameManager.forget(game_id)
+        journal_module.journal.forget(game_id)
+    return {"lobby": lobby, "abandoned": abandoned, "trade_games": trade_games}
+
+
+class GameReaper:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self) -> Dict[str, List[int]]:
+        db = SessionLocal()
+        try:
+            return reap(db)
+        except Exception:
+            logger.exception("Error al limpiar partidas")
+            return {"lobby": [], "abandoned": [], "trade_games": []}
+        finally:
+            db.close()
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(REAPER_INTERVAL)
+            reaped = await asyncio.to_thread(self.run_once)
+            for game_id in reaped["trade_games"]:
+                await deliver(broadcast_game_information, game_id)
+            if reaped["lobby"] or reaped["abandoned"]:
+                # la lista del lobby se manda entera (es lo que espera el cliente), una vez por pasada
+                await deliver(broadcast_available_games)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._reap_loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+gameReaper = GameReaper()
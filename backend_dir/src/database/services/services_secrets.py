@@ -3,48 +3,45 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from src.database.database import SessionLocal, get_db
 from src.database.models import Secrets, Player, Game
-import random
 
 from src.database.services.services_games import finish_game
+from src.database.game_rng import game_rng
 
 
 def deal_secrets_to_players(game_id: int, db: Session):
     """
-    Reparte 3 secretos aleatorios a cada jugador, reintentando si el Asesino y
-    el Cómplice son el mismo jugador.
+    Reparte 3 secretos aleatorios a cada jugador, con el Asesino y el Cómplice en
+    manos distintas. Se reparte en una pasada: el Asesino va a un lugar al azar, el
+    Cómplice a un lugar al azar de otro jugador y el resto se baraja en los que quedan
+    (misma distribución que barajar y repetir hasta que salga válido).
     """
-    players = db.query(Player).filter(Player.game_id == game_id).all()
-    secrets_deck = (db.query(Secrets).filter(Secrets.game_id == game_id, Secrets.player_id.is_(None)).all())
+    players = db.query(Player).filter(Player.game_id == game_id).order_by(Player.player_id).all()
+    secrets_deck = (db.query(Secrets).filter(Secrets.game_id == game_id, Secrets.player_id.is_(None)).order_by(Secrets.secret_id).all())
     if not players:
         raise HTTPException(status_code=404, detail="No players found for the given game_id")
     if not secrets_deck:
         raise HTTPException(status_code=404, detail="No secrets available to deal for the given game_id" )
 
-    while True:
-        # 1. Barajar las cartas en cada intento
-        random.shuffle(secrets_deck)
-
-        # 2. Asignar 3 secretos a cada jugador
-        secret_cursor = 0
-        for player in players:
-            for _ in range(3):
-                secret_to_deal = secrets_deck[secret_cursor]
-                secret_to_deal.player_id = player.player_id
-                secret_cursor += 1
-
-        # 3. Comprobar la condición
-        murderer_card = next((s for s in secrets_deck if s.murderer), None)
-        acomplice_card = next((s for s in secrets_deck if s.acomplice), None)
+    rng = game_rng(db.get(Game, game_id))
+    # un lugar por secreto: 3 por jugador
+    slots = [player.player_id for player in players for _ in range(3)]
 
-        # Si no hay cómplice o si los dueños son diferentes, la repartición es válida
-        if not acomplice_card or (acomplice_card.player_id != murderer_card.player_id):
-            break  # Salir del bucle while
+    murderer_card = next((s for s in secrets_deck if s.murderer), None)
+    acomplice_card = next((s for s in secrets_deck if s.acomplice), None)
+    if murderer_card:
+        murderer_card.player_id = slots.pop(rng.randrange(len(slots)))
+    if acomplice_card:
+        others = [i for i, player_id in enumerate(slots) if player_id != murderer_card.player_id]
+        acomplice_card.player_id = slots.pop(rng.choice(others))
 
-        # Si la condición no se cumple, el bucle se repetirá, volviendo a barajar y asignar.
+    rest = [s for s in secrets_deck if s is not murderer_card and s is not acomplice_card]
+    rng.shuffle(slots)
+    for secret_to_deal, player_id in zip(rest, slots):
+        secret_to_deal.player_id = player_id
 
     try:
-        # 4. Confirmar los cambios en la base de datos una vez que la repartición es válida
-        db.commit()
+        # Confirmar los cambios en la base de datos
+        db.flush()  # el commit lo hace la ruta
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500,detail=f"Ocurrió un error al repartir los secretos: {str(e)}",)
@@ -79,7 +76,7 @@ def init_secrets(game_id: int, db: Session = Depends(get_db)):
 
     try:
         db.add_all(new_secret_list)
-        db.commit()
+        db.flush()  # el commit lo hace la ruta
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error creating cards: {str(e)}")
@@ -148,10 +145,8 @@ async def reveal_secret(secret_id: int, db: Session):
 
     await check_social_disgrace_win_condition(secret.game_id, db)
     try:
-        db.commit()
-        if player:
-            db.refresh(player)
-        db.refresh(secret)
+        # la revelación y un posible fin de partida viajan en el mismo commit, que hace la ruta
+        db.flush()
         return secret
     except Exception as e:
         db.rollback()
@@ -172,10 +167,7 @@ def hide_secret(secret_id: int, db: Session):
         update_social_disgrace(player)
 
     try:
-        db.commit()
-        if player:
-            db.refresh(player)
-        db.refresh(secret)
+        db.flush()  # el commit lo hace la ruta
         return secret
     except Exception as e:
         db.rollback()
@@ -201,12 +193,9 @@ def steal_secret(target_player_id: int, secret_id: int, db: Session):
     # 2. Actualizar el estado de desgracia de ambos jugadores (con la información ya actualizada)
     update_social_disgrace(new_owner)
 
-    # 3. Hacer commit de todos los cambios a la vez
+    # 3. Guardar todos los cambios a la vez; el commit lo hace la ruta
     try:
-        db.commit()
-        # Refrescar todos los objetos modificados para que la sesión los tenga actualizados
-        db.refresh(new_owner)
-        db.refresh(secret)
+        db.flush()
         return secret
     except Exception as e:
         db.rollback()
@@ -0,0 +1,126 @@
+"""
+Reglas para bajar sets de detectives.
+
+Las reglas están escritas como tablas (el comodín, los hermanos, los sets con nombre
+propio) en vez de cadenas de if/elif en las rutas. Al importar el módulo se calcula el
+resultado de todas las combinaciones de 2 y 3 detectives del catálogo, así que validar
+un set es buscar en un diccionario. Una combinación fuera de la tabla (un detective
+que no es del catálogo o con otro quantity_set) se evalúa con las mismas reglas.
+"""
+from itertools import combinations, combinations_with_replacement
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+from src.database.card_catalog import definitions
+
+WILDCARD = "Harley Quin Wildcard"  # reemplaza a cualquier detective, pero solo a uno
+JOINS_ANY_SET = "Adriane Oliver"  # se puede agregar a cualquier set, aunque no sea propio
+
+# detectives distintos que juntos forman un set
+SIBLINGS: Dict[FrozenSet[str], str] = {
+    frozenset({"Tommy Beresford", "Tuppence Beresford"}): "Beresford brothers",
+}
+
+# sets que cambian de nombre cuando se bajan con el comodín
+WILDCARD_SETS: Dict[str, str] = {
+    "Mr Satterthwaite": "Mr Satterthwaite + Harley Quin",
+}
+
+NEED_ONE_MORE = "You need one more detective to play this set"
+NEED_JUST_TWO = "You need just 2 cards to play this set"
+ONLY_WILDCARDS = "You can't play this set"
+NOT_COMPATIBLE = {
+    2: "This are not two compatible detectives",
+    3: "This are not three compatible detectives",
+}
+
+# (nombre, quantity_set) de cada carta, ordenados
+SetKey = Tuple[Tuple[str, int], ...]
+
+
+class SetRule(NamedTuple):
+    name: Optional[str]  # nombre del set, None si no se puede bajar
+    error: Optional[str] = None
+
+
+def _set_name(names: List[str]) -> Optional[str]:
+    """Nombre del set que forman los detectives, o None si no son compatibles."""
+    others = [name for name in names if name != WILDCARD]
+    wildcards = len(names) - len(others)
+    if wildcards > 1 or not others:
+        return None
+    if len(set(others)) == 1:
+        name = others[0]
+        return WILDCARD_SETS.get(name, name) if wildcards else name
+    # hermanos: uno de cada uno y sin comodín
+    if wildcards or len(set(others)) != len(others):
+        return None
+    return SIBLINGS.get(frozenset(others))
+
+
+def _evaluate(key: SetKey) -> SetRule:
+    names = [name for name, _ in key]
+    if len(key) == 2 and any((quantity_set or 0) > 2 for _, quantity_set in key):
+        return SetRule(None, NEED_ONE_MORE)
+    if len(key) == 3 and any(quantity_set == 2 and name != WILDCARD for name, quantity_set in key):
+        return SetRule(None, NEED_JUST_TWO)
+    if all(name == WILDCARD for name in names):
+        return SetRule(None, ONLY_WILDCARDS)
+    name = _set_name(names)
+    if name is None:
+        return SetRule(None, NOT_COMPATIBLE.get(len(key), NOT_COMPATIBLE[2]))
+    return SetRule(name)
+
+
+def _key(cards: Iterable[Tuple[str, int]]) -> SetKey:
+    return tuple(sorted((name, quantity_set or 0) for name, quantity_set in cards))
+
+
+_CATALOG_DETECTIVES = [(d.name, d.quantity_set) for d in definitions("detective")]
+_TABLE: Dict[SetKey, SetRule] = {
+    key: _evaluate(key)
+    for size in (2, 3)
+    for key in map(_key, combinations_with_replacement(_CATALOG_DETECTIVES, size))
+}
+
+
+def resolve_set(cards: Iterable[Tuple[str, int]]) -> SetRule:
+    """cards: (nombre, quantity_set) de cada detective, en cualquier orden."""
+    key = _key(cards)
+    rule = _TABLE.get(key)
+    return rule if rule is not None else _evaluate(key)
+
+
+def _accepted_by_set() -> Dict[str, FrozenSet[str]]:
+    accepts: Dict[str, FrozenSet[str]] = {}
+    for detective, set_name in WILDCARD_SETS.items():
+        accepts[set_name] = frozenset({detective})
+    for siblings, set_name in SIBLINGS.items():
+        for name in (set_name, *siblings):
+            accepts[name] = siblings
+    return accepts
+
+
+_ACCEPTS = _accepted_by_set()
+
+
+def can_add_to_set(detective_name: str, set_name: str) -> bool:
+    """Si el detective se puede agregar a un set ya bajado (sin mirar de quién es el set)."""
+    if detective_name == JOINS_ANY_SET or detective_name == set_name:
+        return True
+    return detective_name in _ACCEPTS.get(set_name, frozenset())
+
+
+def legal_sets(detectives) -> List[dict]:
+    """
+    Sets que se pueden bajar con los detectives de una mano: uno por combinación
+    distinta de cartas, con los card_id a mandar a /sets_of2 o /sets_of3.
+    """
+    found: Dict[SetKey, dict] = {}
+    for size in (2, 3):
+        for cards in combinations(detectives, size):
+            key = _key((card.name, card.quantity_set) for card in cards)
+            if key in found:
+                continue
+            rule = resolve_set(key)
+            if rule.name is not None:
+                found[key] = {"name": rule.name, "card_ids": [card.card_id for card in cards]}
+    return list(found.values())
@@ -20,106 +20,65 @@ from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session 
 from src.database.database import get_db 
 from fastapi import Depends, HTTPException 
+from src.database.services.services_game_view import game_view
+from src.database.services.services_lobby import feed_pages
 
 
-async def broadcast_available_games(db: Session):
-
-    # games = db.query(Game).filter(
-    #   (Game.status == "bootable") | (Game.status == "waiting players")
-    # ).all()
-
-    games = db.query(Game).all()
-    # Se convierten los objetos orm a un pydntic gameResponse para que se puedan leer los atributos de games luego
-    gamesResponse = [Game_Response.model_validate(game) for game in games]
-
-    # se lo pasa a formato json
-    gamesResponseJson = jsonable_encoder(gamesResponse)
+async def broadcast_available_games(db: Session = None):
+    # sin sesión (por ejemplo desde la outbox, cuando la de la request ya se cerró) se abre una propia
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        # games = db.query(Game).filter(
+        #   (Game.status == "bootable") | (Game.status == "waiting players")
+        # ).all()
+
+        games = db.query(Game).all()
+        # Se convierten los objetos orm a un pydntic gameResponse para que se puedan leer los atributos de games luego
+        gamesResponse = [Game_Response.model_validate(game) for game in games]
+
+        # se lo pasa a formato json
+        gamesResponseJson = jsonable_encoder(gamesResponse)
+        # los sockets que se conectaron con filtros reciben su página (services_lobby.py)
+        pages = feed_pages(db)
+    finally:
+        if own_session:
+            db.close()
 
     # manager.broadcast espera un string, así que convertimos la lista a un JSON string.
-
-    await lobbyManager.broadcast(json.dumps(gamesResponseJson))
+    if pages:
+        await lobbyManager.broadcast(json.dumps(gamesResponseJson), pages)
+    else:
+        await lobbyManager.broadcast(json.dumps(gamesResponseJson))
 
 
 async def broadcast_lobby_information(db: Session, game_id: int):
-    game = db.query(Game).filter(Game.game_id == game_id).first()
-    if not game:
+    view = game_view(game_id)
+    gameMessage = view.message("game", db)
+    if not gameMessage:
         # Si el juego ya no existe, no hacemos nada.
         print(f"Intento de broadcast para un juego no existente: {game_id}")
         return
 
-    players = db.query(Player).filter(Player.game_id == game_id).all()
-
-    gameResponse = Game_Response.model_validate(game).model_dump_json()
-    playersResponse = [Player_Base.model_validate(player) for player in players]
-    playersResponseJson = jsonable_encoder(playersResponse)
-    await gameManager.broadcast(
-        json.dumps({"type": "game", "data": gameResponse}), game_id
-    )
-
-    await gameManager.broadcast(
-        json.dumps({"type": "players", "data": playersResponseJson}), game_id
-    )
+    await gameManager.broadcast(gameMessage, game_id)
+    await gameManager.broadcast(view.message("players", db), game_id)
 
 
 async def broadcast_game_information(game_id: int):
     db = SessionLocal()
     try:
-        game = (
-            db.query(Game)
-            .options(
-                selectinload(Game.log).selectinload(Log.player),
-                selectinload(Game.log).selectinload(Log.card.of_type(Event)),
-                selectinload(Game.log).selectinload(Log.set)
-            )
-            .filter(Game.game_id == game_id)
-            .first()
-        )
-        if not game:
+        view = game_view(game_id)
+        gameMessage = view.message("gameUpdated", db)
+        if not gameMessage:
             # Si el juego ya no existe, no hacemos nada.
             print(f"Intento de broadcast para un juego no existente: {game_id}")
             return
 
-        players = (
-            db.query(Player)
-            .options(joinedload(Player.cards), joinedload(Player.secrets))
-            .filter(Player.game_id == game_id)
-            .all()
-        )
-
-        # a. Validamos el 'game' (Pydantic ignorará el 'log' porque no está en el dict)
-        game_dict = Game_Response.model_validate(game).model_dump()
-        
-        # b. Formateamos el log manualmente (reutilizando tu lógica de 'get_logs')
-        formatted_logs = []
-        for log in game.log: # 'game.log' está cargado gracias a selectinload
-            formatted_logs.append({
-                "log_id": log.log_id,
-                "created_at": log.created_at.isoformat(),
-                "type": log.type,
-                "player_id": log.player.player_id if log.player else None, 
-                "card_name": log.card.name if log.card and hasattr(log.card, 'name') else None,
-                "set_name": log.set.name if log.set else None
-            })
-        
-        # c. Añadimos el log formateado al diccionario
-        game_dict['log'] = formatted_logs
-        
-        # d. Convertimos el diccionario final (y limpio) a JSON
-        gameResponse = json.dumps(game_dict)
-
-        playersStateResponse = [
-            Player_State.model_validate(player) for player in players
-        ]
-        playersStateResponseJson = jsonable_encoder(playersStateResponse)
-
-        await gameManager.broadcast(
-            json.dumps({"type": "gameUpdated", "data": gameResponse}), game_id
-        )
+        playersStateMessage = view.message("playersState", db)
 
-        await gameManager.broadcast(
-            json.dumps({"type": "playersState", "data": playersStateResponseJson}),
-            game_id,
-        )
+        await gameManager.broadcast(gameMessage, game_id)
+        await gameManager.broadcast(playersStateMessage, game_id)
     finally:
         db.close()  # cierro la conecxion para evitar saturacion de conexiones en la bdd
 
@@ -128,25 +87,8 @@ async def broadcast_player_state(game_id: int):
 
     db = SessionLocal()  # Abre una nueva sesión para esta función
     try:
-        # Obtiene todos los jugadores y sus cartas (manos)
-        players = (
-            db.query(Player)
-            .options(joinedload(Player.cards), joinedload(Player.secrets))
-            .filter(Player.game_id == game_id)
-            .all()
-        )
-
-        # Convierte a Pydantic Player_State
-        playersStateResponse = [
-            Player_State.model_validate(player) for player in players
-        ]
-        playersStateResponseJson = jsonable_encoder(playersStateResponse)
-
-        # Emite el WS de "playersState"
-        await gameManager.broadcast(
-            json.dumps({"type": "playersState", "data": playersStateResponseJson}),
-            game_id,
-        )
+        # Emite el WS de "playersState" (si ya se armó para esta versión no se consulta la base)
+        await gameManager.broadcast(game_view(game_id).message("playersState", db), game_id)
     finally:
         db.close()
 
@@ -156,47 +98,16 @@ async def broadcast_last_discarted_cards(player_id: int):
     try:
         player = db.query(Player).filter(Player.player_id == player_id).first()
         game_id = player.game_id
-        polymorphic_loader = orm.with_polymorphic(Card, [Detective, Event])
-        stmt = (
-            select(polymorphic_loader)
-            .where(Card.game_id == game_id, Card.dropped == True)
-            .order_by(desc(Card.discardInt))
-            .limit(5)
-        )
-        cardsDropped = db.execute(stmt).scalars().all()
-        if not cardsDropped:
+        view = game_view(game_id)
+        if not view.data("droppedCards", db):
             raise HTTPException(
                 status_code=404,
                 detail="No cards found in the discard pile for this game.",
             )
 
         # actualizo mano de jugador
-        players = (
-            db.query(Player)
-            .options(joinedload(Player.cards), joinedload(Player.secrets))
-            .filter(Player.game_id == game_id)
-            .all()
-        )
-        playersStateResponse = [
-            Player_State.model_validate(player) for player in players
-        ]
-        playersStateResponseJson = jsonable_encoder(playersStateResponse)
-        await gameManager.broadcast(
-            json.dumps({"type": "playersState", "data": playersStateResponseJson}),
-            game_id,
-        )
-        # Se usa typeAdapter por una cuestion de compatibilidad de versiones entre python y pydantic
-        card_list_adapter = TypeAdapter(list[AllCardsResponse])
-
-        # Ahora validamos la lista completa contra el adaptador de listas.
-        cardsDroppedResponse = card_list_adapter.validate_python(
-            cardsDropped, from_attributes=True
-        )
-
-        cardsResponseJson = jsonable_encoder(cardsDroppedResponse)
-        await gameManager.broadcast(
-            json.dumps({"type": "droppedCards", "data": cardsResponseJson}), game_id
-        )
+        await gameManager.broadcast(view.message("playersState", db), game_id)
+        await gameManager.broadcast(view.message("droppedCards", db), game_id)
     finally:
         db.close()
 
@@ -204,31 +115,14 @@ async def broadcast_last_discarted_cards(player_id: int):
 async def broadcast_card_draft(game_id: int):
     db = SessionLocal()
     try:
-        polymorphic_loader = orm.with_polymorphic(Card, [Detective, Event])
-        stmt = (
-            select(polymorphic_loader)
-            .where(Card.game_id == game_id, Card.draft == True)
-            .limit(3)
-        )
-        cardsDraft = db.execute(stmt).scalars().all()
-        if not cardsDraft:
+        view = game_view(game_id)
+        if not view.data("draftCards", db):
             raise HTTPException(
                 status_code=404,
                 detail="No cards found in the draft pile for this game.",
             )
 
-        # Se usa typeAdapter por una cuestion de compatibilidad de versiones entre python y pydantic
-        card_list_adapter = TypeAdapter(list[AllCardsResponse])
-
-        # Ahora validamos la lista completa contra el adaptador de listas.
-        cardsDraftResponse = card_list_adapter.validate_python(
-            cardsDraft, from_attributes=True
-        )
-
-        cardsResponseJson = jsonable_encoder(cardsDraftResponse)
-        await gameManager.broadcast(
-            json.dumps({"type": "draftCards", "data": cardsResponseJson}), game_id
-        )
+        await gameManager.broadcast(view.message("draftCards", db), game_id)
     finally:
         db.close()
 
@@ -240,18 +134,7 @@ async def broadcast_blackmailed(game_id: int, secret : Secrets): # Acepta el obj
             print(f"Intento de broadcast para un juego no existente: {game_id}")
             return
 
-        players = (
-            db.query(Player)
-            .options(joinedload(Player.cards), joinedload(Player.secrets))
-            .filter(Player.game_id == game_id)
-            .all()
-        )
-
         secretResponse = Secret_Response.model_validate(secret).model_dump_json()
-        playersStateResponse = [
-            Player_State.model_validate(player) for player in players
-        ]
-        playersStateResponseJson = jsonable_encoder(playersStateResponse)
 
         # Broadcast del secreto (con el 'type' correcto para el frontend)
         await gameManager.broadcast(
@@ -259,10 +142,7 @@ async def broadcast_blackmailed(game_id: int, secret : Secrets): # Acepta el obj
         )
 
         # Broadcast del estado de jugadores (aún necesario)
-        await gameManager.broadcast(
-            json.dumps({"type": "playersState", "data": playersStateResponseJson}),
-            game_id,
-        )
+        await gameManager.broadcast(game_view(game_id).message("playersState", db), game_id)
     finally:
         db.close()
 async def broadcast_last_cancelable_event(card_id : int):
@@ -0,0 +1,61 @@
+"""
+Unit of work por request.
+
+Los services sólo preparan cambios (db.add / modificar objetos / db.flush()) y nunca
+commitean: una acción del usuario es una sola transacción, que la ruta cierra con
+`await commit(db)`. Si algo falla en el medio, el rollback deshace la acción entera.
+
+Los broadcasts que un service necesita disparar (por ejemplo finish_game) se encolan
+con `after_commit(db, broadcast_..., game_id)` y se ejecutan recién después del commit,
+una sola vez aunque se hayan encolado varias veces. Si la transacción se revierte,
+la cola se descarta. Dentro de una request HTTP no se esperan: pasan a la outbox
+de la request, que los manda cuando la respuesta ya salió.
+"""
+from typing import Awaitable, Callable
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.webSocket.outbox import current_outbox, deliver, publish
+
+_QUEUE_KEY = "after_commit"
+
+
+def after_commit(db: Session, broadcast: Callable[..., Awaitable], *args):
+    queue = db.info.setdefault(_QUEUE_KEY, [])
+    if (broadcast, args) not in queue:
+        queue.append((broadcast, args))
+
+
+def pending_broadcasts(db: Session) -> list:
+    return list(db.info.get(_QUEUE_KEY, []))
+
+
+async def run_after_commit(db: Session):
+    queue = db.info.pop(_QUEUE_KEY, [])
+    for broadcast, args in queue:
+        if current_outbox() is not None:
+            # dentro de una request HTTP salen después de la respuesta (ver webSocket/outbox.py)
+            publish(broadcast, *args)
+        else:
+            await deliver(broadcast, *args)
+
+
+async def commit(db: Session):
+    """Commit único de la request y, después, los broadcasts encolados."""
+    db.commit()
+    await run_after_commit(db)
+
+
+async def commit_or_400(db: Session, error: str):
+    """`commit` para las rutas: si el commit falla se revierte la acción entera y se responde 400."""
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"{error}: {str(e)}")
+    await run_after_commit(db)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_queued_broadcasts(session):
+    session.info.pop(_QUEUE_KEY, None)
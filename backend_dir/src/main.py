@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from src.routes.players_routes import player
 from src.routes.games_routes import game
 from src.routes.cards_routes import card
@@ -7,11 +9,36 @@ from src.routes.websocket_routes import ws
 from src.routes.set_routes import set
 from src.routes.event_routes import events
 from src.routes.log_routes import log
+from src.routes.metrics_routes import metrics
+from src.monitoring.metrics import REQUEST_LATENCY
+from src.monitoring.loop_monitor import watchdog
+from src.database.services.services_chat import chatManager
+from src.database.services.services_archive import gameArchiver
+from src.database.services.services_reaper import gameReaper
+from src.webSocket.outbox import OutboxMiddleware
+from src.database.journal import JournalMiddleware
+from src.database.game_snapshot import snapshotCompactor
 
 from fastapi.middleware.cors import CORSMiddleware
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watchdog.start()
+    chatManager.start()
+    snapshotCompactor.start()
+    gameArchiver.start()
+    gameReaper.start()
+    yield
+    gameReaper.stop()
+    gameArchiver.stop()
+    snapshotCompactor.stop()
+    chatManager.stop()
+    watchdog.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Agatha Christie's Death on the Cards API ",
     description="API to connect with server for the respective game",
 )
@@ -24,6 +51,30 @@ app.add_middleware(
     allow_headers=["*"],  # Authorization, Content-Type, etc.
 )
 
+# los broadcasts que anotan las rutas salen cuando la respuesta ya se mandó
+app.add_middleware(OutboxMiddleware)
+# cada acción que cambia una partida queda en su journal (ver database/journal.py)
+app.add_middleware(JournalMiddleware)
+
+
+@app.middleware("http")
+async def measure_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # usamos el template de la ruta ("/games/{game_id}") y no la URL, para no explotar la cardinalidad
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
+
 
 @app.get("/")
 def hola():
@@ -37,4 +88,5 @@ app.include_router(card)
 app.include_router(secret)
 app.include_router(set)
 app.include_router(events)
-app.include_router(log)
\ No newline at end of file
+app.include_router(log)
+app.include_router(metrics)
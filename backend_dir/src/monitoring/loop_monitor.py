@@ -0,0 +1,145 @@
+"""
+Watchdog del event loop.
+
+Una corrutina "late" cada `interval` segundos dentro del loop y mide su propio
+retraso (lag). Un hilo aparte mira ese latido: si el loop no late durante más de
+`threshold` segundos, alguien lo está bloqueando (típicamente una query síncrona
+dentro de un `async def`), así que el hilo captura el stack del hilo del loop en
+ese momento y lo etiqueta con la ruta y/o el broadcast que lo estaba ejecutando.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+from src.monitoring.metrics import EVENT_LOOP_LAG, registry, Counter
+
+logger = logging.getLogger("src.monitoring.loop")
+
+LOOP_BLOCKED = registry.register(Counter(
+    "event_loop_blocked_total", "Veces que el loop quedó bloqueado más del umbral, por responsable.", ("tag",)))
+
+ROUTES_DIR = os.path.join("src", "routes")
+
+
+def tag_from_stack(stack: traceback.StackSummary) -> str:
+    """
+    Arma la etiqueta del bloqueo a partir del stack (de afuera hacia adentro):
+    las funciones definidas en src/routes y cualquier función broadcast_*.
+    """
+    parts = []
+    for frame in stack:
+        if frame.name.startswith("broadcast_"):
+            parts.append(f"broadcast:{frame.name}")
+        elif ROUTES_DIR in frame.filename:
+            parts.append(f"route:{frame.name}")
+    # el mismo frame puede aparecer repetido si una corrutina llama a otra con el mismo nombre
+    unique = list(dict.fromkeys(parts))
+    return " > ".join(unique) if unique else "unknown"
+
+
+class LoopWatchdog:
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, max_incidents: int = 100):
+        self.threshold = threshold
+        self.interval = interval
+        self.incidents = deque(maxlen=max_incidents)
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._current: Optional[Dict] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Debe llamarse desde dentro del event loop que se quiere vigilar."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG.observe(lag)
+            with self._lock:
+                self._last_beat = time.monotonic()
+                if self._current is not None:
+                    # el bloqueo terminó: ahora sabemos cuánto duró en total
+                    self._current["blocked_seconds"] = round(lag, 4)
+                    self._current = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                stalled = time.monotonic() - self._last_beat - self.interval
+                if stalled < self.threshold or self._current is not None:
+                    continue
+                incident = self._capture(stalled)
+                if incident is None:
+                    continue
+                self._current = incident
+                self.incidents.append(incident)
+            LOOP_BLOCKED.inc(tag=incident["tag"])
+            logger.warning(
+                "Event loop bloqueado %.3fs por %s\n%s",
+                stalled, incident["tag"], "".join(incident["stack"]),
+            )
+
+    def _capture(self, stalled: float) -> Optional[Dict]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)
+        return {
+            "detected_at": time.time(),
+            "tag": tag_from_stack(stack),
+            "blocked_seconds": round(stalled, 4),
+            "stack": traceback.format_list(stack),
+        }
+
+    def offenders(self) -> List[Dict]:
+        """Incidentes agrupados por etiqueta, de peor a mejor según el tiempo total bloqueado."""
+        grouped: Dict[str, Dict] = {}
+        for incident in list(self.incidents):
+            entry = grouped.setdefault(incident["tag"], {"tag": incident["tag"], "count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry["count"] += 1
+            entry["total_seconds"] = round(entry["total_seconds"] + incident["blocked_seconds"], 4)
+            entry["max_seconds"] = max(entry["max_seconds"], incident["blocked_seconds"])
+        return sorted(grouped.values(), key=lambda e: e["total_seconds"], reverse=True)
+
+    def report(self) -> Dict:
+        return {
+            "threshold_seconds": self.threshold,
+            "last_lag_seconds": round(self.last_lag, 4),
+            "max_lag_seconds": round(self.max_lag, 4),
+            "offenders": self.offenders(),
+            "incidents": list(self.incidents),
+        }
+
+
+watchdog = LoopWatchdog(threshold=float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1")))
@@ -0,0 +1,208 @@
+"""
+Métricas internas del servidor en formato de texto de Prometheus.
+
+No dependemos de prometheus_client: los tres tipos que usamos (counter, gauge
+e histogram) se implementan acá y se renderizan a mano en /metrics.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera los labels {self.labelnames}, recibió {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def replace(self, values: Dict[Tuple, float]):
+        """Reemplaza todas las series de una vez (útil para gauges que se recalculan en cada scrape)."""
+        with self._lock:
+            self._values = dict(values)
+
+    def value(self, **labels) -> Optional[float]:
+        return self._values.get(self._key(labels))
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # por cada serie: [conteos por bucket (no acumulados), suma, cantidad]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _samples(self):
+        lines = []
+        with self._lock:
+            items = [(key, list(s[0]), s[1], s[2]) for key, s in self._series.items()]
+        for key, counts, total, amount in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {amount}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Latencia de las requests HTTP por ruta.",
+    ("method", "route", "status")))
+
+BROADCAST_DURATION = registry.register(Histogram(
+    "ws_broadcast_duration_seconds", "Tiempo de fan-out de un broadcast por tipo de mensaje.",
+    ("manager", "type")))
+
+BROADCAST_BYTES = registry.register(Counter(
+    "ws_broadcast_bytes_total", "Bytes enviados por broadcast (tamaño del mensaje por destinatario).",
+    ("manager", "type")))
+
+BROADCAST_MESSAGES = registry.register(Counter(
+    "ws_broadcast_messages_total", "Mensajes enviados por broadcast.",
+    ("manager", "type")))
+
+ACTIVE_SOCKETS = registry.register(Gauge(
+    "ws_active_sockets", "WebSockets conectados por manager.", ("manager",)))
+
+ACTIVE_GAMES = registry.register(Gauge(
+    "games_by_status", "Partidas existentes según Game.status.", ("status",)))
+
+DB_POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool de la base de datos."))
+
+DB_POOL_CONNECTIONS = registry.register(Gauge(
+    "db_pool_connections", "Estado del pool de conexiones (size, checked_out, overflow).", ("state",)))
+
+EVENT_LOOP_LAG = registry.register(Histogram(
+    "event_loop_lag_seconds", "Retraso del event loop respecto de un sleep programado."))
+
+
+def message_type(message: str, default: str = "unknown") -> str:
+    """
+    Extrae el 'type' de un mensaje ya serializado sin volver a parsear todo el JSON.
+    Todos los broadcast arman el mensaje con json.dumps({"type": ..., "data": ...}).
+    """
+    prefix = '{"type": "'
+    if message.startswith(prefix):
+        end = message.find('"', len(prefix))
+        if end != -1:
+            return message[len(prefix):end]
+    return default
+
+
+def observe_broadcast(manager: str, type_: str, message: str, recipients: int, elapsed: float):
+    BROADCAST_DURATION.observe(elapsed, manager=manager, type=type_)
+    BROADCAST_MESSAGES.inc(recipients, manager=manager, type=type_)
+    BROADCAST_BYTES.inc(len(message.encode("utf-8")) * recipients, manager=manager, type=type_)
+
@@ -1,23 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func  
 from src.database.database import SessionLocal, get_db
 from src.database.models import Card , Game , Detective , Event
-from src.database.services.services_cards import only_6 , replenish_draft_pile
+from src.database.services.services_cards import only_6 , replenish_draft_pile, refill_hand
 from src.database.services.services_games import finish_game
+from src.database.unit_of_work import after_commit, commit, commit_or_400
 from src.schemas.card_schemas import Card_Response , Detective_Response , Event_Response, Discard_List_Request
 from src.database.services.services_websockets import broadcast_last_discarted_cards, broadcast_game_information , broadcast_player_state, broadcast_card_draft
+from src.webSocket.outbox import publish
 from src.database.services.services_events import early_train_paddington
-import random
+from src.database.services.services_bulk import bulk_update, value_by_id
+from src.database.game_rng import game_rng
+from src.database.services.services_http_cache import cached_read, game_etag
 
 card = APIRouter()
 
 @card.get("/lobby/cards/{game_id}", tags=["Cards"], response_model=list[Card_Response])
-def list_cards_ingame(game_id: int, db: Session = Depends(get_db)):
-    cards = db.query(Card).filter(Card.game_id == game_id).all()
-    if not cards:
-        raise HTTPException(status_code=404, detail="No cards found for the given game_id")
-    return cards
+def list_cards_ingame(game_id: int, request: Request, db: Session = Depends(get_db)):
+    def build():
+        cards = db.query(Card).filter(Card.game_id == game_id).all()
+        if not cards:
+            raise HTTPException(status_code=404, detail="No cards found for the given game_id")
+        return cards
+    return cached_read(request, game_etag(game_id), build, list[Card_Response])
 
 @card.get("/lobby/list/cards/{player_id}", tags=["Cards"], response_model=list[Card_Response])
 def list_card_ofplayer(player_id: int, db: Session = Depends(get_db)):
@@ -48,12 +54,13 @@ async def pickup_a_card(player_id: int, game_id: int, db: Session = Depends(get_
     delayed_card = db.query(Card).filter(Card.game_id == game_id, Card.discardInt == -1, Card.dropped == False, Card.picked_up == False, Card.draft == False).first()
     if delayed_card : 
         card = delayed_card
-    deck = db.query(Card).filter(Card.game_id == game_id, Card.dropped == False , Card.picked_up == False , Card.draft == False).all()
+    deck = db.query(Card).filter(Card.game_id == game_id, Card.dropped == False , Card.picked_up == False , Card.draft == False).order_by(Card.card_id).all()
     game = db.query(Game).filter(Game.game_id == game_id).first()
     if not delayed_card : 
-        random.shuffle(deck)
+        game_rng(game).shuffle(deck)
         if not deck: 
             await finish_game(game_id, db)
+            await commit(db)
             raise HTTPException(status_code=400, detail="The player already has 6 cards")
 
         if game.cards_left is None:
@@ -65,73 +72,79 @@ async def pickup_a_card(player_id: int, game_id: int, db: Session = Depends(get_
         game.cards_left = len(deck) -1
         if game.cards_left == 0:
             await finish_game(game_id, db)
-        db.commit()
-        db.refresh(card)
-        db.refresh(game)
-        await broadcast_game_information(game_id)
+        # si finish_game ya encoló este mismo broadcast, sale una sola vez
+        after_commit(db, broadcast_game_information, game_id)
+        await commit(db)
         return card
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error assigning card to player: {str(e)}")
 
 
+@card.put("/cards/refill/{player_id},{game_id}", status_code=200, tags=["Cards"], response_model=list[Card_Response])
+async def refill_player_hand(player_id: int, game_id: int, db: Session = Depends(get_db)):
+    """
+    Completa la mano del jugador hasta 6 cartas en una sola transacción y un solo broadcast
+    (reemplaza las llamadas repetidas a /cards/pick_up al final del turno).
+    """
+    drawn = await refill_hand(player_id, game_id, db)
+    # si finish_game ya encoló este mismo broadcast, sale una sola vez
+    after_commit(db, broadcast_game_information, game_id)
+    await commit_or_400(db, "Error refilling the hand")
+    return drawn
+
+
 @card.put("/cards/drop/{player_id}" , status_code=200, tags = ["Cards"], response_model=Card_Response)
 async def discard_card(player_id : int , db: Session = Depends(get_db)):
     card = db.query(Card).filter(Card.player_id == player_id , Card.dropped == False).first()
     if not card:
         raise HTTPException(status_code=404, detail="All cards dropped")       
-    try:
-        # Encuentra el valor máximo actual de discardInt en la partida
-        max_discard = db.query(func.max(Card.discardInt)).filter(Card.game_id == card.game_id).scalar()
-        
-        # Asigna el siguiente valor en la secuencia
-        card.discardInt = (max_discard or 0) + 1
-        
-        card.dropped = True
-        card.picked_up = False
-        db.commit()
-        db.refresh(card)
-        await broadcast_last_discarted_cards(player_id)
-        return card
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=f"Error assigning card to player: {str(e)}")
+    # Encuentra el valor máximo actual de discardInt en la partida
+    max_discard = db.query(func.max(Card.discardInt)).filter(Card.game_id == card.game_id).scalar()
+    
+    # Asigna el siguiente valor en la secuencia
+    card.discardInt = (max_discard or 0) + 1
+    
+    card.dropped = True
+    card.picked_up = False
+    await commit_or_400(db, "Error assigning card to player")
+    db.refresh(card)
+    publish(broadcast_last_discarted_cards, player_id)
+    return card
     
 @card.put("/cards/game/drop/{player_id},{card_id}", status_code= 200 , tags = ["Cards"], response_model= Card_Response)
-def select_card_to_discard(player_id : int, card_id : int, db: Session = Depends (get_db)) : 
+async def select_card_to_discard(player_id : int, card_id : int, db: Session = Depends (get_db)) : 
     card = db.query(Card).filter(Card.player_id == player_id , Card.dropped == False, Card.card_id == card_id).first()
     if not card:
         raise HTTPException(status_code=404, detail="All cards dropped from player or card id invalid to player")       
-    try:
-        # Encuentra el valor máximo actual de discardInt en la partida
-        max_discard = db.query(func.max(Card.discardInt)).filter(Card.game_id == card.game_id).scalar()
+    # Encuentra el valor máximo actual de discardInt en la partida
+    max_discard = db.query(func.max(Card.discardInt)).filter(Card.game_id == card.game_id).scalar()
 
-        # Asigna el siguiente valor en la secuencia
-        card.discardInt = (max_discard or 0) + 1
+    # Asigna el siguiente valor en la secuencia
+    card.discardInt = (max_discard or 0) + 1
 
-        card.dropped = True
-        card.picked_up = False
-        db.commit()
-        db.refresh(card)
-        return card
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=f"Error assigning card to player: {str(e)}")
+    card.dropped = True
+    card.picked_up = False
+    await commit_or_400(db, "Error assigning card to player")
+    db.refresh(card)
+    return card
     
 @card.get("/cards/draft/{game_id}", tags=["Cards"], response_model=list[Card_Response])
-def get_draft_pile(game_id: int, db: Session = Depends(get_db)):
+def get_draft_pile(game_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Obtiene las cartas que están actualmente visibles en el draft pile de la mesa.
     """
-    draft_cards = db.query(Card).filter(
-        Card.game_id == game_id,
-        Card.draft == True
-    ).all()
+    def build():
+        draft_cards = db.query(Card).filter(
+            Card.game_id == game_id,
+            Card.draft == True
+        ).all()
 
-    if not draft_cards:
-        raise HTTPException(status_code=404, detail="No cards found in the draft pile for this game.")
-    
-    return draft_cards
+        if not draft_cards:
+            raise HTTPException(status_code=404, detail="No cards found in the draft pile for this game.")
+
+        return draft_cards
+    return cached_read(request, game_etag(game_id), build, list[Card_Response])
 
 @card.put("/cards/draft_pickup/{game_id},{card_id},{player_id}", status_code=200, tags=["Cards"], response_model=Card_Response)
 async def pick_up_draft_card(game_id: int, card_id: int, player_id: int, db: Session = Depends(get_db)):
@@ -145,30 +158,32 @@ async def pick_up_draft_card(game_id: int, card_id: int, player_id: int, db: Ses
         card.player_id = player_id
         card.picked_up=True
         replenish_draft_pile(game_id, db)
-
-        db.commit()
-        db.refresh(card)
-        await broadcast_game_information(game_id)
-        await broadcast_card_draft(game_id)
-        return card
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error picking up card: {str(e)}")
 
+    await commit_or_400(db, "Error picking up card")
+    db.refresh(card)
+    publish(broadcast_game_information, game_id)
+    publish(broadcast_card_draft, game_id)
+    return card
+
 @card.get("/cards/discard-pile/{game_id}", tags=["Cards"], response_model=list[Card_Response])
-def get_top_discard_pile(game_id: int, db: Session = Depends(get_db)):
+def get_top_discard_pile(game_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Obtiene las últimas 5 cartas de la pila de descarte, ordenadas de la más reciente a la más antigua.
     """
-    discarded_cards = db.query(Card).filter(
-        Card.game_id == game_id,
-        Card.dropped == True
-    ).order_by(desc(Card.discardInt)).limit(5).all()
+    def build():
+        discarded_cards = db.query(Card).filter(
+            Card.game_id == game_id,
+            Card.dropped == True
+        ).order_by(desc(Card.discardInt)).limit(5).all()
 
-    if not discarded_cards:
-        raise HTTPException(status_code=404, detail="No cards found in the discard pile for this game.")
-    
-    return discarded_cards
+        if not discarded_cards:
+            raise HTTPException(status_code=404, detail="No cards found in the discard pile for this game.")
+
+        return discarded_cards
+    return cached_read(request, game_etag(game_id), build, list[Card_Response])
 @card.put("/cards/game/drop_list/{player_id}" , status_code=200, tags = ["Cards"], response_model=list[Card_Response])
 async def select_cards_to_discard(player_id: int, discard_request: Discard_List_Request, db: Session = Depends(get_db)):
     card_ids = discard_request.card_ids
@@ -193,36 +208,39 @@ async def select_cards_to_discard(player_id: int, discard_request: Discard_List_
         )
 
     try:
+        game_id = cards_to_discard[0].game_id
+
         # 3. ENCONTRAR EL MÁXIMO discardInt
-        max_discard = db.query(func.max(Card.discardInt)).filter(Card.game_id == cards_to_discard[0].game_id).scalar()
+        max_discard = db.query(func.max(Card.discardInt)).filter(Card.game_id == game_id).scalar()
         next_discard_int = (max_discard or 0) + 1
-        
-        updated_cards = []
-
-        # 4. ITERAR Y ACTUALIZAR
-        for card_obj in cards_to_discard:
-            card_obj.discardInt = next_discard_int
-            card_obj.player_id = None
-            card_obj.dropped = True
-            card_obj.picked_up = False
-            updated_cards.append(card_obj)
-            next_discard_int += 1
-            event = db.query(Event).filter(Event.card_id == card_obj.card_id).first()
-            if event and event.name == "Early train to paddington":
-                early_train += 1
-
-        db.commit()
-
-        # 5. REFRESCAR Y RETORNAR (Uniformidad: refrescamos los objetos)
-        # Refrescamos los objetos para asegurarnos de que el ORM tenga los valores correctos
-        for card_obj in updated_cards:
-             db.refresh(card_obj)
 
-        # 6. BROADCAST (La parte clave para que desaparezcan del frontend)
+        # 4. ACTUALIZAR TODAS EN UN SOLO UPDATE (cada carta con su discardInt, en el orden pedido)
+        discard_order = {card_id: next_discard_int + i for i, card_id in enumerate(card_ids)}
+        bulk_update(
+            db, Card, game_id,
+            Card.card_id.in_(card_ids),
+            discardInt=value_by_id(Card.card_id, discard_order, Card.discardInt),
+            player_id=None,
+            dropped=True,
+            picked_up=False,
+        )
+        # una sola query para saber cuántas Early train to paddington se descartaron
+        early_train = db.query(Event).filter(
+            Event.card_id.in_(card_ids), Event.name == "Early train to paddington"
+        ).count()
+        # cada Early train descartada se resuelve en la misma transacción que el descarte
         for _ in range(early_train):
-            await early_train_paddington(cards_to_discard[0].game_id, db)
-            await broadcast_game_information(cards_to_discard[0].game_id)
-        await broadcast_last_discarted_cards(player_id)
+            await early_train_paddington(game_id, db)
+
+        await commit(db)
+
+        # 5. REFRESCAR Y RETORNAR: el commit expira los objetos, se recargan todos en una query
+        updated_cards = db.query(Card).filter(Card.card_id.in_(card_ids)).order_by(Card.discardInt).all()
+
+        # 6. BROADCAST (La parte clave para que desaparezcan del frontend)
+        if early_train:
+            publish(broadcast_game_information, game_id)
+        publish(broadcast_last_discarted_cards, player_id)
         
         return updated_cards
         
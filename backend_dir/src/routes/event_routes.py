@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
 from pydantic import Secret
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
@@ -18,6 +19,8 @@ from src.database.services.services_cards import only_6, replenish_draft_pile, r
 from src.database.services.services_games import finish_game
 from src.schemas.secret_schemas import Secret_Response
 from src.database.services.services_websockets import  broadcast_blackmailed, broadcast_last_discarted_cards, broadcast_game_information , broadcast_player_state, broadcast_card_draft, broadcast_last_cancelable_event
+from src.webSocket.outbox import publish
+from src.database.unit_of_work import commit_or_400
 from src.schemas.card_schemas import Card_Response, Discard_List_Request, Event_Response
 from src.database.services.services_events import (
     cards_off_table,
@@ -49,9 +52,10 @@ async def activate_cards_off_table_event(player_id: int, db: Session = Depends(g
     if not player:
         raise HTTPException(status_code=404, detail="Player not found.")
     result = cards_off_table(player_id=player_id, db=db)
+    await commit_or_400(db, "Error discarding 'Not so fast' cards")
 
-    await broadcast_game_information(player.game_id)
-    await broadcast_last_discarted_cards(player.player_id)
+    publish(broadcast_game_information, player.game_id)
+    publish(broadcast_last_discarted_cards, player.player_id)
     return result
 
 
@@ -89,7 +93,8 @@ async def activate_one_more_event(
         )
 
     updated_secret = one_more(new_secret_player_id, secret_id, db=db)
-    await broadcast_game_information(new_secret_player.game_id)
+    await commit_or_400(db, "Error executing 'One More' event")
+    publish(broadcast_game_information, new_secret_player.game_id)
     return updated_secret
 
 
@@ -119,8 +124,9 @@ async def activate_early_train_paddington_event(
         raise HTTPException(status_code=404, detail="Player not found in this game.")
 
     result = await early_train_paddington(game_id=game_id, db=db)
-    await broadcast_game_information(game_id)
-    await broadcast_last_discarted_cards(player_id)
+    await commit_or_400(db, "Error executing 'Early Train to Paddington' event")
+    publish(broadcast_game_information, game_id)
+    publish(broadcast_last_discarted_cards, player_id)
     return result
 
 
@@ -143,8 +149,9 @@ async def activate_look_into_ashes_event(
         raise HTTPException(status_code=404, detail="Card not found.")
 
     taken_card = look_into_ashes(player_id=player_id, card_id=card_id, db=db)
-    await broadcast_game_information(player.game_id)
-    await broadcast_last_discarted_cards(player_id)
+    await commit_or_400(db, "Error assigning card to player")
+    publish(broadcast_game_information, player.game_id)
+    publish(broadcast_last_discarted_cards, player_id)
     return taken_card
 
 
@@ -174,9 +181,12 @@ async def activate_delay_murderers_escape(
         raise HTTPException(status_code=404, detail="Player not found in this game.")
 
     discarded_cards_ids = discard_cards.card_ids
-    discarded_cards = delay_the_murderers_escape(game_id, discarded_cards_ids, db)
-    await broadcast_game_information(game_id)
-    await broadcast_last_discarted_cards(player_id)
+    delayed_ids = [card.card_id for card in delay_the_murderers_escape(game_id, discarded_cards_ids, db)]
+    await commit_or_400(db, "Error executing 'Delay murderer escapes' event")
+    # el commit expira las cartas: se recargan todas juntas en vez de una por una al serializar
+    discarded_cards = db.query(Card).filter(Card.card_id.in_(delayed_ids)).all()
+    publish(broadcast_game_information, game_id)
+    publish(broadcast_last_discarted_cards, player_id)
     return discarded_cards
 
 
@@ -192,11 +202,12 @@ async def activate_card_trade_initiate(trader_id: int, tradee_id: int, card_id:
         card_id=card_id,  # <-- Pasa el ID al servicio
         db=db,
     )
+    await commit_or_400(db, "Error iniciando el trade")
 
     trader = db.query(Player).filter(Player.player_id == trader_id).first()
     if trader:
-        await broadcast_game_information(trader.game_id)
-        await broadcast_last_discarted_cards(trader.player_id)
+        publish(broadcast_game_information, trader.game_id)
+        publish(broadcast_last_discarted_cards, trader.player_id)
     return result
 
 
@@ -214,11 +225,12 @@ async def activate_card_trade_select_card(
     """
     
     result = select_card_for_trade_service(player_id=player_id, db=db, card_id=card_id) # Ojo al orden
+    await commit_or_400(db, "Error al seleccionar carta para trade")
     
     
     player = db.query(Player).filter(Player.player_id == player_id).first()
     if player:
-        await broadcast_game_information(player.game_id)
+        publish(broadcast_game_information, player.game_id)
         
     return result
 
@@ -242,7 +254,7 @@ async def activate_blackmailed(player_id_from : int, player_id_to : int, secret_
             status_code=400,
             detail=f"Error executing 'Blackmail' event: {str(e)}",
         )
-    await broadcast_blackmailed(game_id, secret)
+    publish(broadcast_blackmailed, game_id, secret)
 
     return secret 
 
@@ -266,7 +278,7 @@ async def deactivate_blackmailed(player_id_from : int, player_id_to : int, db :
             status_code=400,
             detail=f"Error executing 'Blackmail' event: {str(e)}",
         )
-    await broadcast_game_information(game_id)
+    publish(broadcast_game_information, game_id)
 
     return None 
    
@@ -294,9 +306,10 @@ async def activate_dead_card_folly_initiate(
         direction=direction,
         db=db,
     )
+    await commit_or_400(db, "Error iniciando Dead Card Folly")
 
-    await broadcast_game_information(game_id)
-    await broadcast_last_discarted_cards(player_id)
+    publish(broadcast_game_information, game_id)
+    publish(broadcast_last_discarted_cards, player_id)
     return result
 
 
@@ -321,31 +334,41 @@ async def activate_dead_card_folly_trade_select_card(
         card_id=card_id,
         db=db,
     )
+    await commit_or_400(db, "Error al seleccionar carta para Dead Card Folly")
 
     # Broadcast al juego
     from_player = db.query(Player).filter(Player.player_id == from_player_id).first()
     if from_player:
-        await broadcast_game_information(from_player.game_id)
+        publish(broadcast_game_information, from_player.game_id)
 
     return result
     
 @events.put ("/event/point_your_suspicion/{game_id}", status_code = 200,tags = ["Events"])
 async def activate_point_your_suspicion (game_id : int, db : Session = Depends(get_db)) :
     pys = point_your_suspicion(game_id, db)
-    await broadcast_game_information(game_id)
+    await commit_or_400(db, "Error executing 'Point Your Suspicion' event")
+    publish(broadcast_game_information, game_id)
     return pys 
 
 @events.put ("/event/end/point_your_suspicion/{game_id}", status_code = 200,tags = ["Events"])
 async def ending_point_your_suspicion (game_id : int, db : Session = Depends(get_db)) :
     pys = end_point_your_suspicion(game_id, db)
-    await broadcast_game_information(game_id)
+    await commit_or_400(db, "Error executing 'Point Your Suspicion' ending event")
+    publish(broadcast_game_information, game_id)
     return pys
 
     
 @events.get("/events/count/Not_so_fast/{game_id}" , status_code=200, tags=["Events"])
 def count_NSF(game_id: int , db:Session = Depends(get_db)):
     
-    return count(game_id , db)
+    item = count(game_id , db)
+    if isinstance(item, Event):
+        # las cartas del catálogo no guardan el nombre en la fila: se agrega a la respuesta como antes
+        response = jsonable_encoder(item)
+        response.pop("_name", None)
+        response["name"] = item.name
+        return response
+    return item
     
 
     
@@ -1,26 +1,44 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException, WebSocket  #te permite definir las rutas o subrutas por separado
-from sqlalchemy.orm import Session  
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket  #te permite definir las rutas o subrutas por separado
+from sqlalchemy.orm import Session
 from src.database.database import SessionLocal, get_db
 from src.database.models import Game, Log, Player 
-from src.schemas.games_schemas import Game_Base, Game_Response, Game_Initialized
+from src.schemas.games_schemas import Archived_Page, Game_Base, Game_Response, Game_Summary, Game_Initialized, Games_Page, Games_Query
 from src.database.services.services_games import assign_turn_to_players
+from src.database.game_rng import new_seed
 from src.database.services.services_cards import init_detective_cards , init_event_cards, deal_cards_to_players, setup_initial_draft_pile , deal_NSF
 from src.database.services.services_secrets import init_secrets, deal_secrets_to_players
+from src.database.services.services_archive import archived_games_page, load_archive
+from src.database.services.services_bulk import delete_games
+from src.database.services.services_http_cache import all_games_etag, cached_read, game_etag
+from src.database.services.services_lobby import LOBBY_STATUSES, games_page, games_query, query_games
 from src.database.services.services_websockets import broadcast_available_games, broadcast_card_draft, broadcast_game_information
+from src.webSocket.outbox import publish
 from src.webSocket.connection_manager import lobbyManager, gameManager
+from src.database.services.services_chat import chatManager
 
 
 game = APIRouter()
 
 
-@game.get("/games",tags = ["Games"])
-def list_games (db: Session = Depends(get_db)) :
-    return db.query(Game).all()
+# las partidas se devuelven con Game_Summary: la semilla (y con ella las manos) no sale del servidor
+@game.get("/games", response_model=list[Game_Summary], tags = ["Games"])
+def list_games (request: Request, db: Session = Depends(get_db)) :
+    return cached_read(request, all_games_etag(), lambda: db.query(Game).all(), list[Game_Summary])
 
-@game.get("/games/availables",tags = ["Games"])
+@game.get("/games/availables", response_model=list[Game_Summary], tags = ["Games"])
 def list_available_games (db : Session = Depends (get_db)): 
-    return db.query(Game).filter((Game.status == "bootable") |  (Game.status == "waiting players")).all()
+    games, _ = query_games(db, Games_Query(status=list(LOBBY_STATUSES), limit=None))
+    return games
+
+@game.get("/lobby/games", response_model=Games_Page, tags=["Games"])
+def list_games_page(request: Request, params: Annotated[Optional[Games_Query], Depends(games_query)], db: Session = Depends(get_db)):
+    """
+    Partidas de a páginas: filtros `status` (repetible), `min_free_seats`, `name_prefix`;
+    `sort` created|fill; `limit` (20 por defecto) y el `next_cursor` de la página anterior.
+    """
+    return cached_read(request, all_games_etag(), lambda: games_page(db, params or Games_Query()), Games_Page)
 
 @game.post ("/games", status_code=201, response_model = Game_Response,tags = ["Games"]) #devolvia un int y queria devolver una response con el schema de game_base
 async def create_game (game : Game_Base, db: Session = Depends(get_db)) : 
@@ -28,12 +46,13 @@ async def create_game (game : Game_Base, db: Session = Depends(get_db)) :
                         max_players = game.max_players,
                         min_players = game.min_players,
                         name = game.name,
-                        players_amount = 0)
+                        players_amount = 0,
+                        seed = new_seed())  # nunca la elige el cliente: con la semilla se conocen todas las manos
     db.add(new_game)
     try:
         db.commit()
         db.refresh(new_game)
-        await broadcast_available_games(db)
+        publish(broadcast_available_games)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error creating game: {str(e)}")
@@ -46,9 +65,11 @@ async def delete_game(game_id: int, db:Session = Depends(get_db)):
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     try:
-        db.delete(game)
+        # un DELETE por tabla, sin cargar las cartas, secretos ni logs de la partida
+        delete_games(db, [game_id])
         db.commit()
-        await broadcast_available_games(db)
+        chatManager.forget(game_id)
+        publish(broadcast_available_games)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error deleting game: {str(e)}")
@@ -83,8 +104,8 @@ async def initialize_game (game_id : int, db : Session = Depends(get_db)):
             db.rollback()
             raise HTTPException(status_code=400, detail=f"Error updating turn's game: {str(e)}")
         
-        await broadcast_game_information(game_id)
-        await broadcast_available_games(db)
+        publish(broadcast_game_information, game_id)
+        publish(broadcast_available_games)
     else : 
         raise HTTPException(status_code=424, detail=f"Error, you need more players to start game")
     return game
@@ -118,16 +139,40 @@ async def update_turn (game_id : int , db: Session = Depends(get_db)) :
     
     try:
         db.commit()
-        await broadcast_game_information(game_id) 
+        publish(broadcast_game_information, game_id) 
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error updating turn's game: {str(e)}")
 
     return game
 
-@game.get("/games/{game_id}", tags=["Games"])
-def get_game(game_id: int, db: Session = Depends(get_db)):
-    game = db.get(Game, game_id)
-    if not game:
-        raise HTTPException(status_code=404, detail="Game not found")
-    return game
\ No newline at end of file
+@game.get("/games/{game_id}", response_model=Game_Summary, tags=["Games"])
+def get_game(game_id: int, request: Request, db: Session = Depends(get_db)):
+    def build():
+        game = db.get(Game, game_id)
+        if not game:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return game
+    return cached_read(request, game_etag(game_id), build, Game_Summary)
+
+
+@game.get("/archive/games", response_model=Archived_Page, tags=["Games"])
+def list_archived_games(
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Annotated[Optional[str], Query()] = None,
+    db: Session = Depends(get_db),
+):
+    """Partidas archivadas de a páginas, lo último archivado primero: {"games": [...], "next_cursor": ...}."""
+    try:
+        archives, next_cursor = archived_games_page(db, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return Archived_Page.model_validate({"games": archives, "next_cursor": next_cursor}, from_attributes=True)
+
+
+@game.get("/archive/games/{game_id}", tags=["Games"])
+def get_archived_game(game_id: int, db: Session = Depends(get_db)):
+    archive = load_archive(game_id, db)
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Archived game not found")
+    return archive
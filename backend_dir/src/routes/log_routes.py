@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from src.database.models import Log, Player, Event, Set
 from sqlalchemy.orm import Session
 from src.database.database import get_db
 from src.database.services.services_cards import register_cancelable_event, register_cancelable_set
+from src.database.unit_of_work import commit_or_400
 from src.database.services.services_websockets import broadcast_last_cancelable_event, broadcast_last_cancelable_set, broadcast_game_information
+from src.webSocket.outbox import publish
+from src.database.services.services_http_cache import cached_read, game_etag
 
 log = APIRouter()
 
@@ -11,9 +14,10 @@ log = APIRouter()
 async def activate_cancelable_event(card_id: int, db: Session = Depends(get_db)):
 
     game_id = register_cancelable_event(card_id , db)
+    await commit_or_400(db, "Error creating cancelable event")
     if game_id:
-        await broadcast_last_cancelable_event(card_id) # Para el timer
-        await broadcast_game_information(game_id)
+        publish(broadcast_last_cancelable_event, card_id) # Para el timer
+        publish(broadcast_game_information, game_id)
     else: 
         raise HTTPException(status_code=404, detail="You can not play anymore")
     
@@ -22,14 +26,19 @@ async def activate_cancelable_event(card_id: int, db: Session = Depends(get_db))
 async def activate_cancelable_set(set_id: int, db: Session = Depends(get_db)):
 
     game_id = register_cancelable_set(set_id , db)
+    await commit_or_400(db, "Error creating cancelable event")
     if game_id:
-        await broadcast_last_cancelable_set(set_id) # Para el timer
-        await broadcast_game_information(game_id)
+        publish(broadcast_last_cancelable_set, set_id) # Para el timer
+        publish(broadcast_game_information, game_id)
     else: 
         raise HTTPException(status_code=404, detail="Error")
 
 @log.get("/logs/{game_id}", status_code=200, tags=["Logs"])
-def get_logs(game_id: int, db: Session = Depends(get_db)):
+def get_logs(game_id: int, request: Request, db: Session = Depends(get_db)):
+    return cached_read(request, game_etag(game_id), lambda: _format_logs(game_id, db))
+
+
+def _format_logs(game_id: int, db: Session):
     
     logs_data = db.query(Log, Player, Event, Set) \
         .join(Player, Log.player_id == Player.player_id) \
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.database.database import engine, get_db
+from src.database.models import Game
+from src.monitoring.metrics import registry, ACTIVE_SOCKETS, ACTIVE_GAMES, DB_POOL_CONNECTIONS
+from src.monitoring.loop_monitor import watchdog
+from src.webSocket.connection_manager import lobbyManager, gameManager
+
+metrics = APIRouter()
+
+
+def _collect_pool_state():
+    pool = engine.pool
+    # StaticPool/NullPool (tests, sqlite) no exponen estos contadores
+    if not hasattr(pool, "checkedout"):
+        return
+    DB_POOL_CONNECTIONS.replace({
+        ("size",): pool.size(),
+        ("checked_out",): pool.checkedout(),
+        ("overflow",): pool.overflow(),
+    })
+
+
+@metrics.get("/metrics", response_class=PlainTextResponse, tags=["Monitoring"])
+def get_metrics(db: Session = Depends(get_db)):
+    """
+    Expone las métricas internas en formato de texto de Prometheus.
+    Los gauges (sockets, partidas por estado, pool) se recalculan en cada scrape.
+    """
+    ACTIVE_SOCKETS.replace({
+        ("lobby",): len(lobbyManager.active_connections),
+        ("game",): gameManager.connection_count(),
+    })
+
+    games_by_status = db.query(Game.status, func.count(Game.game_id)).group_by(Game.status).all()
+    ACTIVE_GAMES.replace({(status,): amount for status, amount in games_by_status})
+
+    _collect_pool_state()
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@metrics.get("/debug/loop", tags=["Monitoring"])
+def get_loop_report():
+    """
+    Estado del watchdog del event loop: lag actual y máximo, los peores responsables
+    agrupados por ruta/broadcast, y los últimos bloqueos con su stack.
+    """
+    return watchdog.report()
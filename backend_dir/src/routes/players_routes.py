@@ -1,13 +1,18 @@
 import json
-from fastapi import APIRouter,Depends,HTTPException, Response  # te permite definir las rutas o subrutas por separado
+from fastapi import APIRouter,Depends,HTTPException, Request, Response  # te permite definir las rutas o subrutas por separado
 from sqlalchemy.orm import Session
-from src.database.services.services_websockets import  broadcast_game_information,broadcast_player_state
+from src.database.services.services_websockets import  broadcast_available_games, broadcast_game_information,broadcast_player_state
+from src.webSocket.outbox import publish
 from src.database.database import SessionLocal, get_db
 from src.database.models import Game, Player
-from src.schemas.players_schemas import Player_Base
-from src.schemas.chat_schemas import Chat_Base
+from src.schemas.players_schemas import Player_Base, Quick_Join_Request, Quick_Join_Response
+from src.schemas.chat_schemas import Chat_Base, Chat_Response
 from src.webSocket.connection_manager import gameManager
+from src.database.services.services_chat import chatManager
 from src.database.services.services_games import update_players_on_game
+from src.database.services.services_bulk import bulk_update, delete_players, value_by_id
+from src.database.services.services_http_cache import cached_read, game_etag
+from src.database.services.services_matchmaking import QUICK_JOINS, quick_join
 from sqlalchemy import desc, func
 
 player = APIRouter()  # ahora el player es lo mismo que hacer app
@@ -19,11 +24,13 @@ player = APIRouter()  # ahora el player es lo mismo que hacer app
 
 
 @player.get("/lobby/players/{game_id}", tags=["Players"])
-def list_players(game_id: int, db: Session = Depends(get_db)):
-    players = ( db.query(Player).filter(Player.game_id == game_id).all())  # .all() me devuelve una lista, si no hay nada devuelve lista vacia
-    if not players:
-        raise HTTPException(status_code=404, detail="game not found or no players in this game")
-    return players
+def list_players(game_id: int, request: Request, db: Session = Depends(get_db)):
+    def build():
+        players = ( db.query(Player).filter(Player.game_id == game_id).all())  # .all() me devuelve una lista, si no hay nada devuelve lista vacia
+        if not players:
+            raise HTTPException(status_code=404, detail="game not found or no players in this game")
+        return players
+    return cached_read(request, game_etag(game_id), build)
 
 
 @player.post("/players", status_code=201, tags=["Players"])
@@ -71,14 +78,33 @@ def create_player(player: Player_Base, db: Session = Depends(get_db)):
     return new_player
 
 
+@player.post("/players/quick_join", status_code=201, response_model=Quick_Join_Response, tags=["Players"])
+def quick_join_player(request: Quick_Join_Request, db: Session = Depends(get_db)):
+    """Ubica al jugador en la mejor partida abierta, o le crea una (services_matchmaking.py)."""
+    try:
+        new_player, game, created = quick_join(db, request.name, request.birth_date, request.avatar)
+        db.commit()
+        db.refresh(new_player)
+        db.refresh(game)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Error joining a game: {str(e)}")
+    QUICK_JOINS.inc(result="created" if created else "joined")
+    if created:
+        publish(broadcast_available_games)
+    return {"player": new_player, "game": game, "created": created}
+
+
 @player.delete("/players/{player_id}", status_code=204, tags=["Players"])
 def delete_player(player_id: int, db: Session = Depends(get_db)):
     player = db.get(Player, player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
     try:
-        db.delete(player)
+        # sus logs y trades se borran; sus cartas, secretos y sets quedan sin jugador
+        delete_players(db, [player_id])
         db.commit()
+        chatManager.forget_players(player_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error deleting player: {str(e)}")
@@ -97,7 +123,7 @@ async def select_player(player_id: int, db: Session = Depends(get_db)):
     player.pending_action = "REVEAL_SECRET" 
     try : 
         db.commit()
-        await broadcast_player_state(game_id)
+        publish(broadcast_player_state, game_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error selecting player: {str(e)}")
@@ -113,7 +139,7 @@ async def unselect_player(player_id: int, db: Session = Depends(get_db)):
     player.pending_action = None
     try : 
         db.commit()
-        await broadcast_player_state(game_id)
+        publish(broadcast_player_state, game_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error selecting player: {str(e)}")
@@ -141,6 +167,10 @@ async def vote_player(player_id_voting: int, player_id_voted: int, db: Session =
     game.amount_votes += 1
     if game.amount_votes == game.players_amount:
 
+        # Los cambios de este voto tienen que estar en la base antes de buscar al ganador
+        # y antes del UPDATE en bloque (si no, el flush del commit pisaría el reinicio)
+        db.flush()
+
         # Obtener el ganador de la votación
         winning_player = (
             db.query(Player)
@@ -152,25 +182,22 @@ async def vote_player(player_id_voting: int, player_id_voted: int, db: Session =
         # Reiniciar contador de votos en el juego
         game.amount_votes = 0
 
-        all_players = db.query(Player).filter(Player.game_id == game_id).all()
-
-        # Iterar sobre todos para limpiar VOTOS y PENDING_ACTION
-
-        for p in all_players:
-            # Limpiar votos de todos
-            p.votes_received = 0
-
-            if winning_player and p.player_id == winning_player.player_id:
-                p.pending_action = "REVEAL_SECRET"
-            elif p.player_id == game.current_turn and (
-                not winning_player or p.player_id != winning_player.player_id
-            ):
-                p.pending_action = "WAITING_REVEAL_SECRET"
-            else:
-                p.pending_action = "Clense"
+        # Limpiar VOTOS y PENDING_ACTION de todos en un solo UPDATE:
+        # el ganador revela, el jugador en turno espera la revelación y el resto sigue
+        pending_by_player = {}
+        if game.current_turn is not None:
+            pending_by_player[game.current_turn] = "WAITING_REVEAL_SECRET"
+        if winning_player:
+            pending_by_player[winning_player.player_id] = "REVEAL_SECRET"
+        bulk_update(
+            db, Player, game_id,
+            Player.game_id == game_id,
+            votes_received=0,
+            pending_action=value_by_id(Player.player_id, pending_by_player, "Clense"),
+        )
     try:
         db.commit()
-        await broadcast_game_information(game_id)
+        publish(broadcast_game_information, game_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error seleccionando jugador: {str(e)}")
@@ -179,23 +206,12 @@ async def vote_player(player_id_voting: int, player_id_voted: int, db: Session =
 
 @player.post("/send/chat/{game_id}, {player_id}",status_code= 204)
 async def send_message_chat(game_id :int, messageIn : Chat_Base, player_id : int, db : Session = Depends(get_db)) :
-    player = db.query(Player).filter(Player.player_id == player_id).first()
-    if not player : 
-        raise HTTPException(status_code=404, detail="Player  not found")
-    game = db.query(Game).filter(Game.game_id == game_id).first()
-    if not game : 
-        raise HTTPException(status_code=404, detail="Game  not found")
-    messageToBeSend = {
-        "sender_name" : player.name,
-        "message" : messageIn.message,
-        "sender_id" : player.player_id
-    }
-    try : 
-        await gameManager.broadcast (
-            json.dumps({"type" : "Chat", "data" : messageToBeSend}), game_id
-        )
-    except Exception as e:
-        # Manejar si el broadcast falla, aunque sea no persistente
-        print(f"Error al transmitir chat: {e}")
-        
-    return Response(status_code = 204)
\ No newline at end of file
+    # El chatManager cachea el nombre del jugador: sólo el primer mensaje de cada jugador consulta la base.
+    # El broadcast se hace agrupado (ventana corta) y la persistencia en lotes, fuera de esta request.
+    chatManager.post(game_id, player_id, messageIn.message, db)
+    return Response(status_code = 204)
+
+
+@player.get("/chat/{game_id}", status_code=200, response_model=list[Chat_Response], tags=["Players"])
+def get_chat_history(game_id: int, db: Session = Depends(get_db)):
+    return chatManager.history(game_id, db)
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException 
+from fastapi import APIRouter, Depends, HTTPException, Request
 # te permite definir las rutas o subrutas por separado
 from sqlalchemy.orm import Session
 from src.database.database import SessionLocal, get_db
 from src.database.models import Player, Secrets
 from src.database.services.services_websockets import broadcast_player_state, broadcast_game_information
+from src.webSocket.outbox import publish
+from src.database.unit_of_work import commit_or_400
 from src.schemas.secret_schemas import Secret_Response
+from src.database.services.services_http_cache import cached_read, game_etag
 from src.database.services.services_secrets import reveal_secret as reveal_secret_service,hide_secret as hide_secret_service,steal_secret as steal_secret_service
 
 
@@ -24,11 +27,13 @@ def list_secrets_of_player(player_id: int, db: Session = Depends(get_db)):
 
 
 @secret.get( "/lobby/secrets_game/{game_id}", tags=["Secrets"],response_model=list[Secret_Response])
-def list_secrets_of_game(game_id: int, db: Session = Depends(get_db)):
-    secrets = db.query(Secrets).filter(Secrets.game_id == game_id).all()
-    if not secrets:
-        raise HTTPException(status_code=404, detail="No secrets found for the given game_id")
-    return secrets
+def list_secrets_of_game(game_id: int, request: Request, db: Session = Depends(get_db)):
+    def build():
+        secrets = db.query(Secrets).filter(Secrets.game_id == game_id).all()
+        if not secrets:
+            raise HTTPException(status_code=404, detail="No secrets found for the given game_id")
+        return secrets
+    return cached_read(request, game_etag(game_id), build, list[Secret_Response])
 
 
 # 3 routes para revelar secreto
@@ -37,7 +42,8 @@ async def reveal_secret(secret_id: int, db: Session = Depends(get_db)):
     # 2. Llamar a la función de servicio con los parámetros recibidos
     # La función de servicio se encarga de toda la lógica y las excepciones.
     revealed = await reveal_secret_service(secret_id=secret_id, db=db)
-    await broadcast_game_information(revealed.game_id)
+    await commit_or_400(db, "Error revealing secret")
+    publish(broadcast_game_information, revealed.game_id)
     return revealed
 
 
@@ -47,7 +53,8 @@ async def hide_secret(secret_id: int, db: Session = Depends(get_db)):
     # 2. Llamar a la función de servicio con los parámetros recibidos
     # La función de servicio se encarga de toda la lógica y las excepciones.
     hidden = hide_secret_service(secret_id=secret_id, db=db)
-    await broadcast_game_information(hidden.game_id)
+    await commit_or_400(db, "Error hiding secret")
+    publish(broadcast_game_information, hidden.game_id)
     return hidden
 
 
@@ -59,5 +66,6 @@ async def steal_secret(
     # La función de servicio se encarga de toda la lógica y las excepciones.
     # se da el secret_id a robar y despues el jugador al que se lo doy
     stolen = steal_secret_service(target_player_id=target_player_id, secret_id=secret_id, db=db)
-    await broadcast_game_information(stolen.game_id)
+    await commit_or_400(db, "Error stealing secret")
+    publish(broadcast_game_information, stolen.game_id)
     return stolen
@@ -1,22 +1,37 @@
 import json
+from typing import Annotated, Optional
 from fastapi import Depends, HTTPException, WebSocket, APIRouter
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session 
-from src.schemas.games_schemas import Game_Response
+from src.schemas.games_schemas import Game_Response, Games_Query
 from src.schemas.players_schemas import Player_Base
 from src.database.models import Game, Player
-from src.database.database import get_db
+from src.database.database import SessionLocal
 from src.database.services.services_websockets import broadcast_available_games, broadcast_card_draft, broadcast_lobby_information, broadcast_game_information
 from src.webSocket.connection_manager import lobbyManager , gameManager
+from src.database.services.services_chat import chatManager
+from src.database.services.services_lobby import games_query, subscribe, unsubscribe
 
 ws = APIRouter()
 
+# Los websockets no usan Depends(get_db): esa sesión quedaría tomada (con su conexión del pool)
+# durante toda la vida del socket, bloqueado en receive_text(). Se abre una sesión corta sólo
+# para validar la partida y mandar el estado inicial, y se cierra antes de quedarse escuchando.
+
 @ws.websocket("/ws/games/availables", name="ws_available_games")
-async def ws_available_games(websocket: WebSocket, db: Session = Depends(get_db)):
+async def ws_available_games(websocket: WebSocket, params: Annotated[Optional[Games_Query], Depends(games_query)] = None):
     await lobbyManager.connect(websocket)
-    # Envía la lista actual de partidas tan pronto como el cliente se conecta
-    await broadcast_available_games(db)
+    if params is not None:
+        # con filtros (los mismos de GET /lobby/games) recibe su página en vez de la lista completa
+        subscribe(websocket, params)
     try:
+        # Envía la lista actual de partidas tan pronto como el cliente se conecta
+        db = SessionLocal()
+        try:
+            await broadcast_available_games(db)
+        finally:
+            db.close()
+
         while True:
             # Mantenemos la conexión abierta. 
             # El receive_text es solo para detectar cuando el cliente se desconecta.
@@ -27,19 +42,29 @@ async def ws_available_games(websocket: WebSocket, db: Session = Depends(get_db)
         # Opcional: podrías notificar a los demás si fuera necesario, 
         # pero para una lista de partidas no hace falta.
     finally : 
+        unsubscribe(websocket)
         lobbyManager.disconnect(websocket)
 
 @ws.websocket("/ws/lobby/{game_id}", name = "Players from lobby")
-async def ws_list_players(websocket : WebSocket,game_id : int ,db:Session = Depends(get_db)) : 
-    game = db.query(Game).filter(Game.game_id == game_id).first() # .all() me devuelve una lista, si no hay nada devuelve lista vacia
+async def ws_list_players(websocket : WebSocket,game_id : int) : 
+    db = SessionLocal()
+    try:
+        game = db.query(Game).filter(Game.game_id == game_id).first() # .all() me devuelve una lista, si no hay nada devuelve lista vacia
+        if game:
+            await gameManager.connect(websocket, game_id)
+            try:
+                await broadcast_lobby_information(db, game_id)
+            except Exception:
+                # sin el estado inicial se corta como si el cliente se hubiera ido
+                gameManager.disconnect(websocket, game_id)
+                return
+    finally:
+        db.close()
     if not game:
         await websocket.close(code=4004, reason="Game not found")
         return 
-    await gameManager.connect(websocket, game_id)
     
     try : 
-        await broadcast_lobby_information(db, game_id)
-        
         while True:
             # Mantenemos la conexión abierta para detectar cuando el cliente se va.
             await websocket.receive_text()
@@ -52,16 +77,24 @@ async def ws_list_players(websocket : WebSocket,game_id : int ,db:Session = Depe
         gameManager.disconnect(websocket, game_id)
       
 @ws.websocket("/ws/game/{game_id}", name = "Info from game")
-async def ws_info_from_game(websocket : WebSocket, game_id : int, db : Session =Depends(get_db)) :
-    game = db.query(Game).filter(Game.game_id == game_id).first() # .all() me devuelve una lista, si no hay nada devuelve lista vacia
+async def ws_info_from_game(websocket : WebSocket, game_id : int) :
+    db = SessionLocal()
+    try:
+        game = db.query(Game).filter(Game.game_id == game_id).first() # .all() me devuelve una lista, si no hay nada devuelve lista vacia
+        # El historial del chat va sólo a quien se conecta (por si viene de una reconexión)
+        chatHistory = chatManager.history(game_id, db) if game else None
+    finally:
+        db.close()
     if not game:
         await websocket.close(code=4004, reason="Game not found")
         return 
     await gameManager.connect(websocket, game_id)
     
     try : 
+        # los broadcasts abren y cierran su propia sesión
         await broadcast_game_information(game_id)
         await broadcast_card_draft(game_id)
+        await websocket.send_text(json.dumps({"type": "ChatHistory", "data": chatHistory}))
         
         while True:
             # Mantenemos la conexión abierta para detectar cuando el cliente se va.
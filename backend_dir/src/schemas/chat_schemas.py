@@ -2,4 +2,11 @@ from pydantic import BaseModel, ConfigDict
 from typing import Optional 
 
 class Chat_Base (BaseModel) : 
-    message : str
\ No newline at end of file
+    message : str
+
+
+class Chat_Response (BaseModel) :
+    sender_name : str
+    message : str
+    sender_id : Optional[int] = None
+    created_at : str
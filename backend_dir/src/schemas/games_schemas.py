@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Literal, Optional
 
 
 class Game_Base(BaseModel):
@@ -20,7 +20,7 @@ class Log_Response(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
-class Game_Response(BaseModel):
+class Game_Summary(BaseModel):
     game_id: Optional[int] = None
     max_players: int
     min_players: int
@@ -31,6 +31,9 @@ class Game_Response(BaseModel):
     cards_left: Optional[int] = None
     direction_folly: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
+
+
+class Game_Response(Game_Summary):
     log: list[Log_Response] = []
 
 
@@ -39,3 +42,33 @@ class Game_Initialized(BaseModel):
     status: str
     name: str
     players_amount: int
+
+
+class Archived_Game(BaseModel):
+    game_id: int
+    name: str
+    players_amount: int
+    players: list[dict]
+    log_entries: int
+    finished_at: Optional[datetime] = None
+    archived_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Archived_Page(BaseModel):
+    games: list[Archived_Game]
+    next_cursor: Optional[str] = None
+
+
+class Games_Query(BaseModel):
+    status: Optional[list[str]] = None
+    min_free_seats: Optional[int] = Field(None, ge=1)
+    name_prefix: Optional[str] = None
+    sort: Literal["created", "fill"] = "created"  # más nuevas primero / menos lugares libres primero
+    limit: Optional[int] = Field(20, ge=1, le=100)  # None sólo desde el código: sin límite
+    cursor: Optional[str] = None
+
+
+class Games_Page(BaseModel):
+    games: list[Game_Summary]  # sin el log: no se carga por cada partida
+    next_cursor: Optional[str] = None
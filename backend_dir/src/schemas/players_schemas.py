@@ -4,6 +4,7 @@ import datetime
 from src.schemas.set_schemas import Set_Base, Set_Response
 from src.schemas.card_schemas import AllCardsResponse
 from src.schemas.secret_schemas import Secret_Response
+from src.schemas.games_schemas import Game_Summary
 
 
 class Player_Base(BaseModel):
@@ -24,3 +25,15 @@ class Player_State(Player_Base):
     sets: list[Set_Response]
     social_disgrace: bool
     votes_received: int
+
+
+class Quick_Join_Request(BaseModel):
+    name: str
+    birth_date: datetime.date
+    avatar: Optional[str] = None
+
+
+class Quick_Join_Response(BaseModel):
+    player: Player_Base
+    game: Game_Summary
+    created: bool  # True si no había lugar y se creó una partida nueva
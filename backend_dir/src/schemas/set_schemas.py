@@ -16,4 +16,6 @@ class Set_Response(Set_Base) :
     detective : list [Detective_Response]
     model_config = ConfigDict(from_attributes= True)
 
-    
\ No newline at end of file
+class Legal_Set(BaseModel) :
+    name : str
+    card_ids : list [int]
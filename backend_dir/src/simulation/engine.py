@@ -0,0 +1,409 @@
+"""
+Motor de reglas en memoria, sin HTTP ni base de datos.
+
+Juega partidas completas con las mismas reglas que los servicios (reparto de
+services_cards y services_secrets, sets de services_set_rules, efectos de
+services_events) sobre listas y diccionarios, con agentes que eligen al azar.
+Sirve para medir cuántas partidas por segundo soporta la lógica del juego y para
+ver qué caminos de las reglas se recorren (`paths`).
+
+Todas las decisiones salen del `random.Random` de la partida: la misma semilla
+juega siempre la misma partida.
+"""
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional
+from src.database.card_catalog import CATALOG, definitions
+from src.database.services.services_set_rules import SIBLINGS, WILDCARD, WILDCARD_SETS, can_add_to_set, legal_sets, resolve_set
+
+HAND_SIZE = 6
+DRAFT_SIZE = 3
+MAX_TURNS = 500  # corta partidas que no terminan (agentes que nunca avanzan)
+
+NSF = "Not so fast"
+# eventos que el agente no juega en su turno
+NOT_PLAYABLE = {NSF, "Social Faux Pas", "Blackmailed"}
+
+
+class SimCard(NamedTuple):
+    card_id: int
+    type: str
+    name: str
+    quantity_set: Optional[int]
+
+
+@dataclass
+class SimSecret:
+    secret_id: int
+    owner: int
+    murderer: bool = False
+    acomplice: bool = False
+    revelated: bool = False
+
+
+@dataclass
+class SimSet:
+    set_id: int
+    name: str
+    owner: int
+    cards: List[SimCard]
+
+
+@dataclass
+class SimGame:
+    players: List[int]
+    deck: List[SimCard]  # el último es el próximo en salir
+    rng: random.Random
+    draft: List[SimCard] = field(default_factory=list)
+    discard: List[SimCard] = field(default_factory=list)  # el último es el de arriba
+    hands: Dict[int, List[SimCard]] = field(default_factory=dict)
+    secrets: List[SimSecret] = field(default_factory=list)
+    sets: List[SimSet] = field(default_factory=list)
+    social_disgrace: Dict[int, bool] = field(default_factory=dict)
+    turn: int = 0
+    finished: Optional[str] = None  # motivo del final
+    paths: Counter = field(default_factory=Counter)
+
+    @property
+    def current(self) -> int:
+        return self.players[self.turn % len(self.players)]
+
+    def murderer(self) -> int:
+        return next(s.owner for s in self.secrets if s.murderer)
+
+    def secrets_of(self, player_id: int, revelated: Optional[bool] = None) -> List[SimSecret]:
+        return [s for s in self.secrets if s.owner == player_id and (revelated is None or s.revelated == revelated)]
+
+    def others(self, player_id: int) -> List[int]:
+        return [p for p in self.players if p != player_id]
+
+    def finish(self, reason: str):
+        if not self.finished:
+            self.finished = reason
+            self.paths[f"end:{reason}"] += 1
+
+
+def new_game(players: int, seed: Optional[int] = None) -> SimGame:
+    """Arma y reparte una partida como initialize_game."""
+    rng = random.Random(seed)
+    cards = [
+        SimCard(card_id, d.type, d.name, d.quantity_set)
+        for card_id, d in enumerate((d for d in CATALOG for _ in range(d.quantity)), start=1)
+    ]
+    player_ids = list(range(1, players + 1))
+    game = SimGame(players=player_ids, deck=[], rng=rng)
+
+    # un NSF y 5 cartas al azar para cada jugador (deal_NSF + deal_cards_to_players)
+    nsf = [c for c in cards if c.name == NSF]
+    rng.shuffle(nsf)
+    for player_id in player_ids:
+        game.hands[player_id] = [nsf.pop()]
+    dealt = {hand[0].card_id for hand in game.hands.values()}
+    deck = [c for c in cards if c.card_id not in dealt]
+    rng.shuffle(deck)
+    for player_id in player_ids:
+        game.hands[player_id] += [deck.pop() for _ in range(HAND_SIZE - 1)]
+    game.draft = [deck.pop() for _ in range(DRAFT_SIZE)]
+    game.deck = deck
+
+    _deal_secrets(game)
+    game.social_disgrace = {p: False for p in player_ids}
+    return game
+
+
+def _deal_secrets(game: SimGame):
+    """Como init_secrets + deal_secrets_to_players: el asesino y el cómplice en manos distintas, en una pasada."""
+    rng = game.rng
+    slots = [p for p in game.players for _ in range(3)]
+    murderer = slots.pop(rng.randrange(len(slots)))
+    game.secrets = [SimSecret(1, murderer, murderer=True)]
+    if len(game.players) > 4:
+        others = [i for i, p in enumerate(slots) if p != murderer]
+        game.secrets.append(SimSecret(2, slots.pop(rng.choice(others)), acomplice=True))
+    rng.shuffle(slots)
+    game.secrets += [SimSecret(len(game.secrets) + i + 1, owner) for i, owner in enumerate(slots)]
+
+
+# --- Secretos ---
+
+def _update_social_disgrace(game: SimGame, player_id: int):
+    """Misma regla que update_social_disgrace."""
+    secrets = game.secrets_of(player_id)
+    if game.social_disgrace[player_id] and not secrets:
+        return
+    game.social_disgrace[player_id] = any(s.revelated and s.acomplice for s in secrets) or (
+        bool(secrets) and all(s.revelated for s in secrets)
+    )
+
+
+def _check_social_disgrace_win(game: SimGame):
+    others = game.others(game.murderer())
+    if others and all(game.social_disgrace[p] for p in others):
+        game.finish("social_disgrace")
+
+
+def reveal_secret(game: SimGame, player_id: int) -> Optional[SimSecret]:
+    hidden = game.secrets_of(player_id, revelated=False)
+    if not hidden:
+        game.paths["secret:nothing_to_reveal"] += 1
+        return None
+    secret = game.rng.choice(hidden)
+    secret.revelated = True
+    game.paths["secret:reveal"] += 1
+    _update_social_disgrace(game, player_id)
+    if secret.murderer:
+        game.finish("murderer_revealed")
+    _check_social_disgrace_win(game)
+    return secret
+
+
+def hide_secret(game: SimGame, player_id: int):
+    revealed = game.secrets_of(player_id, revelated=True)
+    if not revealed:
+        game.paths["secret:nothing_to_hide"] += 1
+        return
+    game.rng.choice(revealed).revelated = False
+    game.paths["secret:hide"] += 1
+    _update_social_disgrace(game, player_id)
+
+
+def steal_secret(game: SimGame, to_player: int, from_player: int):
+    """El secreto se revela y pasa boca abajo a otro jugador (steal_secret)."""
+    secret = reveal_secret(game, from_player)
+    if secret is None or game.finished:
+        return
+    secret.owner = to_player
+    secret.revelated = False
+    game.paths["secret:steal"] += 1
+    _update_social_disgrace(game, from_player)
+    _update_social_disgrace(game, to_player)
+
+
+# --- Cartas ---
+
+def _draw(game: SimGame) -> Optional[SimCard]:
+    if not game.deck:
+        return None
+    return game.deck.pop()
+
+
+def refill_hand(game: SimGame, player_id: int):
+    """Levanta hasta 6 cartas, del draft o del mazo; el draft se repone del mazo."""
+    hand = game.hands[player_id]
+    while len(hand) < HAND_SIZE:
+        if game.draft and game.rng.random() < 0.5:
+            hand.append(game.draft.pop(game.rng.randrange(len(game.draft))))
+            game.paths["draw:draft"] += 1
+            card = _draw(game)
+            if card:
+                game.draft.append(card)
+        else:
+            card = _draw(game)
+            if card is None:
+                break
+            hand.append(card)
+            game.paths["draw:deck"] += 1
+        if not game.deck:
+            game.finish("deck_empty")
+            return
+
+
+def discard(game: SimGame, player_id: int, card: SimCard):
+    game.hands[player_id].remove(card)
+    game.discard.append(card)
+
+
+def _cancelled(game: SimGame, player_id: int) -> bool:
+    """Los demás pueden contestar con Not so fast, y esos NSF también se pueden cancelar."""
+    cancelled = False
+    responder = player_id
+    while True:
+        holders = [p for p in game.others(responder) if any(c.name == NSF for c in game.hands[p])]
+        if not holders or game.rng.random() >= 0.3:
+            return cancelled
+        responder = game.rng.choice(holders)
+        discard(game, responder, next(c for c in game.hands[responder] if c.name == NSF))
+        game.paths["nsf:played"] += 1
+        cancelled = not cancelled
+
+
+# --- Sets ---
+
+def _set_effect(game: SimGame, new_set: SimSet):
+    player_id = new_set.owner
+    target = game.rng.choice(game.others(player_id))
+    name = new_set.name
+    if name == "Parker Pyne":
+        hide_secret(game, game.rng.choice(game.players))
+    elif name == "Mr Satterthwaite + Harley Quin":
+        steal_secret(game, player_id, target)
+    elif name == "Lady Eileen 'Bundle' Brent":
+        # el jugador elegido puede devolver un NSF en vez de revelar
+        if any(c.name == NSF for c in game.hands[target]) and game.rng.random() < 0.5:
+            nsf = next(c for c in game.hands[target] if c.name == NSF)
+            game.hands[target].remove(nsf)
+            game.hands[player_id].append(nsf)
+            game.paths["set:brent_nsf"] += 1
+        else:
+            reveal_secret(game, target)
+    else:
+        reveal_secret(game, target)
+
+
+def play_set(game: SimGame, player_id: int) -> bool:
+    options = legal_sets([c for c in game.hands[player_id] if c.type == "detective"])
+    if not options:
+        return False
+    option = game.rng.choice(options)
+    cards = [c for c in game.hands[player_id] if c.card_id in option["card_ids"]]
+    rule = resolve_set((c.name, c.quantity_set) for c in cards)
+    for card in cards:
+        game.hands[player_id].remove(card)
+    new_set = SimSet(len(game.sets) + 1, rule.name, player_id, cards)
+    game.sets.append(new_set)
+    game.paths[f"set:{rule.name}"] += 1
+    if any(c.name == WILDCARD for c in cards):
+        game.paths["set:with_wildcard"] += 1
+    if _cancelled(game, player_id):
+        game.paths["set:cancelled"] += 1
+    else:
+        _set_effect(game, new_set)
+    return True
+
+
+def add_detective(game: SimGame, player_id: int) -> bool:
+    for card in game.hands[player_id]:
+        if card.type != "detective":
+            continue
+        for target_set in game.sets:
+            if target_set.owner != player_id and card.name != "Adriane Oliver":
+                continue
+            if can_add_to_set(card.name, target_set.name):
+                game.hands[player_id].remove(card)
+                target_set.cards.append(card)
+                game.paths["set:add_detective"] += 1
+                if not _cancelled(game, player_id):
+                    _set_effect(game, target_set)
+                return True
+    return False
+
+
+# --- Eventos ---
+
+def _event_effect(game: SimGame, player_id: int, name: str):
+    rng = game.rng
+    target = rng.choice(game.others(player_id))
+    if name == "Cards off the table":
+        for card in [c for c in game.hands[target] if c.name == NSF]:
+            discard(game, target, card)
+    elif name == "Look into the ashes":
+        top = game.discard[-5:]
+        if top:
+            card = rng.choice(top)
+            game.discard.remove(card)
+            game.hands[player_id].append(card)
+    elif name == "And then there was one more...":
+        revealed = [s for s in game.secrets if s.revelated]
+        if revealed:
+            secret = rng.choice(revealed)
+            previous = secret.owner
+            secret.owner, secret.revelated = rng.choice(game.players), False
+            _update_social_disgrace(game, previous)
+            _update_social_disgrace(game, secret.owner)
+    elif name == "Delay the murderer's escape!":
+        # hasta 5 cartas del descarte vuelven arriba del mazo
+        for _ in range(min(5, len(game.discard))):
+            game.deck.append(game.discard.pop())
+    elif name == "Early train to paddington":
+        if len(game.deck) < 6:
+            game.finish("deck_empty")
+        else:
+            for _ in range(6):
+                game.discard.append(game.deck.pop())
+    elif name == "Point your suspicions":
+        votes = Counter(rng.choice(game.others(p)) for p in game.players)
+        reveal_secret(game, votes.most_common(1)[0][0])
+    elif name in ("Card trade", "Dead card folly"):
+        pairs = [(player_id, target)] if name == "Card trade" else list(zip(game.players, game.players[1:] + game.players[:1]))
+        given = {p: rng.choice(game.hands[p]) for p, _ in pairs if game.hands[p]}
+        for giver, receiver in pairs:
+            if giver in given:
+                game.hands[giver].remove(given[giver])
+                game.hands[receiver].append(given[giver])
+                # las cartas "devious" actúan al recibirse
+                if given[giver].name == "Social Faux Pas":
+                    reveal_secret(game, receiver)
+                    game.paths["event:Social Faux Pas"] += 1
+                elif given[giver].name == "Blackmailed":
+                    game.paths["event:Blackmailed"] += 1
+    elif name == "Another Victim":
+        victims = [s for s in game.sets if s.owner != player_id]
+        if victims:
+            stolen = rng.choice(victims)
+            stolen.owner = player_id
+            _set_effect(game, stolen)
+
+
+def play_event(game: SimGame, player_id: int) -> bool:
+    playable = [c for c in game.hands[player_id] if c.type == "event" and c.name not in NOT_PLAYABLE]
+    if not playable:
+        return False
+    card = game.rng.choice(playable)
+    discard(game, player_id, card)
+    game.paths[f"event:{card.name}"] += 1
+    if _cancelled(game, player_id):
+        game.paths["event:cancelled"] += 1
+    else:
+        _event_effect(game, player_id, card.name)
+    return True
+
+
+def rule_paths() -> List[str]:
+    """Todos los caminos de las reglas que puede registrar una partida, para medir cobertura."""
+    set_names = [d.name for d in definitions("detective") if d.name != WILDCARD]
+    set_names += list(SIBLINGS.values()) + list(WILDCARD_SETS.values())
+    return (
+        [f"set:{name}" for name in set_names]
+        + [f"event:{d.name}" for d in definitions("event") if d.name != NSF]
+        + ["set:with_wildcard", "set:add_detective", "set:brent_nsf", "set:cancelled", "event:cancelled", "nsf:played",
+           "secret:reveal", "secret:hide", "secret:steal", "secret:nothing_to_reveal", "secret:nothing_to_hide",
+           "draw:draft", "draw:deck", "turn:social_disgrace",
+           "end:murderer_revealed", "end:social_disgrace", "end:deck_empty"]
+    )
+
+
+# --- Turnos ---
+
+def play_turn(game: SimGame):
+    player_id = game.current
+    rng = game.rng
+    acted = False
+    if game.social_disgrace[player_id]:
+        game.paths["turn:social_disgrace"] += 1
+    else:
+        if rng.random() < 0.6:
+            acted = play_set(game, player_id)
+        if not game.finished and rng.random() < 0.3:
+            acted = add_detective(game, player_id) or acted
+        if not game.finished and rng.random() < 0.5:
+            acted = play_event(game, player_id) or acted
+    if game.finished:
+        return
+
+    # si no hizo nada tiene que descartar al menos una carta
+    hand = game.hands[player_id]
+    to_discard = rng.randint(0 if acted else 1, min(3, len(hand))) if hand else 0
+    for card in rng.sample(hand, to_discard):
+        discard(game, player_id, card)
+    refill_hand(game, player_id)
+    game.turn += 1
+    if game.turn >= MAX_TURNS:
+        game.finish("turn_limit")
+
+
+def play_game(players: int, seed: Optional[int] = None) -> SimGame:
+    game = new_game(players, seed)
+    while not game.finished:
+        play_turn(game)
+    return game
@@ -0,0 +1,185 @@
+"""
+Replay de partidas grabadas en el journal (database/journal.py).
+
+Cada acción grabada se vuelve a ejecutar como request HTTP contra la app real
+(rutas, servicios, ORM) sobre una base SQLite en memoria, en el mismo orden. Con la
+semilla de la partida (game_rng.py) el resultado tiene que ser el mismo: al final
+(o después de cada acción) se compara el estado de la base con el que quedó grabado
+y se reportan las diferencias, junto con cuánto tardó cada acción por ruta.
+
+Para que los ids coincidan con los grabados, las filas nuevas de cada acción reciben
+los mismos ids que tuvieron en la partida original (y la partida su semilla). Los
+registros que no vienen de una request (scripts, tareas de fondo) no se ejecutan:
+se copian tal cual a la base.
+
+Durante el replay no sale ningún broadcast y no se escribe el journal.
+"""
+import statistics
+import time
+from collections import defaultdict
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, Optional
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.database import journal as journal_module
+from src.database.database import Base, get_db
+from src.database.journal import TABLES, GameJournal, apply_record, diff_states, dump_state, restore_state
+from src.webSocket.outbox import muted
+
+# columnas que pone la base o el reloj: no se comparan
+IGNORED_COLUMNS = {("card_log", "created_at"), ("games", "created_at"), ("games", "finished_at"), ("active_trades", "created_at")}
+MAX_DIFFS = 50
+
+_PK = {t.name: t.primary_key.columns.values()[0].name for t in TABLES}
+
+
+def _group_by_request(records: List[dict]) -> List[List[dict]]:
+    """Registros consecutivos de una misma request van juntos: se ejecuta una vez."""
+    groups: List[List[dict]] = []
+    for record in records:
+        request = record.get("request")
+        if request and groups and groups[-1][0].get("request") == request:
+            groups[-1].append(record)
+        else:
+            groups.append([record])
+    return groups
+
+
+class _ReplayDatabase:
+    """Base en memoria donde las filas nuevas toman los ids grabados."""
+
+    def __init__(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.new_rows: Dict[str, List[dict]] = {}
+        event.listen(self.Session, "before_flush", self._use_recorded_ids)
+
+    def _use_recorded_ids(self, session, flush_context, instances):
+        new = sorted(
+            (obj for obj in session.new if getattr(obj, "__tablename__", None) in self.new_rows),
+            key=lambda obj: inspect(obj).insert_order,
+        )
+        for obj in new:
+            rows = self.new_rows[obj.__tablename__]
+            mapper = inspect(obj).mapper
+            key = mapper.get_property_by_column(mapper.primary_key[0]).key
+            if getattr(obj, key) is not None or not rows:
+                continue
+            row = rows.pop(0)
+            setattr(obj, key, row[_PK[obj.__tablename__]])
+            if obj.__tablename__ == "games" and row.get("seed") is not None:
+                obj.seed = row["seed"]
+
+    def get_db(self):
+        db = self.Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def replay_game(journal_dir: str, game_id: int, check_every_action: bool = False) -> dict:
+    """Vuelve a jugar una partida del journal y devuelve latencias por ruta y diferencias de estado."""
+    from src.main import app
+
+    records = GameJournal(journal_dir).records(game_id)
+    database = _ReplayDatabase()
+    expected: Dict[str, Dict] = {}
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    failed: List[dict] = []
+    diffs: List[dict] = []
+
+    previous_journal = journal_module.journal
+    previous_get_db = app.dependency_overrides.get(get_db)
+    journal_module.journal = GameJournal(None)
+    app.dependency_overrides[get_db] = database.get_db
+    client = TestClient(app, raise_server_exceptions=False)
+    start = time.perf_counter()
+    try:
+        with muted():
+            for group in _group_by_request(records):
+                # filas que crea la acción, en el orden en que la base les dio id
+                database.new_rows = defaultdict(list)
+                for record in group:
+                    for table_name, rows in record.get("rows", {}).items():
+                        known = expected.get(table_name, {})
+                        # una fila puede venir dos veces (UPDATE en bloque): una sola por pk
+                        created = {row[_PK[table_name]]: row for row in rows if str(row[_PK[table_name]]) not in known}
+                        database.new_rows[table_name] += [created[pk] for pk in sorted(created)]
+                    apply_record(expected, record)
+
+                action = group[0].get("action")
+                if action is None:
+                    db = database.Session()
+                    restore_state(game_id, expected, db)
+                    db.commit()
+                    db.close()
+                else:
+                    url = action["route"].format(**action["params"])
+                    action_start = time.perf_counter()
+                    response = client.request(action["method"], url, json=action["body"])
+                    latencies[action["route"]].append((time.perf_counter() - action_start) * 1000)
+                    if response.status_code >= 400:
+                        failed.append({"seq": group[0]["seq"], "route": action["route"], "status": response.status_code})
+
+                if check_every_action and not diffs:
+                    db = database.Session()
+                    diffs = [dict(d, seq=group[-1]["seq"]) for d in diff_states(expected, dump_state(game_id, db), IGNORED_COLUMNS)]
+                    db.close()
+    finally:
+        elapsed = time.perf_counter() - start
+        if previous_get_db is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous_get_db
+        journal_module.journal = previous_journal
+
+    if not check_every_action:
+        db = database.Session()
+        diffs = diff_states(expected, dump_state(game_id, db), IGNORED_COLUMNS)
+        db.close()
+    return {
+        "game_id": game_id,
+        "actions": sum(1 for group in _group_by_request(records) if group[0].get("action")),
+        "seconds": elapsed,
+        "latencies": dict(latencies),
+        "failed": failed,
+        "diffs": diffs[:MAX_DIFFS],
+        "consistent": not diffs and not failed,
+    }
+
+
+def _replay_args(args) -> dict:
+    return replay_game(*args)
+
+
+def replay_games(journal_dir: str, game_ids: Iterable[int], processes: Optional[int] = None,
+                 check_every_action: bool = False) -> List[dict]:
+    """Una partida por tarea, repartidas entre procesos (processes=1 las juega en este proceso)."""
+    tasks = [(journal_dir, game_id, check_every_action) for game_id in game_ids]
+    if processes == 1:
+        return [_replay_args(task) for task in tasks]
+    with Pool(processes) as pool:
+        return pool.map(_replay_args, tasks)
+
+
+def latency_profile(results: List[dict]) -> Dict[str, dict]:
+    """Milisegundos por acción, por ruta, sumando todas las partidas."""
+    by_route: Dict[str, List[float]] = defaultdict(list)
+    for result in results:
+        for route, values in result["latencies"].items():
+            by_route[route] += values
+    profile = {}
+    for route, values in sorted(by_route.items()):
+        values.sort()
+        profile[route] = {
+            "count": len(values),
+            "mean": statistics.fmean(values),
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1],
+        }
+    return profile
@@ -1,12 +1,19 @@
+import os
 import pytest
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# Los tests no escriben el journal de partidas; test_journal lo activa en un directorio temporal
+os.environ["GAME_JOURNAL_DIR"] = ""
+
 # Importa tu aplicación de FastAPI y la configuración de la base de datos
 from src.main import app
 from src.database.database import Base, get_db
+from src.database.services import services_game_view as game_view_cache
+from src.database.services.services_http_cache import clear_http_cache
 
 # --- CONFIGURACIÓN DE LA BASE DE DATOS DE PRUEBA ---
 # Usamos una base de datos SQLite en memoria. Es la forma más rápida y limpia
@@ -85,4 +92,37 @@ def client(db_session):
     yield TestClient(app)
 
     # Limpia la sobrescritura después de que el test haya terminado
-    del app.dependency_overrides[get_db]
\ No newline at end of file
+    del app.dependency_overrides[get_db]
+
+
+@pytest.fixture
+def create_game(client):
+    """
+    Arma una partida por la API, como un cliente: POST /games, un POST /players por jugador
+    (el primero es el host) y, con `start`, /game/beginning. Sin los broadcasts del lobby.
+    Devuelve el game_id.
+    """
+    def create(name="Partida", players=("Ana", "Beto"), start=True):
+        with patch("src.routes.games_routes.broadcast_available_games", new_callable=AsyncMock), \
+             patch("src.routes.games_routes.broadcast_game_information", new_callable=AsyncMock):
+            game = {"name": name, "max_players": 4, "min_players": 2, "status": "waiting players"}
+            game_id = client.post("/games", json=game).json()["game_id"]
+            for player in players:
+                response = client.post("/players", json={"name": player, "host": player == players[0], "game_id": game_id, "birth_date": "2000-01-01"})
+                assert response.status_code == 201
+            if start:
+                assert client.post(f"/game/beginning/{game_id}").status_code == 202
+        return game_id
+    return create
+
+@pytest.fixture(autouse=True)
+def clear_game_views():
+    """
+    Las vistas de partida (y las lecturas HTTP cacheadas) se memoizan por (game_id, versión)
+    a nivel de proceso; los tests con sesiones mockeadas no commitean, así que se vacían entre tests.
+    """
+    game_view_cache.clear_game_views()
+    clear_http_cache()
+    yield
+    game_view_cache.clear_game_views()
+    clear_http_cache()
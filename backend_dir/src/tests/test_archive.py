@@ -0,0 +1,105 @@
+import datetime
+import pytest
+from sqlalchemy import func, select
+from src.database import game_snapshot
+from src.database.game_snapshot import write_snapshot
+from src.database.models import ArchivedGame, ChatMessage, Game, Log, Player
+from src.database.services.services_archive import archive_finished_games, load_archive
+from src.database.services.services_bulk import GAME_TABLES
+from src.database.services.services_games import finish_game
+
+
+@pytest.fixture
+def games(create_game, db_session):
+    finished, recent, playing = (create_game(name) for name in ("Vieja", "Reciente", "En curso"))
+    ana = db_session.query(Player).filter(Player.game_id == finished, Player.name == "Ana").one()
+    db_session.add(Log(game_id=finished, player_id=ana.player_id, type="TurnChange"))
+    db_session.add(ChatMessage(game_id=finished, player_id=ana.player_id, sender_name="Ana", message="gg", created_at=datetime.datetime(2025, 1, 1)))
+    now = datetime.datetime.now()
+    for game_id, finished_at in ((finished, now - datetime.timedelta(hours=1)), (recent, now)):
+        game = db_session.get(Game, game_id)
+        game.status, game.finished_at = "finished", finished_at
+    db_session.commit()
+    return finished, recent, playing
+
+
+def _live_rows(db_session, game_id):
+    return {table.name: db_session.execute(select(func.count()).select_from(table).where(table.c.game_id == game_id)).scalar()
+            for table in GAME_TABLES}
+
+
+def test_finished_games_move_to_the_archive(games, db_session):
+    finished, recent, playing = games
+
+    assert archive_finished_games(db_session) == [finished]
+
+    assert set(_live_rows(db_session, finished).values()) == {0}
+    assert _live_rows(db_session, recent)["cards"] == 61
+    assert _live_rows(db_session, playing)["cards"] == 61
+
+    archive = load_archive(finished, db_session)
+    assert archive["name"] == "Vieja"
+    assert {p["name"] for p in archive["players"]} == {"Ana", "Beto"}
+    assert len(archive["state"]["cards"]) == 61
+    assert archive["state"]["games"][str(finished)]["status"] == "finished"
+    assert [m["message"] for m in archive["chat"]] == ["gg"]
+    assert db_session.get(ArchivedGame, finished).log_entries == 1
+
+
+def test_archive_ignores_a_stale_snapshot(games, db_session, monkeypatch):
+    finished = games[0]
+    # foto de cuando la partida seguía en curso, y el proceso que la marcó como vieja se reinició
+    game = db_session.get(Game, finished)
+    game.status = "in course"
+    db_session.flush()
+    write_snapshot(finished, db_session)
+    game.status = "finished"
+    db_session.commit()
+    monkeypatch.setattr(game_snapshot, "_dirty", set())
+
+    archive_finished_games(db_session)
+
+    assert load_archive(finished, db_session)["state"]["games"][str(finished)]["status"] == "finished"
+
+
+def test_archive_is_queryable(games, db_session, client):
+    finished = games[0]
+    archive_finished_games(db_session)
+
+    listed = client.get("/archive/games").json()
+    assert listed["next_cursor"] is None
+    assert [(g["game_id"], g["players_amount"], g["log_entries"]) for g in listed["games"]] == [(finished, 2, 1)]
+    assert client.get(f"/archive/games/{finished}").json()["state"]["games"][str(finished)]["name"] == "Vieja"
+    assert client.get(f"/archive/games/{games[1]}").status_code == 404
+    assert finished not in {g["game_id"] for g in client.get("/games").json()}
+
+
+@pytest.mark.asyncio
+async def test_finish_game_starts_the_archive_clock(games, db_session):
+    playing = games[2]
+    await finish_game(playing, db_session)
+
+    assert db_session.get(Game, playing).finished_at is not None
+
+
+def test_archive_listing_is_paged(client, db_session):
+    archived_at = datetime.datetime(2025, 1, 1)
+    # dos por lote con el mismo archived_at: el desempate es game_id
+    db_session.add_all([
+        ArchivedGame(game_id=game_id, name=f"Archivada {game_id}", players_amount=2, players=[], log_entries=0,
+                     archived_at=archived_at + datetime.timedelta(minutes=game_id // 2), format=1, state=b"")
+        for game_id in range(1001, 1008)
+    ])
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = client.get("/archive/games", params={"limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+        assert len(page["games"]) <= 3
+        seen += [g["game_id"] for g in page["games"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(range(1001, 1008), key=lambda game_id: (game_id // 2, game_id), reverse=True)
+    assert client.get("/archive/games", params={"cursor": "basura"}).status_code == 400
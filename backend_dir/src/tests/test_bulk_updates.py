@@ -0,0 +1,201 @@
+"""
+Las transiciones que cambian muchas filas (votación, descartes, eventos) tienen que
+emitir la misma cantidad de statements sin importar cuántos jugadores o cartas toquen.
+"""
+import datetime
+import pytest
+from contextlib import contextmanager
+from unittest.mock import patch, AsyncMock
+from sqlalchemy import event
+from src.database.models import ActiveTrade, Game, Player, Event, Detective, Card, Log
+from src.database.services.services_events import point_your_suspicion, cards_off_table
+
+
+@contextmanager
+def count_statements(db_session):
+    """
+    Cuenta los statements que llegan a la base. Un executemany cuenta una vez por fila,
+    como lo ejecuta pymysql para los UPDATE.
+    """
+    counter = {"statements": 0}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += len(parameters) if executemany else 1
+
+    engine = db_session.get_bind().engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+
+def _game_with_players(db_session, amount, **game_fields):
+    game = Game(name="Bulk", status="in course", max_players=6, min_players=2, players_amount=amount, **game_fields)
+    db_session.add(game)
+    db_session.flush()
+    players = [
+        Player(name=f"P{i}", host=(i == 0), game_id=game.game_id, birth_date=datetime.date(2000, 1, 1), turn_order=i + 1)
+        for i in range(amount)
+    ]
+    db_session.add_all(players)
+    db_session.commit()
+    return game, players
+
+
+@pytest.mark.parametrize("amount", [2, 6])
+def test_point_your_suspicion_is_one_update(db_session, amount):
+    game, players = _game_with_players(db_session, amount)
+    game_id = game.game_id
+
+    with count_statements(db_session) as counter:
+        point_your_suspicion(game_id, db_session)
+
+    # buscar la partida + UPDATE de todos los jugadores
+    assert counter["statements"] == 2
+    assert {p.pending_action for p in db_session.query(Player).filter(Player.game_id == game_id)} == {"VOTE"}
+
+
+def test_point_your_suspicion_leaves_the_commit_to_the_route(db_session):
+    game, players = _game_with_players(db_session, 2)
+    game_id = game.game_id
+
+    with patch.object(db_session, "commit", side_effect=AssertionError("el service no commitea")):
+        point_your_suspicion(game_id, db_session)
+
+    assert {p.pending_action for p in db_session.query(Player).filter(Player.game_id == game_id)} == {"VOTE"}
+
+
+def _vote_round_statements(client, db_session, amount):
+    game, players = _game_with_players(db_session, amount, amount_votes=amount - 1)
+    game.current_turn = players[0].player_id
+    players[1].votes_received = amount - 1
+    db_session.commit()
+    voter_id, voted_id, game_id = players[0].player_id, players[1].player_id, game.game_id
+
+    with count_statements(db_session) as counter:
+        response = client.put(f"/vote/player/{voted_id}/{voter_id}")
+    assert response.status_code == 201
+
+    by_id = {p.player_id: p for p in db_session.query(Player).filter(Player.game_id == game_id)}
+    assert by_id[voted_id].pending_action == "REVEAL_SECRET"
+    assert by_id[voter_id].pending_action == "WAITING_REVEAL_SECRET"
+    assert all(p.votes_received == 0 for p in by_id.values())
+    assert all(p.pending_action == "Clense" for pid, p in by_id.items() if pid not in (voter_id, voted_id))
+    return counter["statements"]
+
+
+@patch("src.routes.players_routes.broadcast_game_information", new_callable=AsyncMock)
+def test_vote_round_end_statement_count_is_constant(mock_broadcast, client, db_session):
+    assert _vote_round_statements(client, db_session, 3) == _vote_round_statements(client, db_session, 6)
+
+
+def _nsf_statements(db_session, nsf_amount):
+    game, players = _game_with_players(db_session, 2)
+    player_id = players[0].player_id
+    db_session.add_all([
+        Event(name="Not so fast", picked_up=True, dropped=False, player_id=player_id, game_id=game.game_id)
+        for _ in range(nsf_amount)
+    ])
+    db_session.commit()
+
+    with count_statements(db_session) as counter:
+        cards_off_table(player_id, db_session)
+
+    assert db_session.query(Card).filter(Card.player_id == player_id, Card.dropped == False).count() == 0
+    return counter["statements"]
+
+
+def test_cards_off_table_statement_count_is_constant(db_session):
+    assert _nsf_statements(db_session, 1) == _nsf_statements(db_session, 4)
+
+
+def _hand(db_session, game_id, player_id, amount):
+    cards = [
+        Detective(name="Hercule Poirot", quantity_set=3, picked_up=True, dropped=False, player_id=player_id, game_id=game_id)
+        for _ in range(amount)
+    ]
+    db_session.add_all(cards)
+    db_session.commit()
+    return [c.card_id for c in cards]
+
+
+@patch("src.routes.cards_routes.broadcast_last_discarted_cards", new_callable=AsyncMock)
+def test_discard_list_statement_count_is_constant(mock_broadcast, client, db_session):
+    counts = []
+    for amount in (2, 5):
+        game, players = _game_with_players(db_session, 2)
+        player_id = players[0].player_id
+        card_ids = _hand(db_session, game.game_id, player_id, amount)
+
+        with count_statements(db_session) as counter:
+            response = client.put(f"/cards/game/drop_list/{player_id}", json={"card_ids": card_ids})
+        assert response.status_code == 200
+        # el orden pedido se respeta en la pila de descarte
+        assert [c["card_id"] for c in response.json()] == card_ids
+        counts.append(counter["statements"])
+
+    assert counts[0] == counts[1]
+
+
+@patch("src.routes.event_routes.broadcast_last_discarted_cards", new_callable=AsyncMock)
+@patch("src.routes.event_routes.broadcast_game_information", new_callable=AsyncMock)
+def test_delay_escape_statement_count_is_constant(mock_broadcast_game, mock_broadcast_discard, client, db_session):
+    counts = []
+    for amount in (1, 5):
+        game, players = _game_with_players(db_session, 2, cards_left=10)
+        game_id, player_id = game.game_id, players[0].player_id
+        discarded = [
+            Detective(name="Discard", quantity_set=1, picked_up=False, dropped=True, game_id=game_id, discardInt=i + 1)
+            for i in range(amount)
+        ]
+        db_session.add_all(discarded)
+        db_session.commit()
+        card_ids = [c.card_id for c in discarded]
+
+        with count_statements(db_session) as counter:
+            response = client.put(f"/event/delay_escape/{game_id},{player_id}", json={"card_ids": card_ids})
+        assert response.status_code == 200
+        assert {c["discardInt"] for c in response.json()} == {-1}
+        assert db_session.get(Game, game_id).cards_left == 10 + amount
+        counts.append(counter["statements"])
+
+    assert counts[0] == counts[1]
+
+
+def _delete_game_statements(client, db_session, logs):
+    game, players = _game_with_players(db_session, 2)
+    game_id = game.game_id
+    _hand(db_session, game_id, players[0].player_id, 6)
+    db_session.add_all([Log(game_id=game_id, player_id=players[i % 2].player_id, type="TurnChange") for i in range(logs)])
+    db_session.commit()
+
+    with patch("src.routes.games_routes.broadcast_available_games", new_callable=AsyncMock):
+        with count_statements(db_session) as counter:
+            assert client.delete(f"/game/{game_id}").status_code == 204
+
+    assert db_session.query(Log).filter(Log.game_id == game_id).count() == 0
+    assert db_session.query(Card).filter(Card.game_id == game_id).count() == 0
+    assert db_session.query(Player).filter(Player.game_id == game_id).count() == 0
+    return counter["statements"]
+
+
+def test_delete_game_statement_count_is_constant(client, db_session):
+    assert _delete_game_statements(client, db_session, 1) == _delete_game_statements(client, db_session, 200)
+
+
+def test_delete_player_follows_the_declared_ondelete(client, db_session):
+    game, players = _game_with_players(db_session, 2)
+    leaving, staying = players[0].player_id, players[1].player_id
+    card_ids = _hand(db_session, game.game_id, leaving, 2)
+    db_session.add(Log(game_id=game.game_id, player_id=leaving, type="TurnChange"))
+    db_session.add(ActiveTrade(game_id=game.game_id, player_one_id=leaving, player_two_id=staying))
+    db_session.commit()
+
+    assert client.delete(f"/players/{leaving}").status_code == 204
+
+    assert db_session.get(Player, leaving) is None
+    assert db_session.query(Log).filter(Log.player_id == leaving).count() == 0
+    assert db_session.query(ActiveTrade).count() == 0
+    assert {db_session.get(Card, card_id).player_id for card_id in card_ids} == {None}
+    assert db_session.get(Player, staying) is not None
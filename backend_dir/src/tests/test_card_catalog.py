@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import select
+from src.database.card_catalog import CATALOG, definition_by_name
+from src.database.models import Card, Detective, Event, Game
+from src.database.services.services_cards import init_detective_cards, init_event_cards
+
+
+@pytest.fixture
+def game_with_cards(db_session):
+    game = Game(name="Catalogo", status="in course", max_players=4, min_players=2, players_amount=0)
+    db_session.add(game)
+    db_session.commit()
+    init_detective_cards(game.game_id, db_session)
+    init_event_cards(game.game_id, db_session)
+    db_session.commit()
+    return game.game_id
+
+
+def test_catalog_describes_the_whole_deck():
+    assert sum(d.quantity for d in CATALOG) == 61
+    assert len({d.definition_id for d in CATALOG}) == len(CATALOG)
+    assert all(d.quantity_set for d in CATALOG if d.type == "detective")
+
+
+def test_game_rows_store_only_the_definition_id(db_session, game_with_cards):
+    cards = Card.__table__
+    stored = db_session.execute(
+        select(cards.c.definition_id, cards.c.name, cards.c.quantity_set).where(cards.c.game_id == game_with_cards)
+    ).all()
+
+    assert len(stored) == 61
+    assert all(definition_id is not None for definition_id, _, _ in stored)
+    assert {(name, quantity_set) for _, name, quantity_set in stored} == {(None, None)}
+
+    poirot = db_session.query(Detective).filter(
+        Detective.game_id == game_with_cards, Detective.name == "Hercule Poirot"
+    ).all()
+    assert len(poirot) == 3
+    assert {(card.name, card.quantity_set) for card in poirot} == {("Hercule Poirot", 3)}
+
+
+def test_name_filter_uses_the_catalog(db_session, game_with_cards):
+    nsf = db_session.query(Event).filter(Event.game_id == game_with_cards, Event.name == "Not so fast").all()
+
+    assert len(nsf) == 10
+    assert {card.definition_id for card in nsf} == {definition_by_name("event", "Not so fast").definition_id}
+
+
+def test_name_operators_use_the_catalog(db_session, game_with_cards):
+    custom = Event(name="Sin catalogo", picked_up=False, dropped=False, game_id=game_with_cards)
+    db_session.add(custom)
+    db_session.commit()
+    events = db_session.query(Event).filter(Event.game_id == game_with_cards)
+    total = events.count()
+
+    assert events.filter(Event.name != "Not so fast").count() == total - 10
+    assert events.filter(Event.name != "Sin catalogo").count() == total - 1
+    assert {card.name for card in events.filter(Event.name.in_(["Not so fast", "Sin catalogo"]))} == {"Not so fast", "Sin catalogo"}
+    assert events.filter(Event.name.in_(["Not so fast", "Sin catalogo"])).count() == 11
+    assert events.filter(Event.name.not_in(["Not so fast", "Sin catalogo"])).count() == total - 11
+    assert events.filter(Event.name.in_([])).count() == 0
+
+
+@pytest.mark.parametrize("use", [
+    lambda: Event.name.like("Not%"),
+    lambda: select(Event).order_by(Event.name),
+    lambda: select(Event.name),
+    lambda: Event.name.is_(None),
+])
+def test_other_name_operators_are_rejected(use):
+    # la columna name está en NULL para las cartas del catálogo: se rechaza en vez de dar un resultado equivocado
+    with pytest.raises(NotImplementedError):
+        use()
+
+
+def test_cards_outside_the_catalog_keep_their_own_values(db_session, game_with_cards):
+    custom = Detective(name="Sherlock", quantity_set=2, picked_up=False, dropped=False, game_id=game_with_cards)
+    # mismo nombre que el catálogo pero otro quantity_set: sólo se guarda la diferencia
+    tweaked = Detective(name="Parker Pyne", quantity_set=3, picked_up=False, dropped=False, game_id=game_with_cards)
+    db_session.add_all([custom, tweaked])
+    db_session.commit()
+
+    assert (custom.definition_id, custom.name, custom.quantity_set) == (None, "Sherlock", 2)
+    assert tweaked.definition_id == definition_by_name("detective", "Parker Pyne").definition_id
+    assert (tweaked.name, tweaked.quantity_set) == ("Parker Pyne", 3)
+    assert db_session.query(Detective).filter(Detective.name == "Sherlock").one() is custom
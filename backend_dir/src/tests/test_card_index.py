@@ -0,0 +1,121 @@
+import datetime
+import pytest
+from sqlalchemy import event
+from src.database.models import Card, Event, Game, Player
+from src.database.services.services_card_index import CardIndex, card_index
+from src.database.services.services_cards import (
+    init_detective_cards,
+    init_event_cards,
+    deal_NSF,
+    deal_cards_to_players,
+    setup_initial_draft_pile,
+    hand_size,
+    only_6,
+)
+
+
+@pytest.fixture
+def started_game(db_session):
+    game = Game(name="Indice", status="in course", max_players=4, min_players=2, players_amount=3)
+    db_session.add(game)
+    db_session.commit()
+    for i in range(3):
+        db_session.add(Player(name=f"Jugador {i}", host=(i == 0), game_id=game.game_id,
+                              birth_date=datetime.date(2000, 1, 1), turn_order=i + 1))
+    init_detective_cards(game.game_id, db_session)
+    init_event_cards(game.game_id, db_session)
+    deal_NSF(game.game_id, db_session)
+    deal_cards_to_players(game.game_id, db_session)
+    setup_initial_draft_pile(game.game_id, db_session)
+    db_session.commit()
+    return game.game_id
+
+
+def _count_statements(db_session, fn):
+    counter = {"statements": 0}
+
+    def on_execute(*args):
+        counter["statements"] += 1
+
+    engine = db_session.get_bind().engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return result, counter["statements"]
+
+
+def test_index_matches_the_database(db_session, started_game):
+    index = card_index(started_game, db_session)
+    cards = db_session.query(Card).filter(Card.game_id == started_game).all()
+
+    assert len(index.card_ids) == 61
+    for player in db_session.query(Player).filter(Player.game_id == started_game):
+        in_hand = {c.card_id for c in cards if c.player_id == player.player_id and c.picked_up and not c.dropped}
+        assert set(index.hand_ids(player.player_id)) == in_hand
+        assert index.hand_size(player.player_id) == 6
+    assert index.draft.bit_count() == 3
+    assert index.deck_size() == 61 - 3 * 6 - 3
+    # ninguna carta está en dos lugares a la vez
+    locations = [index.deck, index.draft, index.discard, *index.hands.values(), *index.sets.values()]
+    assert sum(mask.bit_count() for mask in locations) == 61
+
+
+def test_hand_size_is_answered_from_memory(db_session, started_game):
+    player = db_session.query(Player).filter(Player.game_id == started_game).first()
+    player_id = player.player_id
+    card_index(started_game, db_session)
+
+    result, statements = _count_statements(db_session, lambda: only_6(player_id, db_session))
+
+    assert result is True
+    assert statements == 0
+
+
+def test_pending_changes_fall_back_to_the_database(db_session, started_game):
+    player = db_session.query(Player).filter(Player.game_id == started_game).first()
+    card = db_session.query(Card).filter(Card.player_id == player.player_id).first()
+    card.dropped = True
+    db_session.flush()
+
+    assert card_index(started_game, db_session) is None
+    assert hand_size(player.player_id, db_session, started_game) == 5
+
+    db_session.commit()
+    assert card_index(started_game, db_session).hand_size(player.player_id) == 5
+
+
+def test_discard_order_and_snapshot(db_session):
+    game = Game(name="Descarte", status="in course", max_players=4, min_players=2, players_amount=0)
+    db_session.add(game)
+    db_session.commit()
+    discarded = [
+        Event(name="Carta", picked_up=False, dropped=True, game_id=game.game_id, discardInt=order)
+        for order in (2, 3, 1)
+    ]
+    db_session.add_all(discarded)
+    db_session.commit()
+
+    index = card_index(game.game_id, db_session)
+    by_order = {c.discardInt: c.card_id for c in discarded}
+    assert index.top_discard(2) == [by_order[3], by_order[2]]
+    assert index.in_discard(by_order[1])
+    assert index.snapshot() == card_index(game.game_id, db_session).snapshot()
+
+    db_session.get(Card, by_order[3]).dropped = False
+    db_session.commit()
+    assert card_index(game.game_id, db_session).snapshot() != index.snapshot()
+
+
+def test_cards_in_a_set_are_not_in_hand():
+    index = CardIndex.from_rows([
+        (1, 10, True, False, False, 0, None),
+        (2, None, True, False, False, 0, 7),
+        (3, None, False, False, False, 0, None),
+    ])
+
+    assert index.in_hand(10, 1)
+    assert not index.in_hand(10, 2)
+    assert index.sets == {7: index.bit(2)}
+    assert index.in_deck(3)
@@ -174,6 +174,89 @@ def test_pickup_a_card_hand_full(mock_only_6, client, db_session):
     assert "already has 6 cards" in response.json()["detail"]
 
 
+# --- Tests para completar la mano ---
+
+def _refill_setup(db_session, hand, deck, delayed=0):
+    game = Game(name="Refill", status="in course", max_players=4, min_players=2, players_amount=1, cards_left=deck + delayed)
+    player = Player(name="P1", game=game, birth_date=datetime.date(2000, 1, 1), turn_order=1)
+    db_session.add_all([game, player])
+    db_session.commit()
+    for i in range(hand):
+        db_session.add(Detective(name="Parker Pyne", quantity_set=2, picked_up=True, dropped=False,
+                                 player_id=player.player_id, game_id=game.game_id))
+    for i in range(deck):
+        db_session.add(Detective(name="Hercule Poirot", quantity_set=3, picked_up=False, dropped=False,
+                                 game_id=game.game_id))
+    for i in range(delayed):
+        db_session.add(Event(name="Another Victim", picked_up=False, dropped=False, discardInt=-1,
+                             game_id=game.game_id))
+    db_session.commit()
+    return game, player
+
+
+@patch('src.routes.cards_routes.broadcast_game_information', new_callable=AsyncMock)
+def test_refill_hand_draws_missing_cards_delayed_first(mock_broadcast, client, db_session):
+    game, player = _refill_setup(db_session, hand=2, deck=10, delayed=2)
+    game_id, player_id = game.game_id, player.player_id
+    delayed_ids = {c.card_id for c in db_session.query(Card).filter(Card.game_id == game_id, Card.discardInt == -1)}
+
+    response = client.put(f"/cards/refill/{player_id},{game_id}")
+
+    assert response.status_code == 200
+    drawn = response.json()
+    assert len(drawn) == 4
+    # las demoradas salen primero
+    assert {c["card_id"] for c in drawn[:2]} == delayed_ids
+    hand = db_session.query(Card).filter(Card.player_id == player_id, Card.dropped == False).count()
+    assert hand == 6
+    game = db_session.query(Game).filter(Game.game_id == game_id).first()
+    assert game.cards_left == 8
+    assert game.status == "in course"
+    mock_broadcast.assert_awaited_once_with(game_id)
+
+
+@patch('src.routes.cards_routes.broadcast_game_information', new_callable=AsyncMock)
+def test_refill_hand_finishes_game_when_deck_runs_out(mock_broadcast, client, db_session):
+    game, player = _refill_setup(db_session, hand=3, deck=2)
+    game_id = game.game_id
+
+    response = client.put(f"/cards/refill/{player.player_id},{game_id}")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    game = db_session.query(Game).filter(Game.game_id == game_id).first()
+    assert game.cards_left == 0
+    assert game.status == "finished"
+    mock_broadcast.assert_awaited_once_with(game_id)
+
+
+@patch('src.routes.cards_routes.broadcast_game_information', new_callable=AsyncMock)
+def test_refill_hand_full(mock_broadcast, client, db_session):
+    game, player = _refill_setup(db_session, hand=6, deck=5)
+
+    response = client.put(f"/cards/refill/{player.player_id},{game.game_id}")
+
+    assert response.status_code == 400
+    assert "already has 6 cards" in response.json()["detail"]
+    mock_broadcast.assert_not_awaited()
+
+
+@pytest.mark.parametrize("status", ["waiting players", "finished"])
+@patch('src.routes.cards_routes.broadcast_game_information', new_callable=AsyncMock)
+def test_refill_hand_game_not_in_course(mock_broadcast, client, db_session, status):
+    game, player = _refill_setup(db_session, hand=2, deck=5)
+    game_id, player_id = game.game_id, player.player_id
+    game.status = status
+    db_session.commit()
+
+    response = client.put(f"/cards/refill/{player_id},{game_id}")
+
+    assert response.status_code == 400
+    assert "not in course" in response.json()["detail"]
+    assert db_session.query(Card).filter(Card.player_id == player_id, Card.dropped == False).count() == 2
+    mock_broadcast.assert_not_awaited()
+
+
 @patch('src.routes.cards_routes.broadcast_last_discarted_cards')
 def test_discard_card_success(mock_broadcast, client, db_session):
     """Verifica que un jugador puede descartar la carta correcta."""
@@ -0,0 +1,174 @@
+import datetime
+import json
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.database.database import Base
+from src.database.models import Game, Player, ChatMessage
+from src.database.services.services_chat import ChatManager, chatManager, CHAT_BURST
+
+
+@pytest.fixture
+def chat_game(db_session):
+    game = Game(name="Chat Game", status="in course", max_players=4, min_players=2, players_amount=2)
+    db_session.add(game)
+    db_session.commit()
+    player = Player(name="Ana", host=True, game_id=game.game_id, birth_date=datetime.date(2000, 1, 1))
+    db_session.add(player)
+    db_session.commit()
+    return game, player
+
+
+@pytest.fixture(autouse=True)
+def reset_chat_manager():
+    chatManager.rooms.clear()
+    chatManager.unsaved.clear()
+    yield
+    chatManager.rooms.clear()
+    chatManager.unsaved.clear()
+
+
+@pytest.mark.asyncio
+@patch('src.database.services.services_chat.gameManager', new_callable=AsyncMock)
+async def test_messages_in_window_are_sent_in_one_frame(mock_game_manager, db_session, chat_game):
+    game, player = chat_game
+    manager = ChatManager()
+
+    for text in ["hola", "¿quién es", "el asesino?"]:
+        manager.post(game.game_id, player.player_id, text, db_session)
+    await manager.flush(game.game_id)
+
+    mock_game_manager.broadcast.assert_awaited_once()
+    frame = json.loads(mock_game_manager.broadcast.await_args.args[0])
+    assert frame["type"] == "ChatBatch"
+    assert [m["message"] for m in frame["data"]] == ["hola", "¿quién es", "el asesino?"]
+    assert frame["data"][0]["sender_name"] == "Ana"
+
+
+@pytest.mark.asyncio
+@patch('src.database.services.services_chat.gameManager', new_callable=AsyncMock)
+async def test_single_message_keeps_chat_frame(mock_game_manager, db_session, chat_game):
+    game, player = chat_game
+    manager = ChatManager()
+
+    manager.post(game.game_id, player.player_id, "hola", db_session)
+    await manager.flush(game.game_id)
+
+    frame = json.loads(mock_game_manager.broadcast.await_args.args[0])
+    assert frame["type"] == "Chat"
+    assert frame["data"]["message"] == "hola"
+    assert frame["data"]["sender_id"] == player.player_id
+
+
+@pytest.mark.asyncio
+async def test_sender_is_looked_up_once(db_session, chat_game):
+    game, player = chat_game
+    manager = ChatManager()
+    manager.post(game.game_id, player.player_id, "uno", db_session)
+
+    spy = MagicMock(wraps=db_session)
+    manager.post(game.game_id, player.player_id, "dos", spy)
+
+    spy.query.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_player(db_session, chat_game):
+    game, player = chat_game
+    manager = ChatManager()
+
+    for i in range(CHAT_BURST):
+        manager.post(game.game_id, player.player_id, f"msg {i}", db_session)
+    with pytest.raises(HTTPException) as exc_info:
+        manager.post(game.game_id, player.player_id, "spam", db_session)
+
+    assert exc_info.value.status_code == 429
+    assert len(manager.history(game.game_id, db_session)) == CHAT_BURST
+
+
+@pytest.mark.asyncio
+async def test_player_from_other_game_is_rejected(db_session, chat_game):
+    game, player = chat_game
+    manager = ChatManager()
+
+    with pytest.raises(HTTPException) as exc_info:
+        manager.post(game.game_id + 1, player.player_id, "hola", db_session)
+
+    assert exc_info.value.status_code == 404
+    assert manager.rooms == {}
+
+
+@pytest.mark.asyncio
+async def test_pending_messages_are_persisted_and_reloaded(db_session, chat_game):
+    game, player = chat_game
+    game_id = game.game_id
+    manager = ChatManager()
+    manager.post(game_id, player.player_id, "primero", db_session)
+    manager.post(game_id, player.player_id, "segundo", db_session)
+
+    with patch('src.database.services.services_chat.SessionLocal', return_value=db_session):
+        saved = manager.persist_pending()
+
+    assert saved == 2
+    assert manager.unsaved == []
+    assert db_session.query(ChatMessage).filter(ChatMessage.game_id == game_id).count() == 2
+
+    # un proceso nuevo (sin nada en memoria) recupera el historial de la base
+    history = ChatManager().history(game_id, db_session)
+    assert [m["message"] for m in history] == ["primero", "segundo"]
+
+
+def test_unpersistable_message_does_not_block_the_rest():
+    # base propia: los rollbacks de _save no tienen que tocar la transacción de los demás tests
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[ChatMessage.__table__])
+    manager = ChatManager()
+    now = datetime.datetime.now()
+    # la del medio la base la rechaza (en MySQL también un jugador o una partida que ya se borraron)
+    manager.unsaved = [
+        ChatMessage(game_id=1, player_id=1, sender_name=name, message=text, created_at=now)
+        for name, text in (("Ana", "primero"), (None, "roto"), ("Ana", "segundo"))
+    ]
+
+    with patch('src.database.services.services_chat.SessionLocal', sessionmaker(bind=engine)):
+        assert manager.persist_pending() == 2
+        assert manager.unsaved == []
+        # el lote siguiente entra entero
+        manager.unsaved = [ChatMessage(game_id=1, player_id=1, sender_name="Ana", message="tercero", created_at=now)]
+        assert manager.persist_pending() == 1
+
+    with engine.connect() as connection:
+        saved = connection.execute(select(ChatMessage.message).order_by(ChatMessage.message_id)).scalars().all()
+    assert saved == ["primero", "segundo", "tercero"]
+
+
+def test_deleted_player_pending_messages_are_dropped(client, db_session, chat_game):
+    game, player = chat_game
+    game_id, player_id = game.game_id, player.player_id
+    assert client.post(f"/send/chat/{game_id}, {player_id}", json={"message": "hola"}).status_code == 204
+
+    assert client.delete(f"/players/{player_id}").status_code == 204
+
+    assert chatManager.unsaved == []
+    assert player_id not in chatManager.rooms[game_id].senders
+    assert client.post(f"/send/chat/{game_id}, {player_id}", json={"message": "sigo?"}).status_code == 404
+
+
+def test_chat_of_a_missing_game_is_404(client):
+    assert client.get("/chat/999999").status_code == 404
+    assert 999999 not in chatManager.rooms
+
+
+def test_chat_routes(client, chat_game):
+    game, player = chat_game
+
+    response = client.post(f"/send/chat/{game.game_id}, {player.player_id}", json={"message": "hola"})
+    assert response.status_code == 204
+
+    history = client.get(f"/chat/{game.game_id}")
+    assert history.status_code == 200
+    assert history.json()[0]["message"] == "hola"
+    assert history.json()[0]["sender_name"] == "Ana"
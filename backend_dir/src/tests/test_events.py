@@ -1,6 +1,6 @@
 import datetime
 import pytest
-from unittest.mock import patch, AsyncMock
+from unittest.mock import ANY, patch, AsyncMock
 
 # Importar modelos y esquemas necesarios para los tests
 from src.database.models import Game, Player, Event, Secrets, Detective, Card, ActiveTrade, Log
@@ -163,7 +163,8 @@ async def test_early_train_paddington_not_enough_cards_ends_game(mock_broadcast_
     response = client.put("/event/early_train_paddington/2,5")
     assert response.status_code == 200
     assert "Not enough cards" in response.json()["message"]
-    mock_finish_game.assert_awaited_once_with(2)
+    # finish_game recibe la sesión de la ruta: el fin de partida viaja en su mismo commit
+    mock_finish_game.assert_awaited_once_with(2, ANY)
 
 # === Tests para 'Look into the ashes' ===
 
@@ -0,0 +1,113 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import event, update
+from src.database import game_snapshot
+from src.database.game_snapshot import (
+    check_snapshot, compact_snapshots, current_state, load_snapshot, restore_from_snapshot, write_snapshot,
+)
+from src.database.journal import dump_state
+from src.database.models import Card, Game, GameSnapshot, Player
+
+
+@pytest.fixture
+def snapshots(monkeypatch):
+    monkeypatch.setattr(game_snapshot, "enabled", True)
+    # sólo las partidas de este test quedan pendientes de compactar
+    monkeypatch.setattr(game_snapshot, "_dirty", set())
+
+
+@pytest.fixture
+def statements(db_session):
+    executed = []
+    engine = db_session.get_bind().engine
+    on_execute = lambda conn, cursor, statement, *args: executed.append(statement)
+    event.listen(engine, "before_cursor_execute", on_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", on_execute)
+
+
+@pytest.fixture
+def started_game(create_game, snapshots):
+    return create_game("Foto")
+
+
+def test_compaction_rewrites_each_touched_game_once(started_game, db_session):
+    assert load_snapshot(started_game, db_session) is None
+    assert game_snapshot._dirty == {started_game}
+
+    assert compact_snapshots(db_session) == [started_game]
+
+    snapshot = load_snapshot(started_game, db_session)
+    assert snapshot["version"] == 1
+    assert snapshot["state"]["games"][str(started_game)]["status"] == "in course"
+    assert len(snapshot["state"]["cards"]) == 61
+    assert {p["name"] for p in snapshot["state"]["players"].values()} == {"Ana", "Beto"}
+    assert check_snapshot(started_game, db_session) == []
+    assert compact_snapshots(db_session) == []
+
+
+@patch("src.routes.players_routes.broadcast_player_state", new_callable=AsyncMock)
+def test_requests_do_not_write_the_snapshot(mock_broadcast, client, started_game, db_session, statements, monkeypatch):
+    compact_snapshots(db_session)
+    player_ids = db_session.query(Player.player_id).filter(Player.game_id == started_game).order_by(Player.player_id).all()
+    counts = {}
+    # un jugador distinto en cada vuelta: los dos hacen el mismo UPDATE
+    for on, (player_id,) in zip((False, True), player_ids):
+        monkeypatch.setattr(game_snapshot, "enabled", on)
+        statements.clear()
+        assert client.put(f"/select/player/{player_id}").status_code == 201
+        counts[on] = len(statements)
+
+    # con las fotos activas la request hace las mismas consultas: sólo deja la partida pendiente
+    assert counts[True] == counts[False]
+    assert not any("game_snapshots" in statement for statement in statements)
+    assert game_snapshot._dirty == {started_game}
+
+
+def test_current_state_reads_one_row_when_the_snapshot_is_current(started_game, db_session, statements):
+    expected = dump_state(started_game, db_session)
+    compact_snapshots(db_session)
+
+    statements.clear()
+    assert current_state(started_game, db_session) == expected
+    assert len(statements) == 1
+
+    # commiteada y todavía sin compactar: se lee de las tablas
+    db_session.get(Game, started_game).name = "Otra"
+    db_session.commit()
+    assert current_state(started_game, db_session)["games"][str(started_game)]["name"] == "Otra"
+
+
+def test_check_snapshot_finds_changes_behind_its_back(started_game, db_session):
+    compact_snapshots(db_session)
+    # un UPDATE en bloque que no marca la partida: la foto queda vieja
+    db_session.execute(update(Player).where(Player.game_id == started_game).values(pending_action="VOTE"))
+
+    diffs = check_snapshot(started_game, db_session)
+
+    assert {(d["table"], d["column"], d["expected"]) for d in diffs} == {("players", "pending_action", "VOTE")}
+    assert len(diffs) == 2
+    write_snapshot(started_game, db_session)
+    assert check_snapshot(started_game, db_session) == []
+
+
+def test_snapshot_of_another_format_is_ignored(started_game, db_session, monkeypatch):
+    compact_snapshots(db_session)
+    monkeypatch.setattr(game_snapshot, "SNAPSHOT_FORMAT", 2)
+
+    assert load_snapshot(started_game, db_session) is None
+
+
+def test_restore_from_snapshot(started_game, db_session):
+    compact_snapshots(db_session)
+    db_session.query(Card).filter(Card.game_id == started_game).delete()
+    db_session.get(Game, started_game).status = "finished"
+    db_session.flush()
+
+    assert restore_from_snapshot(started_game, db_session) == 1
+    db_session.commit()
+
+    assert db_session.query(Card).filter(Card.game_id == started_game).count() == 61
+    assert db_session.get(Game, started_game).status == "in course"
+    compact_snapshots(db_session)
+    assert db_session.get(GameSnapshot, started_game).version == 2
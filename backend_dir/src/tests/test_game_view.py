@@ -0,0 +1,104 @@
+import datetime
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.database.models import Game, Player, Event
+from src.database.services.services_game_view import current_version, game_view, build_game_view
+from src.database.services.services_websockets import broadcast_player_state, broadcast_game_information
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def view_game(db_session):
+    game = Game(name="Vista", status="in course", max_players=4, min_players=2, players_amount=2)
+    db_session.add(game)
+    db_session.commit()
+    for i in range(2):
+        db_session.add(Player(name=f"Jugador {i}", host=(i == 0), game_id=game.game_id,
+                              birth_date=datetime.date(2000, 1, 1), turn_order=i + 1))
+    db_session.commit()
+    return game
+
+
+class StatementCounter:
+    def __init__(self, db_session):
+        self.engine = db_session.get_bind().engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+async def test_commit_bumps_version_of_touched_game(db_session, view_game):
+    before = current_version(view_game.game_id)
+
+    db_session.add(Event(name="Not so fast", game_id=view_game.game_id, picked_up=False, dropped=False))
+    db_session.commit()
+
+    assert current_version(view_game.game_id) == before + 1
+
+
+async def test_rollback_keeps_version(db_session, view_game):
+    game_id = view_game.game_id
+    before = current_version(game_id)
+
+    # sesión aparte sobre un savepoint, para no deshacer la transacción del fixture
+    other = Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    other.get(Game, game_id).name = "Otro nombre"
+    other.flush()
+    other.rollback()
+    assert "touched_games" not in other.info
+    other.close()
+
+    assert current_version(game_id) == before
+
+
+async def test_view_is_shared_within_a_version(view_game):
+    game_id = view_game.game_id
+    version = current_version(game_id)
+
+    assert build_game_view(game_id, version) is build_game_view(game_id, version)
+    assert build_game_view(game_id, version + 1) is not build_game_view(game_id, version)
+
+
+@patch('src.database.services.services_websockets.gameManager', new_callable=AsyncMock)
+async def test_second_broadcast_for_same_version_skips_db(mock_game_manager, db_session, view_game):
+    game_id = view_game.game_id
+
+    with patch('src.database.services.services_websockets.SessionLocal', return_value=db_session):
+        with StatementCounter(db_session) as first:
+            await broadcast_game_information(game_id)
+        with StatementCounter(db_session) as second:
+            await broadcast_player_state(game_id)
+
+    assert first.count > 0
+    assert second.count == 0
+    # el playersState de los dos broadcasts es el mismo mensaje
+    sent = [call.args[0] for call in mock_game_manager.broadcast.await_args_list]
+    assert sent[1] == sent[2]
+
+
+@patch('src.database.services.services_websockets.gameManager', new_callable=AsyncMock)
+async def test_broadcast_after_commit_sees_new_state(mock_game_manager, db_session, view_game):
+    game_id = view_game.game_id
+
+    with patch('src.database.services.services_websockets.SessionLocal', return_value=db_session):
+        await broadcast_player_state(game_id)
+        player = db_session.query(Player).filter(Player.game_id == game_id).first()
+        player.pending_action = "WaitingVotes"
+        db_session.commit()
+        await broadcast_player_state(game_id)
+
+    last = json.loads(mock_game_manager.broadcast.await_args.args[0])
+    assert "WaitingVotes" in [p["pending_action"] for p in last["data"]]
+    assert game_view(game_id).version == current_version(game_id)
@@ -6,7 +6,9 @@ import pytest
 from unittest.mock import patch, AsyncMock
 import datetime
 from src.database.models import Game, Player , Event , Card , Detective
+from sqlalchemy.orm import Session
 from src.database.services.services_games import assign_turn_to_players, update_players_on_game, finish_game
+from src.database.unit_of_work import commit, pending_broadcasts
 from src.database.services.services_cards import (
     init_detective_cards,
     init_event_cards,
@@ -16,6 +18,7 @@ from src.database.services.services_cards import (
     replenish_draft_pile,
     only_6
 )
+from src.database.services.services_secrets import init_secrets, deal_secrets_to_players
 
 # --- Tests for Game Creation (POST /games) ---
 
@@ -328,10 +331,33 @@ async def test_finish_game_success(db_session, mocker):
     result = await finish_game(game.game_id, db_session)
     
     assert result == {"message": f"Game {game.game_id} finished successfully."}
+    # el broadcast sale recién cuando se commitea la transacción
+    mock_broadcast.assert_not_awaited()
+    await commit(db_session)
     db_session.refresh(game)
     assert game.status == "finished"
     mock_broadcast.assert_awaited_once_with(game.game_id)
 
+@pytest.mark.asyncio
+async def test_finish_game_rollback_discards_broadcast(db_session, mocker):
+    """Verifies that a rolled back 'finish_game' neither persists nor broadcasts."""
+    mock_broadcast = mocker.patch('src.database.services.services_games.broadcast_game_information', new_callable=AsyncMock)
+    game = Game(name="Game to Finish", status="in course", max_players=4, min_players=2, players_amount=2)
+    db_session.add(game)
+    db_session.commit()
+    game_id = game.game_id
+
+    # sesión aparte sobre un savepoint, para no deshacer la transacción del fixture
+    other = Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    await finish_game(game_id, other)
+    assert pending_broadcasts(other) == [(mock_broadcast, (game_id,))]
+    other.rollback()
+    await commit(other)
+    other.close()
+
+    mock_broadcast.assert_not_awaited()
+    assert db_session.get(Game, game_id).status == "in course"
+
 @pytest.mark.asyncio
 async def test_finish_game_already_finished(db_session):
     """Verifies 'finish_game' returns the correct message for an already finished game."""
@@ -397,6 +423,46 @@ def test_full_game_initialization_flow(db_session):
         assert card.player_id is None
 
 
+def _deal_seeded_game(db_session, seed, amount=6):
+    game = Game(name="Semilla", max_players=6, min_players=2, players_amount=amount, seed=seed)
+    players = [Player(name=f"J{i}", game=game, birth_date=datetime.date(2000, 1, 1)) for i in range(amount)]
+    db_session.add(game)
+    db_session.add_all(players)
+    db_session.commit()
+    init_detective_cards(game.game_id, db_session)
+    init_event_cards(game.game_id, db_session)
+    init_secrets(game.game_id, db_session)
+    deal_NSF(game.game_id, db_session)
+    deal_cards_to_players(game.game_id, db_session)
+    deal_secrets_to_players(game.game_id, db_session)
+    setup_initial_draft_pile(game.game_id, db_session)
+    db_session.commit()
+
+    # la posición de cada carta relativa a la partida, para comparar dos partidas
+    order = {p.player_id: i for i, p in enumerate(sorted(players, key=lambda p: p.player_id))}
+    cards = sorted(game.cards, key=lambda c: c.card_id)
+    secrets = sorted(game.secrets, key=lambda s: s.secret_id)
+    return (
+        [(c.name, order.get(c.player_id), c.draft) for c in cards],
+        [(s.murderer, s.acomplice, order[s.player_id]) for s in secrets],
+    )
+
+
+def test_same_seed_deals_the_same_game(db_session):
+    first = _deal_seeded_game(db_session, seed=42)
+    assert _deal_seeded_game(db_session, seed=42) == first
+    assert _deal_seeded_game(db_session, seed=43) != first
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_secrets_deal_splits_murderer_and_acomplice(db_session, seed):
+    _, secrets = _deal_seeded_game(db_session, seed=seed)
+    murderer = next(owner for m, _, owner in secrets if m)
+    acomplice = next(owner for _, a, owner in secrets if a)
+    assert murderer != acomplice
+    assert sorted(owner for _, _, owner in secrets) == sorted(list(range(6)) * 3)
+
+
 def test_replenish_draft_pile(db_session):
     """
     Prueba específicamente la función 'replenish_draft_pile'.
@@ -444,4 +510,13 @@ def test_only_6_returns_false_when_hand_is_not_full(db_session):
         db_session.add(Event(name=f"Card {i}", player_id=player.player_id, game_id=game.game_id, picked_up=True, dropped=False))
     db_session.commit()
     
-    assert only_6(player.player_id, db_session) is False
\ No newline at end of file
+    assert only_6(player.player_id, db_session) is False
+
+def test_clients_cannot_choose_or_see_the_seed(client, db_session, mocker):
+    mocker.patch('src.routes.games_routes.broadcast_available_games', new_callable=AsyncMock)
+    game_id = client.post("/games", json={"name": "Semilla", "max_players": 4, "min_players": 2,
+                                          "status": "waiting players", "seed": 42}).json()["game_id"]
+
+    assert db_session.get(Game, game_id).seed != 42
+    assert "seed" not in client.get(f"/games/{game_id}").json()
+    assert all("seed" not in game for game in client.get("/games").json())
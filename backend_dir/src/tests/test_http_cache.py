@@ -0,0 +1,88 @@
+import datetime
+import pytest
+from sqlalchemy import event
+from src.database.models import Game, Player
+from src.database.services import services_http_cache
+
+
+@pytest.fixture
+def game(db_session):
+    game = Game(name="ETag", status="waiting players", max_players=4, min_players=2, players_amount=1)
+    db_session.add(game)
+    db_session.flush()
+    db_session.add(Player(name="Ana", host=True, game_id=game.game_id, birth_date=datetime.date(2000, 1, 1)))
+    db_session.commit()
+    return game
+
+
+@pytest.fixture
+def statements(db_session):
+    executed = []
+    engine = db_session.get_bind().engine
+    on_execute = lambda conn, cursor, statement, *args: executed.append(statement)
+    event.listen(engine, "before_cursor_execute", on_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", on_execute)
+
+
+@pytest.mark.parametrize("url", ["/games/{id}", "/lobby/players/{id}", "/logs/{id}", "/games"])
+def test_matching_etag_is_304_without_queries(client, game, statements, url):
+    url = url.format(id=game.game_id)
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    statements.clear()
+    second = client.get(url, headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+    assert statements == []
+
+
+def test_etag_changes_after_a_commit(client, db_session, game):
+    etag = client.get(f"/games/{game.game_id}").headers["etag"]
+    listing = client.get("/games").headers["etag"]
+
+    # el cliente cierra la sesión al terminar cada request: se vuelve a leer la partida
+    db_session.get(Game, game.game_id).name = "Renombrada"
+    db_session.commit()
+
+    response = client.get(f"/games/{game.game_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renombrada"
+    assert response.headers["etag"] != etag
+    assert client.get("/games", headers={"If-None-Match": listing}).status_code == 200
+
+
+def test_same_version_is_served_from_cache(client, game, statements):
+    url = f"/lobby/players/{game.game_id}"
+    first = client.get(url)
+
+    statements.clear()
+    second = client.get(url)
+
+    assert statements == []
+    assert second.status_code == 200
+    assert second.content == first.content
+
+
+def test_cached_body_matches_the_route_response(client, game):
+    services_http_cache.CACHE_TTL = 0
+    try:
+        uncached = client.get(f"/games/{game.game_id}").json()
+    finally:
+        services_http_cache.CACHE_TTL = 5.0
+
+    assert client.get(f"/games/{game.game_id}").json() == uncached
+    assert uncached["name"] == "ETag"
+    assert "_sa_instance_state" not in uncached
+
+
+def test_not_found_is_not_cached(client, statements):
+    assert client.get("/games/999999").status_code == 404
+    statements.clear()
+
+    assert client.get("/games/999999").status_code == 404
+    assert statements != []
@@ -0,0 +1,109 @@
+import threading
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.database import journal as journal_module
+from src.database.journal import GameJournal, recover_game
+from src.database.models import Game, Player
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    game_journal = GameJournal(str(tmp_path))
+    monkeypatch.setattr(journal_module, "journal", game_journal)
+    return game_journal
+
+
+@pytest.fixture
+def started_game(create_game):
+    return create_game("Journal", start=False)
+
+
+def test_each_action_is_appended_with_its_route(journal, started_game):
+    records = journal.records(started_game)
+
+    assert [r["seq"] for r in records] == [1, 2, 3]
+    assert [(r["action"]["method"], r["action"]["route"]) for r in records] == [
+        ("POST", "/games"), ("POST", "/players"), ("POST", "/players"),
+    ]
+    assert records[1]["action"]["body"]["name"] == "Ana"
+    assert {row["name"] for r in records[1:] for row in r["rows"]["players"]} == {"Ana", "Beto"}
+
+
+def test_bulk_updates_are_journaled(journal, client, started_game):
+    with patch("src.routes.event_routes.broadcast_game_information", new_callable=AsyncMock):
+        client.put(f"/event/point_your_suspicion/{started_game}")
+
+    last = journal.records(started_game)[-1]
+    assert last["action"]["route"] == "/event/point_your_suspicion/{game_id}"
+    assert {row["pending_action"] for row in last["rows"]["players"]} == {"VOTE"}
+
+
+def test_rollback_appends_nothing(journal, db_session, started_game):
+    session = Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    session.get(Game, started_game).name = "No se guarda"
+    session.flush()
+    session.rollback()
+    session.commit()
+
+    assert len(journal.records(started_game)) == 3
+
+
+def test_recover_game_from_snapshot_and_tail(journal, db_session, started_game, monkeypatch):
+    monkeypatch.setattr(journal_module, "SNAPSHOT_EVERY", 2)
+    game = db_session.get(Game, started_game)
+    game.status = "in course"
+    db_session.commit()
+    assert journal.snapshot(started_game)["seq"] == 4
+
+    game.current_turn = 1
+    db_session.commit()
+
+    # se pierde el estado en la base
+    game.status, game.current_turn = "finished", None
+    db_session.query(Player).filter(Player.game_id == started_game, Player.name == "Beto").delete()
+    db_session.info.clear()
+
+    assert recover_game(started_game, db_session) == 5
+    recovered = db_session.execute(select(Game.status, Game.current_turn).where(Game.game_id == started_game)).one()
+    assert tuple(recovered) == ("in course", 1)
+    assert {p.name for p in db_session.query(Player).filter(Player.game_id == started_game)} == {"Ana", "Beto"}
+
+
+def test_commit_does_not_wait_for_the_file(journal, db_session, started_game, monkeypatch):
+    release = threading.Event()
+    append_now = journal._append_now
+
+    def slow_disk(game_id, record):
+        release.wait(5)
+        append_now(game_id, record)
+
+    monkeypatch.setattr(journal, "_append_now", slow_disk)
+    db_session.get(Game, started_game).name = "Sin esperar"
+    start = time.perf_counter()
+    db_session.commit()
+    assert time.perf_counter() - start < 1
+
+    release.set()
+    assert journal.records(started_game)[-1]["rows"]["games"][0]["name"] == "Sin esperar"
+
+
+def test_deleted_game_takes_its_journal_with_it(journal, client, db_session, monkeypatch, started_game):
+    monkeypatch.setattr(journal_module, "SNAPSHOT_EVERY", 4)
+    with patch("src.routes.games_routes.broadcast_available_games", new_callable=AsyncMock):
+        other = client.post("/games", json={"name": "Otra", "max_players": 4, "min_players": 2, "status": "waiting players"}).json()["game_id"]
+    db_session.get(Game, started_game).name = "Con foto"
+    db_session.commit()
+    assert journal.snapshot(started_game)["seq"] == 4
+
+    with patch("src.routes.games_routes.broadcast_available_games", new_callable=AsyncMock):
+        assert client.delete(f"/game/{started_game}").status_code == 204
+
+    assert journal.records(started_game) == []
+    assert journal.snapshot(started_game) == {"seq": 0, "state": {}}
+    # recuperarla no la revive
+    recover_game(started_game, db_session)
+    assert db_session.get(Game, started_game) is None
+    assert len(journal.records(other)) == 1
@@ -0,0 +1,109 @@
+import datetime
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import event
+from src.database.models import Game
+from src.database.services.services_lobby import encode_cursor, query_games, subscribe, unsubscribe
+from src.database.services.services_websockets import broadcast_available_games
+from src.schemas.games_schemas import Games_Query
+
+
+@pytest.fixture
+def lobby(db_session):
+    start = datetime.datetime(2025, 1, 1, 12, 0)
+    games = [
+        Game(name=f"Mesa {i}", status="waiting players" if i % 3 else "in course", max_players=6, min_players=2,
+             players_amount=i % 6, created_at=start + datetime.timedelta(minutes=i // 2))
+        for i in range(25)
+    ]
+    db_session.add_all(games)
+    db_session.commit()
+    # el cliente cierra la sesión después de cada request: se guardan los valores, no los objetos
+    return [
+        {"game_id": g.game_id, "status": g.status, "created_at": g.created_at, "free": g.max_players - g.players_amount}
+        for g in games
+    ]
+
+
+def _walk(client, **query):
+    seen, cursor = [], None
+    while True:
+        page = client.get("/lobby/games", params=dict(query, **({"cursor": cursor} if cursor else {}))).json()
+        seen += page["games"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("sort", ["created", "fill"])
+def test_pages_cover_every_game_once_in_order(client, lobby, sort):
+    games = _walk(client, sort=sort, limit=4, status="waiting players")
+
+    expected = [g for g in lobby if g["status"] == "waiting players"]
+    if sort == "created":
+        expected.sort(key=lambda g: (g["created_at"], g["game_id"]), reverse=True)
+    else:
+        expected.sort(key=lambda g: (g["free"], g["game_id"]))
+    assert [g["game_id"] for g in games] == [g["game_id"] for g in expected]
+
+
+def test_filters(client, lobby):
+    page = client.get("/lobby/games", params={"min_free_seats": 5, "name_prefix": "Mesa 1"}).json()
+
+    assert page["next_cursor"] is None
+    assert {g["name"] for g in page["games"]} == {"Mesa 1", "Mesa 12", "Mesa 13", "Mesa 18", "Mesa 19"}
+    assert all("log" not in g for g in page["games"])
+
+
+def test_name_prefix_is_not_a_pattern(client, lobby):
+    assert client.get("/lobby/games", params={"name_prefix": "M_sa"}).json()["games"] == []
+
+
+def test_invalid_cursor_is_400(client, lobby):
+    other_sort = client.get("/lobby/games", params={"sort": "fill", "limit": 2}).json()["next_cursor"]
+
+    assert client.get("/lobby/games", params={"cursor": "basura"}).status_code == 400
+    assert client.get("/lobby/games", params={"sort": "created", "cursor": other_sort}).status_code == 400
+
+
+@pytest.mark.parametrize("sort, value", [("created", None), ("created", 3), ("created", "no es fecha"), ("fill", None), ("fill", "3")])
+def test_cursor_with_a_bad_value_is_400(client, lobby, sort, value):
+    assert client.get("/lobby/games", params={"sort": sort, "cursor": encode_cursor(sort, value, 1)}).status_code == 400
+
+
+def test_availables_uses_the_same_query(client, db_session, lobby):
+    names = [g["name"] for g in client.get("/games/availables").json()]
+
+    games, cursor = query_games(db_session, Games_Query(status=["waiting players", "bootable"], limit=None))
+    assert cursor is None
+    assert names == [g.name for g in games]
+    assert len(names) == sum(g["status"] == "waiting players" for g in lobby)
+
+
+@pytest.mark.asyncio
+async def test_feed_sends_each_filtered_socket_its_page(db_session, lobby):
+    plain, filtered, same_filter = object(), object(), object()
+    params = Games_Query(status=["waiting players"], sort="fill", limit=3)
+    subscribe(filtered, params)
+    subscribe(same_filter, params)
+    statements = []
+    engine = db_session.get_bind().engine
+    on_execute = lambda conn, cursor, statement, *args: statements.append(statement)
+    try:
+        event.listen(engine, "before_cursor_execute", on_execute)
+        with patch("src.database.services.services_websockets.lobbyManager", new_callable=AsyncMock) as manager:
+            await broadcast_available_games(db_session)
+        event.remove(engine, "before_cursor_execute", on_execute)
+    finally:
+        unsubscribe(filtered)
+        unsubscribe(same_filter)
+
+    message, pages = manager.broadcast.call_args[0]
+    assert len(json.loads(message)) == len(lobby)
+    assert plain not in pages
+    assert pages[filtered] is pages[same_filter]
+    page = json.loads(pages[filtered])
+    assert len(page["games"]) == 3 and page["next_cursor"]
+    # la lista completa y una sola consulta para los dos sockets con el mismo filtro
+    assert sum("FROM games" in s for s in statements) == 2
@@ -0,0 +1,54 @@
+import asyncio
+import time
+import pytest
+from src.monitoring.loop_monitor import LoopWatchdog
+
+
+async def broadcast_fake_blocking():
+    # Simula una query síncrona dentro de un broadcast async
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_watchdog_captures_blocking_broadcast():
+    watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        await broadcast_fake_blocking()
+        await asyncio.sleep(0.1)  # dejamos que el latido registre el fin del bloqueo
+    finally:
+        watchdog.stop()
+
+    assert len(watchdog.incidents) == 1
+    incident = watchdog.incidents[0]
+    assert "broadcast:broadcast_fake_blocking" in incident["tag"]
+    assert incident["blocked_seconds"] >= 0.25
+    assert any("time.sleep(0.3)" in line for line in incident["stack"])
+    assert watchdog.max_lag >= 0.25
+
+    offenders = watchdog.report()["offenders"]
+    assert offenders[0]["tag"] == incident["tag"]
+    assert offenders[0]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_watchdog_ignores_short_callbacks():
+    watchdog = LoopWatchdog(threshold=0.2, interval=0.02)
+    watchdog.start()
+    try:
+        for _ in range(5):
+            time.sleep(0.01)
+            await asyncio.sleep(0.02)
+    finally:
+        watchdog.stop()
+
+    assert list(watchdog.incidents) == []
+
+
+def test_debug_loop_endpoint(client):
+    response = client.get("/debug/loop")
+    assert response.status_code == 200
+    data = response.json()
+    assert "offenders" in data
+    assert "incidents" in data
@@ -0,0 +1,85 @@
+import datetime
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.orm import Session
+from src.database.models import Game, Player
+from src.database.services.services_games import reserve_seat
+from src.database.services.services_matchmaking import candidate_games
+
+JOIN = {"name": "Ana", "birth_date": "2000-01-01"}
+
+
+@pytest.fixture(autouse=True)
+def no_lobby_broadcast():
+    with patch("src.routes.players_routes.broadcast_available_games", new_callable=AsyncMock) as broadcast:
+        yield broadcast
+
+
+def _game(db_session, players_amount, max_players=4, status="waiting players", minutes=0):
+    game = Game(name="Abierta", status=status, max_players=max_players, min_players=2, players_amount=players_amount,
+                created_at=datetime.datetime(2025, 1, 1, 12, minutes))
+    db_session.add(game)
+    db_session.commit()
+    return game.game_id
+
+
+def test_candidates_by_free_seats_then_wait(db_session):
+    newer_almost_full = _game(db_session, 3, minutes=10)
+    older_almost_full = _game(db_session, 3, minutes=5)
+    empty = _game(db_session, 0)
+    _game(db_session, 4)  # llena
+    _game(db_session, 1, status="in course")
+
+    assert candidate_games(db_session) == [older_almost_full, newer_almost_full, empty]
+
+
+def test_quick_join_fills_the_best_game(client, db_session):
+    game_id = _game(db_session, 3)
+    db_session.add(Player(name="Ana", host=True, game_id=game_id, birth_date=datetime.date(2000, 1, 1)))
+    db_session.commit()
+
+    response = client.post("/players/quick_join", json=JOIN)
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["created"] is False
+    assert body["game"]["game_id"] == game_id
+    assert body["game"]["players_amount"] == 4 and body["game"]["status"] == "Full"
+    assert body["player"]["name"] == "Ana (2)" and body["player"]["host"] is False
+
+
+def test_quick_join_creates_a_game_when_none_fits(client, db_session, no_lobby_broadcast):
+    _game(db_session, 4)
+
+    body = client.post("/players/quick_join", json=JOIN).json()
+
+    assert body["created"] is True
+    assert body["player"]["host"] is True
+    assert body["game"]["players_amount"] == 1 and body["game"]["status"] == "waiting players"
+    no_lobby_broadcast.assert_awaited_once()
+    assert client.post("/players/quick_join", json=JOIN).json()["game"]["game_id"] == body["game"]["game_id"]
+
+
+def test_seat_taken_in_between_moves_to_the_next_game(client, db_session):
+    contested = _game(db_session, 3)
+    other = _game(db_session, 2)
+
+    def taken_first(db, game_id, *criteria):
+        if game_id == contested:
+            # otro jugador se llevó el último lugar después de la consulta de candidatas
+            reserve_seat(db, contested)
+        return reserve_seat(db, game_id, *criteria)
+
+    with patch("src.database.services.services_matchmaking.reserve_seat", side_effect=taken_first):
+        body = client.post("/players/quick_join", json=JOIN).json()
+
+    assert body["game"]["game_id"] == other
+
+
+def test_reserve_seat_never_overfills(db_session):
+    game_id = _game(db_session, 1, max_players=2)
+    other = Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+
+    assert reserve_seat(db_session, game_id) == 2
+    assert reserve_seat(other, game_id) is None
+    assert db_session.get(Game, game_id).players_amount == 2
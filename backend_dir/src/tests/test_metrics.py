@@ -0,0 +1,65 @@
+import json
+import pytest
+from unittest.mock import AsyncMock
+from src.database.models import Game
+from src.monitoring.metrics import Histogram, Counter, message_type, BROADCAST_MESSAGES, REQUEST_LATENCY
+from src.webSocket.connection_manager import ConnectionManagerGames
+
+
+def test_histogram_render_is_cumulative():
+    histogram = Histogram("test_latency_seconds", "Latencia de prueba.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/games")
+    histogram.observe(0.5, route="/games")
+    histogram.observe(3, route="/games")
+
+    text = histogram.render()
+
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{route="/games",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/games",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/games",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/games"} 3' in text
+
+
+def test_counter_rejects_unknown_labels():
+    counter = Counter("test_total", "Contador de prueba.", ("type",))
+    with pytest.raises(ValueError):
+        counter.inc(route="/games")
+
+
+def test_message_type_reads_serialized_type():
+    assert message_type(json.dumps({"type": "playersState", "data": []})) == "playersState"
+    assert message_type(json.dumps([{"game_id": 1}]), "availableGames") == "availableGames"
+
+
+@pytest.mark.asyncio
+async def test_game_broadcast_is_measured_by_type():
+    manager = ConnectionManagerGames()
+    ws1, ws2 = AsyncMock(), AsyncMock()
+    await manager.connect(ws1, 1)
+    await manager.connect(ws2, 1)
+    before = BROADCAST_MESSAGES.value(manager="game", type="draftCards")
+
+    await manager.broadcast(json.dumps({"type": "draftCards", "data": []}), 1)
+
+    assert BROADCAST_MESSAGES.value(manager="game", type="draftCards") == before + 2
+    assert manager.connection_count() == 2
+
+
+def test_metrics_endpoint(client, db_session):
+    db_session.add_all([
+        Game(name="G1", status="waiting players", max_players=4, min_players=2, players_amount=1),
+        Game(name="G2", status="in course", max_players=4, min_players=2, players_amount=4),
+    ])
+    db_session.commit()
+    client.get("/games")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'games_by_status{status="waiting players"} 1' in body
+    assert 'games_by_status{status="in course"} 1' in body
+    assert 'ws_active_sockets{manager="game"}' in body
+    assert REQUEST_LATENCY.count(method="GET", route="/games", status="200") >= 1
@@ -0,0 +1,60 @@
+from sqlalchemy import create_engine, inspect, text
+from migrate_cards_single_table import migrate
+from src.database.card_catalog import definition_by_name
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE sets (set_id INTEGER PRIMARY KEY, name VARCHAR(30))",
+    "CREATE TABLE cards (card_id INTEGER PRIMARY KEY, type VARCHAR(15), picked_up BOOLEAN, dropped BOOLEAN, "
+    "player_id INTEGER, game_id INTEGER NOT NULL, draft BOOLEAN, discardInt INTEGER)",
+    "CREATE TABLE detectives (card_id INTEGER PRIMARY KEY REFERENCES cards(card_id), name VARCHAR(30), "
+    "quantity_set INTEGER, set_id INTEGER REFERENCES sets(set_id))",
+    "CREATE TABLE events (card_id INTEGER PRIMARY KEY REFERENCES cards(card_id), name VARCHAR(30))",
+]
+
+
+def _legacy_database():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        for ddl in LEGACY_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO sets VALUES (1, 'Hercule Poirot')"))
+        for card_id, card_type in ((1, "detective"), (2, "detective"), (3, "event"), (4, "event")):
+            conn.execute(text(
+                "INSERT INTO cards VALUES (:id, :type, 0, 0, NULL, 1, 0, 0)"
+            ), {"id": card_id, "type": card_type})
+        conn.execute(text("INSERT INTO detectives VALUES (1, 'Hercule Poirot', 3, 1)"))
+        conn.execute(text("INSERT INTO detectives VALUES (2, 'Sherlock', 2, NULL)"))
+        conn.execute(text("INSERT INTO events VALUES (3, 'Not so fast')"))
+        conn.execute(text("INSERT INTO events VALUES (4, 'Concierto')"))
+    return engine
+
+
+def test_migration_moves_cards_to_one_table():
+    engine = _legacy_database()
+
+    with engine.begin() as conn:
+        assert migrate(conn) is True
+
+    with engine.connect() as conn:
+        assert {"detectives", "events"}.isdisjoint(inspect(conn).get_table_names())
+        rows = conn.execute(text(
+            "SELECT card_id, definition_id, name, quantity_set, set_id FROM cards ORDER BY card_id"
+        )).all()
+
+    poirot = definition_by_name("detective", "Hercule Poirot").definition_id
+    nsf = definition_by_name("event", "Not so fast").definition_id
+    assert [tuple(row) for row in rows] == [
+        (1, poirot, None, None, 1),
+        (2, None, "Sherlock", 2, None),
+        (3, nsf, None, None, None),
+        (4, None, "Concierto", None, None),
+    ]
+
+
+def test_migration_is_idempotent():
+    engine = _legacy_database()
+    with engine.begin() as conn:
+        migrate(conn)
+
+    with engine.begin() as conn:
+        assert migrate(conn) is False
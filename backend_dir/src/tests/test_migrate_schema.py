@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, text
+from migrate_schema import LEGACY_CREATED_AT, _index_names, migrate
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE games (game_id INTEGER PRIMARY KEY, name VARCHAR(30) NOT NULL, status VARCHAR(50), "
+    "max_players INTEGER NOT NULL, min_players INTEGER NOT NULL, players_amount INTEGER NOT NULL)",
+    "CREATE TABLE active_trades (id INTEGER PRIMARY KEY, game_id INTEGER, player_one_id INTEGER, player_two_id INTEGER, "
+    "player_one_card_id INTEGER, player_two_card_id INTEGER)",
+]
+
+
+def _legacy_database():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        for ddl in LEGACY_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO games VALUES (1, 'Vieja', 'waiting players', 4, 2, 1)"))
+        conn.execute(text("INSERT INTO games VALUES (2, 'Otra', 'in course', 4, 2, 2)"))
+        conn.execute(text("INSERT INTO active_trades (id, game_id) VALUES (1, 2)"))
+    return engine
+
+
+def test_migration_adds_and_fills_the_new_columns():
+    engine = _legacy_database()
+
+    with engine.begin() as conn:
+        changes = migrate(conn)
+
+    assert {"games.created_at", "games.seed", "games.rng_draws", "games.finished_at", "active_trades.created_at"} <= set(changes)
+    assert {"archived_games", "game_snapshots"} <= set(changes)
+    with engine.connect() as conn:
+        games = conn.execute(text("SELECT created_at, seed, rng_draws, finished_at FROM games ORDER BY game_id")).all()
+        assert {game.created_at for game in games} == {str(LEGACY_CREATED_AT)}
+        assert None not in {game.seed for game in games} and games[0].seed != games[1].seed
+        assert {(game.rng_draws, game.finished_at) for game in games} == {(0, None)}
+        assert conn.execute(text("SELECT created_at FROM active_trades")).scalar_one() is not None
+        assert {"ix_games_status_created_at", "ix_games_status_free_seats"} <= _index_names(conn, "games")
+        assert "ix_active_trades_created_at" in _index_names(conn, "active_trades")
+
+
+def test_migration_runs_twice():
+    engine = _legacy_database()
+    with engine.begin() as conn:
+        migrate(conn)
+
+    with engine.begin() as conn:
+        assert migrate(conn) == []
@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.main import app
+from src.database.models import Game, Player
+from src.webSocket.outbox import Outbox, publish
+
+pytestmark = pytest.mark.asyncio
+
+
+def _game_in_course(db_session):
+    game = Game(name="Outbox", status="in course", max_players=4, min_players=2, players_amount=2, current_turn=1)
+    db_session.add(game)
+    db_session.commit()
+    for i in range(2):
+        db_session.add(Player(name=f"Jugador {i}", host=(i == 0), game_id=game.game_id,
+                              birth_date=datetime.date(2000, 1, 1), turn_order=i + 1))
+    db_session.commit()
+    return game.game_id
+
+
+async def test_same_broadcast_is_delivered_once():
+    broadcast = AsyncMock()
+    outbox = Outbox()
+
+    outbox.record(broadcast, 1)
+    outbox.record(broadcast, 1)
+    outbox.record(broadcast, 2)
+    await outbox.drain()
+
+    assert [call.args for call in broadcast.await_args_list] == [(1,), (2,)]
+
+
+async def test_failing_broadcast_does_not_stop_the_rest():
+    failing = AsyncMock(side_effect=RuntimeError("socket caído"))
+    other = AsyncMock()
+    outbox = Outbox()
+
+    outbox.record(failing, 1)
+    outbox.record(other, 1)
+    await outbox.drain()
+
+    other.assert_awaited_once_with(1)
+    assert outbox.pending == []
+
+
+async def test_broadcasts_go_out_after_the_response(client, db_session):
+    game_id = _game_in_course(db_session)
+    events = []
+
+    async def slow_broadcast(game_id):
+        events.append("broadcast")
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        events.append(message["type"])
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "PUT",
+        "scheme": "http", "path": f"/game/update_turn/{game_id}", "raw_path": b"", "root_path": "",
+        "query_string": b"", "headers": [], "client": ("test", 1), "server": ("test", 80),
+    }
+    with patch("src.routes.games_routes.broadcast_game_information", side_effect=slow_broadcast):
+        await app(scope, receive, send)
+
+    # la respuesta entera sale antes que el broadcast
+    assert events[0] == "http.response.start"
+    assert events[-1] == "broadcast"
+    assert events.count("broadcast") == 1
+
+
+async def test_broadcast_failure_keeps_committed_changes(client, db_session):
+    game_id = _game_in_course(db_session)
+
+    with patch("src.routes.games_routes.broadcast_game_information",
+               new_callable=AsyncMock, side_effect=RuntimeError("socket caído")) as mock_broadcast:
+        response = client.put(f"/game/update_turn/{game_id}")
+
+    assert response.status_code == 202
+    mock_broadcast.assert_awaited_once_with(game_id)
+    assert db_session.get(Game, game_id).current_turn == 2
+
+
+async def test_publish_outside_a_request_runs_in_background():
+    broadcast = AsyncMock()
+
+    publish(broadcast, 7)
+    broadcast.assert_not_awaited()
+
+    # le damos una vuelta al loop para que corra la tarea
+    await asyncio.sleep(0)
+    broadcast.assert_awaited_once_with(7)
@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+import time
+import pytest
+from unittest.mock import AsyncMock
+from src.database import game_snapshot
+from src.database.game_snapshot import write_snapshot
+from src.database.models import ActiveTrade, ArchivedGame, Card, Game, Player
+from src.database.services import services_reaper
+from src.database.services.services_archive import load_archive
+from src.database.services.services_reaper import REAPED_GAMES, REAPED_ROWS, reap
+from src.webSocket.connection_manager import gameManager
+
+NOW = datetime.datetime(2025, 6, 1, 12, 0)
+
+
+@pytest.fixture
+def game(create_game, db_session):
+    def create(name, created_at, start=False):
+        game_id = create_game(name, start=start)
+        db_session.get(Game, game_id).created_at = created_at
+        db_session.commit()
+        return game_id
+    return create
+
+
+@pytest.fixture
+def empty_rooms():
+    yield gameManager.emptied_at
+    gameManager.emptied_at.clear()
+
+
+def test_lobby_games_past_their_ttl_are_deleted(game, db_session):
+    old = game("Vieja", NOW - datetime.timedelta(hours=2))
+    fresh = game("Nueva", NOW - datetime.timedelta(minutes=5))
+    rows_before = REAPED_ROWS.value(table="players")
+    games_before = REAPED_GAMES.value(reason="lobby")
+
+    reaped = reap(db_session, now=NOW)
+
+    assert reaped["lobby"] == [old]
+    assert db_session.get(Game, old) is None
+    assert db_session.query(Player).filter(Player.game_id == old).count() == 0
+    assert db_session.get(Game, fresh).status == "bootable"
+    assert REAPED_ROWS.value(table="players") - rows_before == 2
+    assert REAPED_GAMES.value(reason="lobby") - games_before == 1
+
+
+def test_lobby_games_with_players_connected_are_kept(game, db_session):
+    old = game("Vieja", NOW - datetime.timedelta(hours=2))
+    gameManager.active_connections[old].append(object())
+    try:
+        reaped = reap(db_session, now=NOW)
+    finally:
+        del gameManager.active_connections[old]
+
+    assert reaped["lobby"] == []
+    assert db_session.get(Game, old) is not None
+
+
+def test_games_unknown_after_a_restart_start_counting(game, db_session, empty_rooms):
+    # en curso y sin sockets, pero el proceso no vio vaciarse la sala
+    playing = game("Sin dueño", NOW, start=True)
+    lobby = game("Lobby", NOW)
+    empty_rooms[lobby] = 0.0  # ya no está en curso (o nunca lo estuvo): se deja de seguir
+
+    assert reap(db_session, now=NOW)["abandoned"] == []
+    assert set(empty_rooms) == {playing}
+
+    empty_rooms[playing] -= services_reaper.REAPER_ABANDONED_TTL + 1
+    assert reap(db_session, now=NOW)["abandoned"] == [playing]
+    assert empty_rooms == {}
+
+
+def test_games_without_sockets_are_finished_and_archived(game, db_session, empty_rooms, monkeypatch):
+    abandoned = game("Abandonada", NOW, start=True)
+    watched = game("Mirada", NOW, start=True)
+    # foto al día de la partida en curso: el archivo no la usa, la partida termina en el mismo reap
+    monkeypatch.setattr(game_snapshot, "_dirty", set())
+    write_snapshot(abandoned, db_session)
+    db_session.commit()
+    empty_rooms[abandoned] = time.monotonic() - services_reaper.REAPER_ABANDONED_TTL - 1
+    empty_rooms[watched] = time.monotonic()
+
+    reaped = reap(db_session, now=NOW)
+
+    assert reaped["abandoned"] == [abandoned]
+    assert db_session.query(Card).filter(Card.game_id == abandoned).count() == 0
+    assert db_session.get(ArchivedGame, abandoned).finished_at == NOW
+    assert load_archive(abandoned, db_session)["state"]["games"][str(abandoned)]["status"] == "finished"
+    assert db_session.get(Game, watched).status == "in course"
+    assert abandoned not in empty_rooms
+
+
+def test_broadcast_to_an_emptied_room_does_not_keep_it_alive(game, db_session, empty_rooms):
+    abandoned = game("Abandonada", NOW, start=True)
+    lobby = game("Vieja", NOW - datetime.timedelta(hours=2))
+    for game_id in (abandoned, lobby):
+        socket = AsyncMock()
+        asyncio.run(gameManager.connect(socket, game_id))
+        gameManager.disconnect(socket, game_id)
+        # p. ej. el broadcast_game_information que manda el reaper al limpiar un trade
+        asyncio.run(gameManager.broadcast('{"type": "gameUpdated"}', game_id))
+    empty_rooms[abandoned] -= services_reaper.REAPER_ABANDONED_TTL + 1
+
+    reaped = reap(db_session, now=NOW)
+
+    assert reaped["abandoned"] == [abandoned]
+    assert reaped["lobby"] == [lobby]
+    assert abandoned not in gameManager.active_connections and lobby not in gameManager.active_connections
+
+
+def test_stale_and_orphan_trades_are_removed(game, db_session):
+    playing = game("En curso", NOW, start=True)
+    ana, beto = db_session.query(Player).filter(Player.game_id == playing).order_by(Player.player_id).all()
+    ana.pending_action = beto.pending_action = "SELECT_TRADE_CARD"
+    stale = ActiveTrade(game_id=playing, player_one_id=ana.player_id, player_two_id=beto.player_id,
+                        created_at=NOW - datetime.timedelta(hours=1))
+    db_session.add(stale)
+    db_session.commit()
+
+    reaped = reap(db_session, now=NOW)
+
+    assert reaped["trade_games"] == [playing]
+    assert db_session.query(ActiveTrade).count() == 0
+    assert {p.pending_action for p in db_session.query(Player).filter(Player.game_id == playing)} == {None}
+
+    # un trade reciente de una partida que ya terminó también sobra
+    db_session.add(ActiveTrade(game_id=playing, player_one_id=ana.player_id, player_two_id=beto.player_id, created_at=NOW))
+    db_session.get(Game, playing).status = "finished"
+    db_session.commit()
+    reap(db_session, now=NOW)
+    assert db_session.query(ActiveTrade).count() == 0
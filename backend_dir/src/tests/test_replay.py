@@ -0,0 +1,42 @@
+import pytest
+from src.database import journal as journal_module
+from src.database.journal import GameJournal, diff_states
+from src.simulation.replay import latency_profile, replay_games
+
+
+@pytest.fixture
+def recorded_game(client, create_game, tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_module, "journal", GameJournal(str(tmp_path)))
+    game_id = create_game("Replay", players=("Ana", "Beto", "Caro"))
+    client.put(f"/game/update_turn/{game_id}")
+    return str(tmp_path), game_id
+
+
+def test_replay_matches_the_recorded_game(recorded_game):
+    journal_dir, game_id = recorded_game
+
+    [result] = replay_games(journal_dir, [game_id], processes=1, check_every_action=True)
+
+    assert result["failed"] == [] and result["diffs"] == []
+    assert result["consistent"]
+    assert result["actions"] == 6
+    profile = latency_profile([result])
+    assert profile["/players"]["count"] == 3
+    assert profile["/game/beginning/{game_id}"]["max"] > 0
+
+
+def test_replay_reports_state_differences(recorded_game):
+    journal_dir, game_id = recorded_game
+    recorded = GameJournal(journal_dir)
+    recorded.append(game_id, {"request": None, "action": None, "rows": {"games": [{"game_id": game_id, "name": "Otro"}]}, "deleted": {}})
+
+    [result] = replay_games(journal_dir, [game_id], processes=1)
+
+    # los registros sin request se copian: el replay termina igual que lo grabado
+    assert result["consistent"]
+
+    expected = {"games": {str(game_id): {"game_id": game_id, "name": "Otro"}}}
+    actual = {"games": {str(game_id): {"game_id": game_id, "name": "Replay"}}}
+    assert diff_states(expected, actual) == [
+        {"table": "games", "pk": str(game_id), "column": "name", "expected": "Otro", "actual": "Replay"}
+    ]
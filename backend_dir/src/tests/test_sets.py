@@ -7,7 +7,8 @@ from unittest.mock import patch, ANY
 from sqlalchemy.orm import Session # Importa Session para el patch
 
 # Import models
-from src.database.models import Game, Player, Detective, Set, Card
+from src.database.models import Game, Player, Detective, Set, Card, Log
+from src.database.services.services_cards import register_cancelable_set
 
 # --- Fixture de Setup Mejorada ---
 
@@ -86,6 +87,14 @@ def test_set_of2_beresford_brothers(client, setup_data):
     data = response.json() # <-- ARREGLO: Definir 'data'
     assert data["name"] == "Beresford brothers"
 
+def test_set_of2_satterthwaite_with_wildcard(client, setup_data):
+    """Satterthwaite + comodín crea un solo set, con el nombre especial."""
+    db = setup_data
+    response = client.post("/sets_of2/13,14") # P2: Wildcard + Satterthwaite
+    assert response.status_code == 201
+    assert response.json()["name"] == "Mr Satterthwaite + Harley Quin"
+    assert db.query(Set).filter(Set.player_id == 2).count() == 1
+
 def test_set_of2_invalid_card_id(client, setup_data):
     response = client.post("/sets_of2/1,99")
     assert response.status_code == 400
@@ -311,3 +320,37 @@ def test_add_detective_fail_invalid_ids(client, setup_data):
     response2 = client.put(f"/add/detective/1/99")
     assert response2.status_code == 400
     assert "Invalid card or set id" in response2.json()["detail"]
+
+
+# --- Tests para sets legales de la mano ---
+
+def test_legal_sets_in_hand(client, setup_data):
+    response = client.get("/sets/legal/2") # Marple, Wildcard, Satterthwaite, Tuppence
+    assert response.status_code == 200
+    # Marple necesita 3 cartas y Satterthwaite + Tuppence no son compatibles
+    assert response.json() == [
+        {"name": "Mr Satterthwaite + Harley Quin", "card_ids": [13, 14]},
+        {"name": "Tuppence Beresford", "card_ids": [13, 15]},
+    ]
+
+
+def test_legal_sets_dedupe_same_cards(client, setup_data):
+    response = client.get("/sets/legal/1")
+    assert response.status_code == 200
+    names = [s["name"] for s in response.json()]
+    # Parker x2 y Parker + comodín son combinaciones distintas; Parker(1) y Parker(2) con el comodín son la misma
+    assert names.count("Parker Pyne") == 2
+    assert "Beresford brothers" in names
+    assert "Mr Satterthwaite + Harley Quin" in names
+    assert "Miss Marple" not in names # las Marple del P1 ya están en un set
+
+
+
+def test_cancelable_set_is_committed_by_the_route(client, setup_data):
+    with patch.object(setup_data, "commit", side_effect=AssertionError("el service no commitea")):
+        assert register_cancelable_set(1, setup_data) == 1
+
+    with patch("src.routes.log_routes.broadcast_last_cancelable_set"), \
+         patch("src.routes.log_routes.broadcast_game_information"):
+        assert client.post("/set/Not_so_fast/1").status_code == 200
+    assert setup_data.query(Log).filter(Log.set_id == 1, Log.type == "Set").count() == 2
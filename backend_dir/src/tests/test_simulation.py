@@ -0,0 +1,34 @@
+from collections import Counter
+from simulate_games import simulate
+from src.simulation.engine import HAND_SIZE, new_game, play_game
+
+
+def test_new_game_deals_like_initialize_game():
+    game = new_game(5, seed=1)
+
+    assert all(len(hand) == HAND_SIZE for hand in game.hands.values())
+    assert all(sum(c.name == "Not so fast" for c in hand) >= 1 for hand in game.hands.values())
+    assert len(game.draft) == 3
+    assert len(game.deck) == 61 - 5 * HAND_SIZE - 3
+
+    owners = Counter(s.owner for s in game.secrets)
+    assert set(owners.values()) == {3}
+    murderer = next(s.owner for s in game.secrets if s.murderer)
+    acomplice = next(s.owner for s in game.secrets if s.acomplice)
+    assert murderer != acomplice
+
+
+def test_same_seed_plays_the_same_game():
+    first, second = play_game(4, seed=7), play_game(4, seed=7)
+
+    assert first.finished is not None
+    assert (first.finished, first.turn, first.paths) == (second.finished, second.turn, second.paths)
+
+
+def test_simulate_reports_totals():
+    report = simulate(40, players=0, processes=1)
+
+    assert report["games"] == 40
+    assert report["average_turns"] > 0
+    assert sum(report["paths"][p] for p in report["paths"] if p.startswith("end:")) == 40
+    assert 0 < report["coverage"] <= 1
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from src.database.models import Game
@@ -16,20 +17,24 @@ def mock_websocket():
 
 @pytest.fixture
 def mock_db():
-    return MagicMock()
+    # Los websockets abren su propia sesión corta con SessionLocal
+    db = MagicMock()
+    with patch('src.routes.websocket_routes.SessionLocal', return_value=db):
+        yield db
 
 # Parcheamos las dependencias de la ruta: el manager y la función de servicio
 @patch('src.routes.websocket_routes.broadcast_available_games', new_callable=AsyncMock)
 @patch('src.routes.websocket_routes.lobbyManager', new_callable=AsyncMock)
 async def test_ws_available_games_flow(mock_lobby_manager, mock_broadcast, mock_websocket, mock_db):
     # Llamamos a la función de la ruta como si FastAPI lo hiciera
-    await ws_available_games(websocket=mock_websocket, db=mock_db)
+    await ws_available_games(websocket=mock_websocket)
     
     # 1. Verificar la conexión inicial
     mock_lobby_manager.connect.assert_awaited_once_with(mock_websocket)
     
     # 2. Verificar que se envían los datos iniciales
     mock_broadcast.assert_awaited_once_with(mock_db)
+    mock_db.close.assert_called_once()
     
     # 3. Verificar la desconexión
     # El receive_text lanza una excepción simulada, lo que debe llevar al bloque finally
@@ -42,7 +47,7 @@ async def test_ws_list_players_game_not_found(mock_game_manager, mock_websocket,
     # Simular que la DB no encuentra la partida
     mock_db.query.return_value.filter.return_value.first.return_value = None
 
-    await ws_list_players(websocket=mock_websocket, game_id=game_id, db=mock_db)
+    await ws_list_players(websocket=mock_websocket, game_id=game_id)
 
     # Verificar que la conexión se cierra con el código de error correcto
     mock_websocket.close.assert_awaited_once_with(code=4004, reason="Game not found")
@@ -63,7 +68,7 @@ async def test_ws_list_players_success_flow(mock_game_manager, mock_broadcast_lo
     mock_db.query.return_value.filter.return_value.first.return_value = mock_game
 
     # 2. Act: Llamamos a la función de la ruta
-    await ws_list_players(websocket=mock_websocket, game_id=game_id, db=mock_db)
+    await ws_list_players(websocket=mock_websocket, game_id=game_id)
 
     # 3. Assert
     
@@ -75,11 +80,36 @@ async def test_ws_list_players_success_flow(mock_game_manager, mock_broadcast_lo
     
     # Verificar que se llamó al broadcast inicial
     mock_broadcast_lobby.assert_awaited_once_with(mock_db, game_id)
+    mock_db.close.assert_called_once()
     
     # Verificar que el cliente se desconectó al final (por el side_effect)
     mock_game_manager.disconnect.assert_called_once_with(mock_websocket, game_id)
 
 
+@patch('src.routes.websocket_routes.gameManager', new_callable=AsyncMock)
+async def test_ws_list_players_closes_the_session_if_the_handshake_fails(mock_game_manager, mock_websocket, mock_db):
+    mock_db.query.side_effect = Exception("DB caída")
+
+    with pytest.raises(Exception, match="DB caída"):
+        await ws_list_players(websocket=mock_websocket, game_id=1)
+
+    mock_db.close.assert_called_once()
+    mock_game_manager.connect.assert_not_awaited()
+
+
+@patch('src.routes.websocket_routes.broadcast_lobby_information', new_callable=AsyncMock)
+@patch('src.routes.websocket_routes.gameManager', new_callable=AsyncMock)
+async def test_ws_list_players_initial_broadcast_fails(mock_game_manager, mock_broadcast_lobby, mock_websocket, mock_db):
+    mock_db.query.return_value.filter.return_value.first.return_value = Game(game_id=1, name="Test Game", status="waiting players")
+    mock_broadcast_lobby.side_effect = Exception("DB caída")
+
+    await ws_list_players(websocket=mock_websocket, game_id=1)
+
+    mock_db.close.assert_called_once()
+    mock_game_manager.disconnect.assert_called_once_with(mock_websocket, 1)
+    mock_websocket.receive_text.assert_not_awaited()
+
+
 # --- Tests para ws_info_from_game ---
 
 @patch('src.routes.websocket_routes.gameManager', new_callable=AsyncMock)
@@ -93,7 +123,7 @@ async def test_ws_info_from_game_not_found(mock_game_manager, mock_websocket, mo
     mock_db.query.return_value.filter.return_value.first.return_value = None
 
     # 2. Act
-    await ws_info_from_game(websocket=mock_websocket, game_id=game_id, db=mock_db)
+    await ws_info_from_game(websocket=mock_websocket, game_id=game_id)
 
     # 3. Assert
     # Verificar que la conexión se cierra con el código de error
@@ -116,7 +146,7 @@ async def test_ws_info_from_game_success_flow(mock_game_manager, mock_broadcast_
     mock_db.query.return_value.filter.return_value.first.return_value = mock_game
 
     # 2. Act
-    await ws_info_from_game(websocket=mock_websocket, game_id=game_id, db=mock_db)
+    await ws_info_from_game(websocket=mock_websocket, game_id=game_id)
 
     # 3. Assert
     
@@ -129,6 +159,66 @@ async def test_ws_info_from_game_success_flow(mock_game_manager, mock_broadcast_
     # Verificar que se llamaron AMBOS broadcasts iniciales
     mock_broadcast_game.assert_awaited_once_with(game_id)
     mock_broadcast_draft.assert_awaited_once_with(game_id)
+    mock_db.close.assert_called_once()
     
     # Verificar que el cliente se desconectó al final
-    mock_game_manager.disconnect.assert_called_once_with(mock_websocket, game_id)
\ No newline at end of file
+    mock_game_manager.disconnect.assert_called_once_with(mock_websocket, game_id)
+
+# --- Los sockets inactivos no retienen conexiones del pool ---
+
+@patch('src.routes.websocket_routes.broadcast_card_draft', new_callable=AsyncMock)
+@patch('src.routes.websocket_routes.broadcast_game_information', new_callable=AsyncMock)
+@patch('src.routes.websocket_routes.gameManager', new_callable=AsyncMock)
+async def test_idle_sockets_do_not_hold_sessions(mock_game_manager, mock_broadcast_game, mock_broadcast_draft):
+    sockets_amount = 2000
+    open_sessions = 0
+    max_open_sessions = 0
+    game = Game(game_id=1, name="Carga", status="in course")
+
+    class FakeSession:
+        # lo mínimo que usa el handshake: buscar la partida y el historial del chat
+        def __init__(self):
+            nonlocal open_sessions, max_open_sessions
+            open_sessions += 1
+            max_open_sessions = max(max_open_sessions, open_sessions)
+
+        def query(self, *args):
+            result = MagicMock()
+            result.filter.return_value.first.return_value = game
+            return result
+
+        def execute(self, *args):
+            result = MagicMock()
+            result.scalars.return_value.all.return_value = []
+            return result
+
+        def close(self):
+            nonlocal open_sessions
+            open_sessions -= 1
+
+    listening = 0
+    disconnect = asyncio.Event()
+
+    class FakeSocket:
+        async def send_text(self, text):
+            pass
+
+        async def receive_text(self):
+            nonlocal listening
+            listening += 1
+            await disconnect.wait()
+            raise Exception("Client disconnected")
+
+    with patch('src.routes.websocket_routes.SessionLocal', FakeSession):
+        tasks = [asyncio.create_task(ws_info_from_game(websocket=FakeSocket(), game_id=1)) for _ in range(sockets_amount)]
+        while listening < sockets_amount:
+            await asyncio.sleep(0)
+
+        # todos los clientes conectados y esperando: ninguna sesión abierta
+        assert open_sessions == 0
+        disconnect.set()
+        await asyncio.gather(*tasks)
+
+    # cada handshake usa una sola sesión y la suelta antes de la siguiente
+    assert max_open_sessions == 1
+    assert mock_game_manager.disconnect.call_count == sockets_amount
@@ -4,8 +4,8 @@ import pytest
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from sqlalchemy import false
-from src.database.models import Game, Player, Card, Event, Secrets, Set # Importa tus modelos
+from sqlalchemy import event, false
+from src.database.models import Game, Player, Card, Detective, Event, Secrets, Set # Importa tus modelos
 from src.database.services.services_websockets import broadcast_available_games, broadcast_game_information, broadcast_last_discarted_cards, broadcast_lobby_information, broadcast_last_cancelable_event,broadcast_last_cancelable_set, broadcast_blackmailed, broadcast_card_draft, broadcast_player_state
 
 pytestmark = pytest.mark.asyncio
@@ -470,4 +470,60 @@ async def test_broadcast_last_cancelable_set(mock_session_local, mock_game_manag
     assert data['type'] == 'setResponse'
     assert data['data']['name'] == 'Set de Poirot'
     assert data['data']['set_id'] == set_id
-    assert call_args[1] == game_id
\ No newline at end of file
+    assert call_args[1] == game_id
+
+# --- Test de cantidad de queries para playersState ---
+
+@pytest.fixture
+def six_player_game(db_session):
+    game = Game(name="Seis", status="in course", max_players=6, min_players=2, players_amount=6)
+    db_session.add(game)
+    db_session.commit()
+    for i in range(6):
+        player = Player(name=f"Jugador {i}", host=(i == 0), game_id=game.game_id,
+                        birth_date=datetime.date(2000, 1, 1), turn_order=i + 1)
+        db_session.add(player)
+        db_session.flush()
+        game_set = Set(name="Tommy Beresford", player_id=player.player_id, game_id=game.game_id)
+        db_session.add(game_set)
+        db_session.flush()
+        for _ in range(2):
+            db_session.add(Detective(name="Tommy Beresford", quantity_set=2, game_id=game.game_id,
+                                     player_id=player.player_id, set_id=game_set.set_id,
+                                     picked_up=True, dropped=True))
+        for j in range(4):
+            db_session.add(Detective(name="Hercule Poirot", quantity_set=3, game_id=game.game_id,
+                                     player_id=player.player_id, picked_up=True, dropped=False))
+        db_session.add(Event(name="Not so fast", game_id=game.game_id, player_id=player.player_id,
+                             picked_up=True, dropped=False))
+        for _ in range(3):
+            db_session.add(Secrets(murderer=False, acomplice=False, revelated=False,
+                                   player_id=player.player_id, game_id=game.game_id))
+    db_session.commit()
+    game_id = game.game_id
+    # sin nada en el identity map, como le llega a una sesión nueva
+    db_session.expunge_all()
+    return game_id
+
+
+@patch('src.database.services.services_websockets.gameManager', new_callable=AsyncMock)
+async def test_broadcast_player_state_statement_count(mock_game_manager, db_session, six_player_game):
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_session.get_bind().engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        with patch('src.database.services.services_websockets.SessionLocal', return_value=db_session):
+            await broadcast_player_state(six_player_game)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    # jugadores + cartas (con Detective/Event) + secretos + sets + detectives de los sets
+    assert len(statements) == 5
+    data = json.loads(mock_game_manager.broadcast.await_args.args[0])["data"]
+    assert len(data) == 6
+    assert all(len(p["cards"]) == 5 and len(p["secrets"]) == 3 for p in data)
+    assert all(len(p["sets"][0]["detective"]) == 2 for p in data)
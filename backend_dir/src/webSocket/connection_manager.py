@@ -1,6 +1,8 @@
+import time
 from collections import defaultdict
 from typing import List, Dict
 from fastapi import APIRouter, WebSocket 
+from src.monitoring.metrics import message_type, observe_broadcast
 
 ws = APIRouter()
 
@@ -15,17 +17,22 @@ class ConnectionManagerLobby: # ESTE MANEJA LA LISTA DE PARTIDAS DISPONIBLES
     def disconnect(self, websocket: WebSocket):
         self.active_connections.remove(websocket)
 
-    async def broadcast(self, message: str):
+    async def broadcast(self, message: str, pages: Dict[WebSocket, str] = None):
+        """`pages`: mensaje propio de los sockets que pidieron el listado con filtros (services_lobby.py)."""
+        start = time.perf_counter()
+        recipients = len(self.active_connections)
         disconnected = []
         for connection in self.active_connections:
             try:
-                await connection.send_text(message)
+                await connection.send_text(pages.get(connection, message) if pages else message)
             except Exception:
                 # Si la conexión está cerrada, la marcamos para remover
                 disconnected.append(connection)
         # Removemos las conexiones cerradas
         for conn in disconnected:
             await self.disconnect(conn)
+        # el lobby manda la lista de partidas sin envoltorio {"type": ...}
+        observe_broadcast("lobby", message_type(message, "availableGames"), message, recipients, time.perf_counter() - start)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
@@ -37,17 +44,53 @@ lobbyManager = ConnectionManagerLobby()
 class ConnectionManagerGames :  # ESTE MANEJA SALA DE ESPERA Y PARTIDA EN JUEGO
     def __init__(self): 
         self.active_connections : Dict[int, List[WebSocket]] = defaultdict(list)
+        self.emptied_at : Dict[int, float] = {}  # partidas que se quedaron sin sockets, desde cuándo (monotonic)
 
     async def connect (self, websocket : WebSocket, game_id : int) : 
         await websocket.accept() 
         self.active_connections[game_id].append(websocket)
+        self.emptied_at.pop(game_id, None)
     def disconnect (self, websocket : WebSocket, game_id : int) : 
         self.active_connections[game_id].remove(websocket)
         if not self.active_connections[game_id]:
             del self.active_connections[game_id]
+            self.emptied_at[game_id] = time.monotonic()
+
+    def mark_empty(self, *game_ids: int):
+        """Partidas sin sockets que nunca tuvieron uno en este proceso (p. ej. después de reiniciar): el plazo corre desde ahora."""
+        now = time.monotonic()
+        for game_id in game_ids:
+            if not self.is_connected(game_id):
+                self.emptied_at.setdefault(game_id, now)
+
+    def empty_since(self, seconds: float) -> List[int]:
+        """Partidas sin ningún socket conectado desde hace más de `seconds`."""
+        cutoff = time.monotonic() - seconds
+        # copia: el reaper lo llama desde otro hilo mientras los sockets se conectan y desconectan
+        return [
+            game_id for game_id, emptied in list(self.emptied_at.items())
+            if emptied <= cutoff and not self.is_connected(game_id)
+        ]
+
+    def is_connected(self, game_id: int) -> bool:
+        # .get: leer active_connections[game_id] del defaultdict agregaría una lista vacía
+        return bool(self.active_connections.get(game_id))
+
+    def connected_games(self) -> List[int]:
+        """Partidas con al menos un socket conectado."""
+        return [game_id for game_id, connections in list(self.active_connections.items()) if connections]
+
+    def forget(self, game_id: int):
+        self.emptied_at.pop(game_id, None)
 
     async def broadcast (self, message : str, game_id : int) : 
-        for connection in self.active_connections[game_id]: 
+        start = time.perf_counter()
+        connections = self.active_connections.get(game_id, [])
+        for connection in connections: 
             await connection.send_text(message)   
+        observe_broadcast("game", message_type(message), message, len(connections), time.perf_counter() - start)
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in self.active_connections.values())
 
 gameManager = ConnectionManagerGames() 
\ No newline at end of file
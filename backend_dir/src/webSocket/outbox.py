@@ -0,0 +1,97 @@
+"""
+Outbox de broadcasts.
+
+Las rutas no mandan los broadcasts mientras atienden la request: los anotan con
+`publish(broadcast_..., game_id)` (o los encolan en la transacción con
+`unit_of_work.after_commit`, que los publica cuando se commitea). `OutboxMiddleware`
+le da a cada request HTTP su propia outbox y la vacía recién cuando la respuesta
+ya salió, así que el tiempo de respuesta no depende de cuántos sockets tenga la
+sala ni de lo lentos que sean.
+
+Un mismo broadcast con los mismos argumentos se manda una sola vez por request
+(dos cambios de la misma partida se resuelven con un único broadcast_game_information).
+Si un broadcast falla se registra y se sigue con el resto: la transacción ya está
+commiteada y no hay nada que deshacer.
+"""
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger("src.webSocket.outbox")
+
+Broadcast = Callable[..., Awaitable]
+
+
+class Outbox:
+    def __init__(self):
+        self.pending: List[Tuple[Broadcast, tuple]] = []
+
+    def record(self, broadcast: Broadcast, *args):
+        if (broadcast, args) not in self.pending:
+            self.pending.append((broadcast, args))
+
+    async def drain(self):
+        while self.pending:
+            broadcast, args = self.pending.pop(0)
+            await deliver(broadcast, *args)
+
+
+_current: ContextVar[Optional[Outbox]] = ContextVar("outbox", default=None)
+
+
+def current_outbox() -> Optional[Outbox]:
+    return _current.get()
+
+
+_muted = 0
+
+
+@contextmanager
+def muted():
+    """Mientras dure no sale ningún broadcast del proceso (herramientas offline, como el replay de partidas)."""
+    global _muted
+    _muted += 1
+    try:
+        yield
+    finally:
+        _muted -= 1
+
+
+async def deliver(broadcast: Broadcast, *args):
+    if _muted:
+        return
+    try:
+        await broadcast(*args)
+    except Exception:
+        logger.exception("Falló el broadcast %s%s", getattr(broadcast, "__name__", broadcast), args)
+
+
+def publish(broadcast: Broadcast, *args):
+    """Anota el broadcast para después de la respuesta; fuera de una request se lanza en segundo plano."""
+    outbox = current_outbox()
+    if outbox is not None:
+        outbox.record(broadcast, *args)
+    else:
+        asyncio.get_running_loop().create_task(deliver(broadcast, *args))
+
+
+class OutboxMiddleware:
+    """Middleware ASGI: una outbox por request HTTP, que se vacía cuando ya se mandó la respuesta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        outbox = Outbox()
+        token = _current.set(outbox)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            await outbox.drain()
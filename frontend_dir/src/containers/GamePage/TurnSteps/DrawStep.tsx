@@ -3,8 +3,15 @@ import { useGameContext } from "../../../context/GameContext";
 import { useDraw } from "./useDraw";
 
 export const DrawStep = () => {
-  const { drawing, message, cardCount, drawFromDeck, drawDraft, endTurn } =
-    useDraw();
+  const {
+    drawing,
+    message,
+    cardCount,
+    drawFromDeck,
+    completeHand,
+    drawDraft,
+    endTurn,
+  } = useDraw();
   const { state } = useGameContext();
   const { selectedCard } = state; // Para deshabilitar el botón de draft
 
@@ -27,6 +34,13 @@ export const DrawStep = () => {
             >
               Robar Mazo Principal
             </button>
+            <button
+              className="action-button"
+              onClick={completeHand}
+              disabled={drawing}
+            >
+              Completar Mano
+            </button>
             <button
               className="action-button"
               onClick={drawDraft}
@@ -160,6 +160,7 @@ let mockDiscardState: { lock: boolean; message: string | null };
 
 // useDraw
 let mockDrawFromDeck: ReturnType<typeof vi.fn>;
+let mockCompleteHand: ReturnType<typeof vi.fn>;
 let mockDrawDraft: ReturnType<typeof vi.fn>;
 let mockEndTurn: ReturnType<typeof vi.fn>;
 let mockDrawState: {
@@ -316,12 +317,14 @@ beforeEach(() => {
   }));
 
   mockDrawFromDeck = vi.fn();
+  mockCompleteHand = vi.fn();
   mockDrawDraft = vi.fn();
   mockEndTurn = vi.fn();
   mockDrawState = { drawing: false, message: null, cardCount: 0 };
   (useDraw as ReturnType<typeof vi.fn>).mockImplementation(() => ({
     ...mockDrawState,
     drawFromDeck: mockDrawFromDeck,
+    completeHand: mockCompleteHand,
     drawDraft: mockDrawDraft,
     endTurn: mockEndTurn,
   }));
@@ -726,6 +729,20 @@ describe("TurnSteps Components", () => {
       await userEvent.click(draftButton);
       expect(mockDrawDraft).toHaveBeenCalledTimes(1);
     });
+
+    it("draws one deck card or completes the hand", async () => {
+      mockDrawState.cardCount = 3;
+      render(<DrawStep />);
+      await userEvent.click(
+        screen.getByRole("button", { name: "Robar Mazo Principal" })
+      );
+      expect(mockDrawFromDeck).toHaveBeenCalledTimes(1);
+      expect(mockCompleteHand).not.toHaveBeenCalled();
+      await userEvent.click(
+        screen.getByRole("button", { name: "Completar Mano" })
+      );
+      expect(mockCompleteHand).toHaveBeenCalledTimes(1);
+    });
   });
 
   // --- 10. HideSecretStep ---
@@ -25,6 +25,19 @@ export const useDraw = () => {
     // Nota: El turno no termina hasta que el jugador tenga 6 cartas
   };
 
+  // Completa la mano hasta 6 cartas del mazo en una sola llamada (sin pasar por el draft)
+  const completeHand = async () => {
+    setDrawing(true);
+    try {
+      await cardService.refillHand(myPlayerId, game.game_id);
+      // El WS se encarga de actualizar la mano
+    } catch (err) {
+      console.error("Error al completar la mano:", err);
+      alert("Error al completar la mano. Intenta de nuevo.");
+    }
+    setDrawing(false);
+  };
+
   const drawDraft = async () => {
     if (drawing || !selectedCard) return;
     setDrawing(true);
@@ -53,5 +66,13 @@ export const useDraw = () => {
     }
   };
 
-  return { drawing, message, cardCount, drawFromDeck, drawDraft, endTurn };
+  return {
+    drawing,
+    message,
+    cardCount,
+    drawFromDeck,
+    completeHand,
+    drawDraft,
+    endTurn,
+  };
 };
@@ -133,6 +133,7 @@ beforeEach(() => {
 
   vi.mocked(cardService.discardSelectedList).mockResolvedValue([] as any);
   vi.mocked(cardService.drawCard).mockResolvedValue({ card_id: 1 } as any);
+  vi.mocked(cardService.refillHand).mockResolvedValue([{ card_id: 1 }] as any);
   vi.mocked(cardService.pickUpDraftCard).mockResolvedValue({
     card_id: 2,
   } as any);
@@ -540,6 +541,17 @@ describe("useTurnSteps Hooks", () => {
         await result.current.drawFromDeck();
       });
       expect(cardService.drawCard).toHaveBeenCalledWith(1, 100);
+      expect(cardService.refillHand).not.toHaveBeenCalled();
+    });
+
+    it("should call refillHand to complete the hand", async () => {
+      mockState.myPlayerId = 1;
+      mockState.game = { game_id: 100 };
+      const { result } = renderHook(() => useDraw());
+      await act(async () => {
+        await result.current.completeHand();
+      });
+      expect(cardService.refillHand).toHaveBeenCalledWith(1, 100);
     });
 
     it("should call pickUpDraftCard", async () => {
@@ -26,6 +26,7 @@ export interface ChatMessage {
   sender_name: string;
   sender_id: number;
   message: string;
+  created_at?: string;
 }
 
 // --- 1. DEFINICIÓN DEL ESTADO ---
@@ -67,6 +68,8 @@ export type GameAction =
   | { type: "SET_DISCARD_PILE"; payload: CardResponse[] }
   | { type: "SET_DRAFT_PILE"; payload: CardResponse[] }
   | { type: "ADD_CHAT_MESSAGE"; payload: ChatMessage }
+  | { type: "ADD_CHAT_MESSAGES"; payload: ChatMessage[] }
+  | { type: "SET_CHAT_MESSAGES"; payload: ChatMessage[] }
 
   // Acciones de UI (selección)
   | { type: "SET_STEP"; payload: Steps }
@@ -110,6 +113,15 @@ export const gameReducer = (
         chatMessages: [...state.chatMessages, action.payload],
       };
 
+    case "ADD_CHAT_MESSAGES":
+      return {
+        ...state,
+        chatMessages: [...state.chatMessages, ...action.payload],
+      };
+
+    case "SET_CHAT_MESSAGES":
+      return { ...state, chatMessages: action.payload };
+
     // Casos de UI
     case "SET_STEP":
       return { ...state, currentStep: action.payload };
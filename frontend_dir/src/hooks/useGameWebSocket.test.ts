@@ -188,6 +188,29 @@ describe("useGameWebSocket Hook", () => {
       });
     });
 
+    it("should dispatch ADD_CHAT_MESSAGES for a ChatBatch frame", () => {
+      const chatMsgs = [
+        { sender_name: "Test", message: "Hola" },
+        { sender_name: "Test", message: "Chau" },
+      ];
+      renderHook(() => useGameWebSocket(123));
+      simulateMessage("ChatBatch", chatMsgs);
+      expect(mockDispatch).toHaveBeenCalledWith({
+        type: "ADD_CHAT_MESSAGES",
+        payload: chatMsgs,
+      });
+    });
+
+    it("should dispatch SET_CHAT_MESSAGES for ChatHistory", () => {
+      const history = [{ sender_name: "Test", message: "Hola" }];
+      renderHook(() => useGameWebSocket(123));
+      simulateMessage("ChatHistory", history);
+      expect(mockDispatch).toHaveBeenCalledWith({
+        type: "SET_CHAT_MESSAGES",
+        payload: history,
+      });
+    });
+
     it("should handle data not being a string (dataContent = message.data)", () => {
       renderHook(() => useGameWebSocket(123));
       const chatMsg = { sender_name: "Test", message: "Hola" };
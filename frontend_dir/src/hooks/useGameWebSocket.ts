@@ -66,6 +66,14 @@ export const useGameWebSocket = (gameId: number | undefined) => {
           case "Chat":
             dispatch({ type: "ADD_CHAT_MESSAGE", payload: dataContent });
             break;
+          case "ChatBatch":
+            // Varios mensajes agrupados por el servidor en un solo frame
+            dispatch({ type: "ADD_CHAT_MESSAGES", payload: dataContent });
+            break;
+          case "ChatHistory":
+            // Historial que manda el servidor al (re)conectarse
+            dispatch({ type: "SET_CHAT_MESSAGES", payload: dataContent });
+            break;
 
           default:
             console.log("Mensaje WS recibido sin tipo conocido:", message);
@@ -87,6 +87,19 @@ describe("cardService", () => {
     expect(result).toEqual(mockCard);
   });
 
+  it("refillHand: should call PUT on the refill endpoint", async () => {
+    const mockCards = [{ card_id: 5 }, { card_id: 6 }];
+    mockFetchSuccess(mockCards);
+
+    const result = await cardService.refillHand(1, 100);
+
+    expect(mockFetch).toHaveBeenCalledWith(
+      "http://mock-server.com/cards/refill/1,100",
+      expect.objectContaining({ method: "PUT" })
+    );
+    expect(result).toEqual(mockCards);
+  });
+
   it("getDraftPile: should return empty array on failure (ok: false)", async () => {
     mockFetch.mockResolvedValue({ ok: false }); // Caso especial de este servicio
     const result = await cardService.getDraftPile(100);
@@ -87,6 +87,27 @@ async function drawCard(
   return response.json();
 }
 
+// Completa la mano hasta 6 cartas desde el mazo en una sola llamada
+async function refillHand(
+  player_id: number,
+  game_id: number
+): Promise<CardResponse[]> {
+  const response = await fetch(
+    `${httpServerUrl}/cards/refill/${player_id},${game_id}`,
+    {
+      method: "PUT",
+      headers: {
+        "Content-Type": "application/json",
+      },
+    }
+  );
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.detail || "Error al completar la mano");
+  }
+  return response.json();
+}
+
 async function getDraftPile(gameId: number): Promise<CardResponse[]> {
   const response = await fetch(`${httpServerUrl}/cards/draft/${gameId}`, {
     method: "GET",
@@ -151,6 +172,7 @@ const cardService = {
   getCardsByPlayer,
   discardAuto,
   drawCard,
+  refillHand,
   discardSelectedList,
   getDraftPile,
   pickUpDraftCard,